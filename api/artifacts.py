@@ -0,0 +1,109 @@
+"""
+Rendered output artifacts for completed tasks
+
+Text, VTT and SRT renderings are generated once when a task completes and
+stored next to the other outputs, so status polls can be answered from a
+single small file with ETag/Last-Modified validation instead of re-reading
+the task and re-rendering the transcript.
+"""
+import os
+import json
+import tempfile
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional
+from .config import OUTPUT_DIR
+from .utils import generate_vtt_subtitle, generate_srt_subtitle
+
+# output_format -> artifact file suffix
+ARTIFACT_SUFFIXES = {
+    "text": ".text.json",
+    "subtitle": ".vtt",
+    "vtt": ".vtt",
+    "srt": ".srt"
+}
+
+def get_artifact_path(task_id: str, output_format: str) -> str:
+    """
+    Get path of the rendered artifact for an output format
+    """
+    return os.path.join(OUTPUT_DIR, f"{task_id}{ARTIFACT_SUFFIXES[output_format]}")
+
+def render_artifacts(result: Dict) -> Dict[str, str]:
+    """
+    Render a transcription result into artifact file contents keyed by suffix
+    """
+    vtt_segments = result.get("vtt_segments", [])
+    return {
+        ".text.json": json.dumps({
+            "text": result.get("text", ""),
+            "confidence": result.get("confidence", 0.0)
+        }, ensure_ascii=False),
+        ".vtt": generate_vtt_subtitle(vtt_segments),
+        ".srt": generate_srt_subtitle(vtt_segments)
+    }
+
+def write_task_artifacts(task_id: str, result: Dict):
+    """
+    Render and atomically write all output artifacts of a task
+    """
+    for suffix, content in render_artifacts(result).items():
+        path = os.path.join(OUTPUT_DIR, f"{task_id}{suffix}")
+        fd, temp_path = tempfile.mkstemp(dir=OUTPUT_DIR, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(temp_path, path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+def delete_task_artifacts(task_id: str):
+    """Remove all output artifacts of a task"""
+    for suffix in set(ARTIFACT_SUFFIXES.values()):
+        try:
+            os.remove(os.path.join(OUTPUT_DIR, f"{task_id}{suffix}"))
+        except OSError:
+            pass
+
+def get_artifact_info(task_id: str, output_format: str) -> Optional[Dict]:
+    """
+    Get path, ETag and Last-Modified of an artifact, or None if not rendered
+    """
+    path = get_artifact_path(task_id, output_format)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return {
+        "path": path,
+        "etag": f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+        "last_modified": formatdate(stat.st_mtime, usegmt=True),
+        "mtime": stat.st_mtime
+    }
+
+def is_not_modified(artifact_info: Dict, if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+    """
+    Check conditional request headers against an artifact
+    If-None-Match takes precedence over If-Modified-Since
+    """
+    if if_none_match:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or artifact_info["etag"] in tags or f"W/{artifact_info['etag']}" in tags
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(artifact_info["mtime"]) <= since
+    return False
+
+def read_artifact_result(task_id: str, output_format: str, path: str) -> Dict:
+    """
+    Build the task response result from an artifact file
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    if output_format == "text":
+        return json.loads(content)
+    return {"subtitle": content}
@@ -0,0 +1,247 @@
+"""
+Audio format probing and lightweight decoding to the PCM format expected by Vosk
+
+Integer PCM WAV is read directly and converted with audioop when its
+format differs; other formats are left to ffmpeg, which decodes only one
+selected audio stream of video containers.
+"""
+import io
+import os
+import shutil
+import tempfile
+import wave
+from typing import Dict, Iterator, Optional
+import ffmpeg
+
+try:
+    import audioop
+except ImportError:
+    # audioop was removed from the standard library in Python 3.13
+    from pydub import pyaudioop as audioop
+from .config import VIDEO_FILE_EXTENSIONS
+
+# Audio format expected by Vosk models
+VOSK_SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # s16le
+
+# ffmpeg output options that keep video, subtitle and data streams out of the output
+AUDIO_ONLY_OUTPUT = {'vn': None, 'sn': None, 'dn': None}
+
+# Extra seconds decoded past a duration limit so that exceeding it is detectable
+DURATION_LIMIT_MARGIN = 1.0
+
+class AudioTooLongError(Exception):
+    """Raised when in-memory audio is longer than the allowed duration"""
+    pass
+
+def is_video_file(path: str) -> bool:
+    """Check if a file is a video container by its extension"""
+    return os.path.splitext(path)[1].lower() in VIDEO_FILE_EXTENSIONS
+
+def select_audio_track(source: str, audio_track: int = 0, start_seconds: float = 0.0):
+    """
+    ffmpeg input mapped to one audio stream (0-based index among audio streams)
+    Only the mapped stream is decoded; video packets are demuxed and dropped.
+    start_seconds seeks the input before decoding
+    """
+    input_kwargs = {'ss': start_seconds} if start_seconds else {}
+    return ffmpeg.input(source, **input_kwargs)[f'a:{audio_track}']
+
+def format_ffmpeg_error(message: str, audio_track: int = 0) -> str:
+    """
+    Turn ffmpeg's error for a missing mapped stream into a readable message
+    """
+    if "matches no streams" in message:
+        return f"Audio track {audio_track} not found" if audio_track else "No audio track found"
+    return message
+
+def convert_pcm(frames: bytes, sample_width: int, channels: int, sample_rate: int,
+                state=None, target_rate: int = VOSK_SAMPLE_RATE):
+    """
+    Convert interleaved little-endian PCM to 16-bit mono at target_rate
+    state carries resampler state between consecutive blocks of one stream
+    Returns (pcm, state)
+    """
+    if sample_width == 1:
+        # 8-bit WAV samples are unsigned
+        frames = audioop.bias(frames, 1, -128)
+    if sample_width != SAMPLE_WIDTH:
+        frames = audioop.lin2lin(frames, sample_width, SAMPLE_WIDTH)
+    if channels == 2:
+        frames = audioop.tomono(frames, SAMPLE_WIDTH, 0.5, 0.5)
+    elif channels != 1:
+        raise ValueError(f"Unsupported channel count: {channels}")
+    if sample_rate != target_rate:
+        frames, state = audioop.ratecv(frames, SAMPLE_WIDTH, 1, sample_rate, target_rate, state)
+    return frames, state
+
+def probe_wav_file(path: str) -> Optional[Dict]:
+    """
+    Read the format of an integer PCM WAV file from its header
+    Returns None for anything that is not mono/stereo integer PCM WAV
+    """
+    try:
+        with wave.open(path, 'rb') as wf:
+            info = {
+                "format": "wav",
+                "sample_rate": wf.getframerate(),
+                "channels": wf.getnchannels(),
+                "sample_width": wf.getsampwidth(),
+                "frames": wf.getnframes()
+            }
+    except (wave.Error, EOFError, OSError):
+        return None
+
+    if info["channels"] not in (1, 2) or info["sample_width"] not in (1, 2, 3, 4) or not info["sample_rate"]:
+        return None
+    info["duration"] = info["frames"] / float(info["sample_rate"])
+    return info
+
+def is_vosk_format(info: Dict) -> bool:
+    """Whether probed audio is already 16kHz mono 16-bit PCM"""
+    return (info.get("sample_rate") == VOSK_SAMPLE_RATE and info.get("channels") == 1
+            and info.get("sample_width") == SAMPLE_WIDTH)
+
+def probe_audio_file(path: str) -> Optional[Dict]:
+    """
+    Probe the audio format of a file: WAV header first, then ffprobe
+    Returns None when the format cannot be determined
+    """
+    info = probe_wav_file(path)
+    if info is not None:
+        return info
+
+    try:
+        probe = ffmpeg.probe(path)
+    except Exception:
+        # ffprobe missing or unreadable file
+        return None
+
+    container = probe.get("format", {})
+    audio_streams = [stream for stream in probe.get("streams", []) if stream.get("codec_type") == "audio"]
+    info = {
+        "format": container.get("format_name"),
+        "audio_streams": len(audio_streams),
+        "duration": float(container["duration"]) if container.get("duration") else None
+    }
+    if audio_streams:
+        first = audio_streams[0]
+        info.update({
+            "codec": first.get("codec_name"),
+            "sample_rate": int(first["sample_rate"]) if first.get("sample_rate") else None,
+            "channels": first.get("channels")
+        })
+    return info
+
+def stream_wav_pcm(path: str, chunk_frames: int = 4000, start_seconds: float = 0.0) -> Iterator[bytes]:
+    """
+    Stream an integer PCM WAV file as 16kHz mono s16le
+    Compliant files are passed through unchanged; others are downmixed and
+    resampled block by block, carrying resampler state across blocks.
+    start_seconds skips the beginning of the file without reading it
+    """
+    with wave.open(path, 'rb') as wf:
+        sample_width = wf.getsampwidth()
+        channels = wf.getnchannels()
+        sample_rate = wf.getframerate()
+        if start_seconds > 0:
+            wf.setpos(min(wf.getnframes(), int(start_seconds * sample_rate)))
+        compliant = is_vosk_format({"sample_rate": sample_rate, "channels": channels, "sample_width": sample_width})
+        # Read enough source frames for about chunk_frames output frames
+        read_frames = max(1, chunk_frames * sample_rate // VOSK_SAMPLE_RATE)
+        state = None
+
+        while True:
+            frames = wf.readframes(read_frames)
+            if not frames:
+                break
+            if compliant:
+                yield frames
+                continue
+            pcm, state = convert_pcm(frames, sample_width, channels, sample_rate, state)
+            if pcm:
+                yield pcm
+
+def pcm_from_wav_bytes(data: bytes, max_duration: Optional[float] = None) -> Optional[bytes]:
+    """
+    Decode PCM WAV bytes to 16kHz mono s16le
+    Returns None for anything that is not mono/stereo integer PCM WAV.
+    Raises AudioTooLongError from the header, before reading any samples,
+    when the file is longer than max_duration seconds
+    """
+    try:
+        with wave.open(io.BytesIO(data), 'rb') as wf:
+            sample_width = wf.getsampwidth()
+            channels = wf.getnchannels()
+            sample_rate = wf.getframerate()
+            if max_duration is not None and wf.getnframes() > max_duration * sample_rate:
+                raise AudioTooLongError(f"Audio exceeds {max_duration:g} seconds")
+            frames = wf.readframes(wf.getnframes())
+    except (wave.Error, EOFError):
+        return None
+
+    if channels not in (1, 2) or sample_width not in (1, 2, 3, 4):
+        return None
+    pcm, _ = convert_pcm(frames, sample_width, channels, sample_rate)
+    return pcm
+
+def pcm_from_bytes_with_ffmpeg(data: bytes, filename: str, audio_track: int = 0,
+                               max_duration: Optional[float] = None) -> bytes:
+    """
+    Decode one audio track of any ffmpeg-readable bytes to 16kHz mono s16le
+    Input is piped through stdin; containers that need seeking (e.g. MP4
+    with the index at the end) are retried from a temporary copy.
+    With max_duration, ffmpeg stops shortly after the limit, so compressed
+    input cannot expand to unbounded PCM, and AudioTooLongError is raised
+    """
+    if shutil.which("ffmpeg") is None:
+        raise Exception("Audio decoding failed: ffmpeg not found")
+
+    output_options = dict(AUDIO_ONLY_OUTPUT)
+    if max_duration is not None:
+        output_options['t'] = max_duration + DURATION_LIMIT_MARGIN
+
+    def decode(source: str, input_data: Optional[bytes]) -> bytes:
+        pcm, _ = (
+            select_audio_track(source, audio_track)
+            .output('pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar=VOSK_SAMPLE_RATE,
+                    **output_options)
+            .global_args('-loglevel', 'error')
+            .run(input=input_data, capture_stdout=True, capture_stderr=True)
+        )
+        if max_duration is not None and get_pcm_duration(pcm) > max_duration:
+            raise AudioTooLongError(f"Audio exceeds {max_duration:g} seconds")
+        return pcm
+
+    try:
+        pcm = decode('pipe:', data)
+        if pcm:
+            return pcm
+    except ffmpeg.Error:
+        pass
+
+    with tempfile.NamedTemporaryFile(suffix=os.path.splitext(filename)[1]) as tmp:
+        tmp.write(data)
+        tmp.flush()
+        try:
+            return decode(tmp.name, None)
+        except ffmpeg.Error as e:
+            message = e.stderr.decode('utf-8', errors='replace').strip() if e.stderr else str(e)
+            raise Exception(f"Audio decoding failed: {format_ffmpeg_error(message, audio_track)}")
+
+def decode_audio_bytes(data: bytes, filename: str, audio_track: int = 0,
+                       max_duration: Optional[float] = None) -> bytes:
+    """
+    Decode an audio track of an in-memory upload to 16kHz mono s16le PCM
+    Raises AudioTooLongError as soon as the audio is known to exceed max_duration
+    """
+    # WAV files have a single track
+    if audio_track == 0:
+        pcm = pcm_from_wav_bytes(data, max_duration)
+        if pcm is not None:
+            return pcm
+    return pcm_from_bytes_with_ffmpeg(data, filename, audio_track, max_duration)
+
+def get_pcm_duration(pcm: bytes, sample_rate: int = VOSK_SAMPLE_RATE) -> float:
+    """Duration in seconds of 16-bit mono PCM"""
+    return len(pcm) / float(sample_rate * SAMPLE_WIDTH)
@@ -1,7 +1,7 @@
 """
 API Key Authentication module
 """
-from fastapi import HTTPException, Request, Depends
+from fastapi import HTTPException, Request, Depends, WebSocket
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional
 import os
@@ -22,7 +22,7 @@ if os.path.exists(config_file):
 
 security = HTTPBearer(auto_error=False)
 
-def get_api_key_from_header(request: Request) -> Optional[str]:
+def get_api_key_from_header(request) -> Optional[str]:
     """
     Extract API key from various header formats
     """
@@ -68,4 +68,18 @@ def verify_api_key(request: Request, credentials: Optional[HTTPAuthorizationCred
             detail="Invalid API key"
         )
     
-    return api_key
\ No newline at end of file
+    return api_key
+
+def verify_websocket_api_key(websocket: WebSocket) -> Optional[str]:
+    """
+    Verify API key of a WebSocket connection
+    Browsers cannot set headers on WebSocket requests, so the key may also
+    be passed as the 'api_key' query parameter
+    Returns the API key if valid, otherwise None
+    """
+    api_key = get_api_key_from_header(websocket) or websocket.query_params.get("api_key")
+    
+    if not api_key or api_key not in VALID_API_KEYS:
+        return None
+    
+    return api_key
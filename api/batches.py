@@ -0,0 +1,235 @@
+"""
+Batch transcription of many files submitted in one request
+
+A batch record lists its child tasks and is written once at creation;
+batch status and results are derived from the child tasks so they never
+go stale.
+"""
+import os
+import json
+import hashlib
+import tarfile
+import tempfile
+import zipfile
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional
+from .config import BATCHES_DIR, MAX_FILE_SIZE, SUPPORTED_ARCHIVE_EXTENSIONS, UPLOAD_CHUNK_SIZE
+from .events import TERMINAL_STATUSES
+from .tasks import get_task, get_progress_fields
+from .utils import FileTooLargeError, cleanup_temp_files, get_file_size_limit_message, validate_file_type
+
+os.makedirs(BATCHES_DIR, exist_ok=True)
+
+class InvalidBatchError(Exception):
+    """Raised for unreadable archives or batches over MAX_BATCH_FILES"""
+    pass
+
+def is_archive(file_name: str) -> bool:
+    """
+    Check if an upload is a zip or tar archive of audio files
+    """
+    return any(file_name.lower().endswith(ext) for ext in SUPPORTED_ARCHIVE_EXTENSIONS)
+
+def _copy_member(source, destination: str, max_size: int) -> str:
+    """
+    Copy an archive member to disk enforcing max_size on the actual bytes read
+    Returns the sha256 of the content
+    """
+    hasher = hashlib.sha256()
+    total_size = 0
+    try:
+        with open(destination, 'wb') as f:
+            while True:
+                chunk = source.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                total_size += len(chunk)
+                if total_size > max_size:
+                    raise FileTooLargeError(get_file_size_limit_message(max_size))
+                hasher.update(chunk)
+                f.write(chunk)
+    except BaseException:
+        cleanup_temp_files([destination])
+        raise
+    return hasher.hexdigest()
+
+def _iter_archive_members(archive_path: str) -> Iterator[tuple]:
+    """Yield (name, file object opener) for regular files in a zip or tar archive"""
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir():
+                    yield info.filename, lambda info=info: archive.open(info)
+        return
+
+    with tarfile.open(archive_path, 'r:*') as archive:
+        for member in archive:
+            # Symlinks, devices and directories are never extracted
+            if member.isfile():
+                yield member.name, lambda member=member: archive.extractfile(member)
+
+def _audio_member_filename(name: str) -> Optional[str]:
+    """Get the base name of an archive member if it is a supported audio file"""
+    filename = os.path.basename(name.replace("\\", "/"))
+    # Skip hidden files and macOS resource forks
+    if not filename or filename.startswith(".") or "__MACOSX/" in name:
+        return None
+    if not validate_file_type(filename):
+        return None
+    return filename
+
+def count_archive_members(archive_path: str) -> int:
+    """
+    Count the audio files extract_archive would extract, without extracting them
+    Raises InvalidBatchError for unreadable archives
+    """
+    try:
+        return sum(1 for name, _ in _iter_archive_members(archive_path) if _audio_member_filename(name))
+    except (zipfile.BadZipFile, tarfile.TarError) as e:
+        raise InvalidBatchError(f"Invalid archive: {str(e)}")
+
+def extract_archive(archive_path: str, destination_for: Callable[[str], str],
+                    max_files: int, max_size: int = MAX_FILE_SIZE) -> List[Dict]:
+    """
+    Extract the supported audio files of an archive
+    Only the base name of each member is used, so paths inside the archive can
+    never escape the destination. destination_for(filename) returns the path
+    to write a member to. Returns [{"filename", "path", "content_hash"}, ...]
+    Raises InvalidBatchError for unreadable archives or more than max_files audio files
+    """
+    extracted = []
+    try:
+        for name, open_member in _iter_archive_members(archive_path):
+            filename = _audio_member_filename(name)
+            if filename is None:
+                continue
+            if len(extracted) >= max_files:
+                raise InvalidBatchError(f"Batch exceeds maximum of {max_files} files")
+
+            path = destination_for(filename)
+            with open_member() as source:
+                content_hash = _copy_member(source, path, max_size)
+            extracted.append({"filename": filename, "path": path, "content_hash": content_hash})
+    except (zipfile.BadZipFile, tarfile.TarError) as e:
+        cleanup_temp_files([item["path"] for item in extracted])
+        raise InvalidBatchError(f"Invalid archive: {str(e)}")
+    except BaseException:
+        cleanup_temp_files([item["path"] for item in extracted])
+        raise
+
+    return extracted
+
+def _batch_path(batch_id: str) -> str:
+    return os.path.join(BATCHES_DIR, f"{batch_id}.json")
+
+def create_batch(batch_id: str, tasks: List[Dict], language: str, model_size: str) -> Dict:
+    """
+    Create a batch record for child tasks given as [{"task_id", "filename"}, ...]
+    """
+    batch_data = {
+        "id": batch_id,
+        "language": language,
+        "model_size": model_size,
+        "tasks": [{"task_id": task["task_id"], "filename": task["filename"]} for task in tasks],
+        "created_at": datetime.now().isoformat()
+    }
+
+    fd, temp_path = tempfile.mkstemp(dir=BATCHES_DIR, suffix=".tmp")
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(batch_data, f, ensure_ascii=False)
+    os.replace(temp_path, _batch_path(batch_id))
+
+    return batch_data
+
+def get_batch(batch_id: str) -> Optional[Dict]:
+    """
+    Get a batch record, or None if it does not exist
+    """
+    try:
+        with open(_batch_path(batch_id), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def delete_batch(batch_id: str) -> bool:
+    """Remove a batch record (child tasks are left alone)"""
+    try:
+        os.remove(_batch_path(batch_id))
+        return True
+    except OSError:
+        return False
+
+def get_batch_status(batch_data: Dict) -> Dict:
+    """
+    Aggregate the status and progress of a batch from its child tasks
+    Progress counts finished tasks as complete and processing tasks by
+    their decode progress; tasks that no longer exist count as failed
+    """
+    counts = {"queued": 0, "processing": 0, "done": 0, "failed": 0}
+    completed = 0.0
+    tasks = []
+
+    for child in batch_data["tasks"]:
+        task_data = get_task(child["task_id"])
+        status = task_data["status"] if task_data else "failed"
+        counts[status] = counts.get(status, 0) + 1
+
+        if status in TERMINAL_STATUSES:
+            completed += 1
+        elif status == "processing" and task_data.get("progress"):
+            completed += get_progress_fields(task_data["progress"]).get("progress") or 0.0
+
+        tasks.append({
+            "task_id": child["task_id"],
+            "filename": child["filename"],
+            "status": status,
+            "error": task_data.get("error") if task_data else "Task not found"
+        })
+
+    total = len(batch_data["tasks"])
+    if counts["done"] + counts["failed"] == total:
+        status = "done"
+    elif counts["queued"] == total:
+        status = "queued"
+    else:
+        status = "processing"
+
+    return {
+        "batch_id": batch_data["id"],
+        "status": status,
+        "language": batch_data["language"],
+        "model_size": batch_data["model_size"],
+        "total": total,
+        "counts": counts,
+        "progress": round(completed / total, 4) if total else 1.0,
+        "tasks": tasks,
+        "created_at": batch_data["created_at"]
+    }
+
+def iter_batch_results(batch_data: Dict) -> Iterator[str]:
+    """
+    Stream the combined results of a batch as one JSON document
+    Child results are read one at a time so memory stays bounded by the
+    largest single transcript
+    """
+    yield json.dumps({
+        "batch_id": batch_data["id"],
+        "language": batch_data["language"],
+        "model_size": batch_data["model_size"]
+    }, ensure_ascii=False)[:-1] + ', "results": ['
+
+    for index, child in enumerate(batch_data["tasks"]):
+        task_data = get_task(child["task_id"]) or {}
+        result = task_data.get("result") or {}
+        item = {
+            "task_id": child["task_id"],
+            "filename": child["filename"],
+            "status": task_data.get("status", "failed"),
+            "error": task_data.get("error") if task_data else "Task not found",
+            "text": result.get("text"),
+            "confidence": result.get("confidence"),
+            "vtt_segments": result.get("vtt_segments")
+        }
+        yield ("" if index == 0 else ", ") + json.dumps(item, ensure_ascii=False)
+
+    yield "]}"
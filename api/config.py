@@ -13,6 +13,9 @@ INPUT_DIR = os.getenv("INPUT_DIR", os.path.join(PROJECT_ROOT, "data", "input"))
 OUTPUT_DIR = os.getenv("OUTPUT_DIR", os.path.join(PROJECT_ROOT, "data", "output"))
 TASKS_DIR = os.getenv("TASKS_DIR", os.path.join(PROJECT_ROOT, "data", "tasks"))
 CONFIG_DIR = os.getenv("CONFIG_DIR", os.path.join(PROJECT_ROOT, "config"))
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", os.path.join(PROJECT_ROOT, "data", "cache"))
+WEBHOOK_QUEUE_DIR = os.getenv("WEBHOOK_QUEUE_DIR", os.path.join(PROJECT_ROOT, "data", "webhooks"))
+BATCHES_DIR = os.getenv("BATCHES_DIR", os.path.join(PROJECT_ROOT, "data", "batches"))
 
 # Ensure directories exist
 os.makedirs(INPUT_DIR, exist_ok=True)
@@ -27,10 +30,80 @@ SUPPORTED_MODEL_SIZES = ["small", "large"]
 # File upload limits
 MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", "100")) * 1024 * 1024  # 100MB default
 SUPPORTED_FILE_EXTENSIONS = ['.wav', '.mp3', '.mp4', '.mov']
+VIDEO_FILE_EXTENSIONS = ['.mp4', '.mov']  # containers decoded by extracting one audio track
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))  # bytes per write when saving uploads
+UPLOAD_FORM_OVERHEAD = int(os.getenv("UPLOAD_FORM_OVERHEAD", str(64 * 1024)))  # bytes of form fields allowed on top of a file
+
+# Batch submissions
+SUPPORTED_ARCHIVE_EXTENSIONS = ['.zip', '.tar', '.tar.gz', '.tgz']
+MAX_BATCH_FILES = int(os.getenv("MAX_BATCH_FILES", "100"))  # audio files per batch, including archive members
+MAX_ARCHIVE_SIZE = int(os.getenv("MAX_ARCHIVE_SIZE", "1024")) * 1024 * 1024  # 1GB default per uploaded archive
+MAX_BATCH_REQUEST_SIZE = int(os.getenv("MAX_BATCH_REQUEST_SIZE", "2048")) * 1024 * 1024  # 2GB default per /batch request
 
 # Rate limiting
 RATE_LIMIT_REQUESTS = int(os.getenv("RATE_LIMIT_REQUESTS", "3"))
 RATE_LIMIT_WINDOW = int(os.getenv("RATE_LIMIT_WINDOW", "10"))  # seconds
 
+# Task completion notifications
+MAX_LONG_POLL_WAIT = int(os.getenv("MAX_LONG_POLL_WAIT", "60"))  # seconds, upper bound for ?wait=
+SSE_HEARTBEAT_SECONDS = int(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+# Paginated transcript queries (/tasks/{task_id}/words and /segments)
+TRANSCRIPT_PAGE_SIZE = int(os.getenv("TRANSCRIPT_PAGE_SIZE", "500"))  # default items per page
+TRANSCRIPT_MAX_PAGE_SIZE = int(os.getenv("TRANSCRIPT_MAX_PAGE_SIZE", "5000"))
+WORD_TABLE_CACHE_SIZE = int(os.getenv("WORD_TABLE_CACHE_SIZE", "16"))  # decoded word tables kept in memory
+PARTIAL_RESULTS_CACHE_SIZE = int(os.getenv("PARTIAL_RESULTS_CACHE_SIZE", "16"))  # parsed partial logs of processing tasks
+
 # Task processing
-BACKGROUND_TASK_ENABLED = os.getenv("BACKGROUND_TASK_ENABLED", "true").lower() == "true"
\ No newline at end of file
+BACKGROUND_TASK_ENABLED = os.getenv("BACKGROUND_TASK_ENABLED", "true").lower() == "true"
+PROGRESS_UPDATE_INTERVAL = float(os.getenv("PROGRESS_UPDATE_INTERVAL", "5"))  # seconds between progress writes
+
+# Synchronous fast path: short clips decoded in memory and returned inline
+SYNC_MAX_FILE_SIZE = int(os.getenv("SYNC_MAX_FILE_SIZE", "5")) * 1024 * 1024  # 5MB default
+SYNC_MAX_DURATION = float(os.getenv("SYNC_MAX_DURATION", "30"))  # seconds, limit for sync=true
+SYNC_AUTO_MAX_DURATION = float(os.getenv("SYNC_AUTO_MAX_DURATION", "0"))  # seconds, decode shorter clips inline automatically (0 disables)
+
+# Model cache
+MODEL_CACHE_MAX_MB = int(os.getenv("MODEL_CACHE_MAX_MB", "4096"))  # memory budget for loaded models
+
+# Worker pool and job queue
+WORKER_COUNT = int(os.getenv("WORKER_COUNT", str(os.cpu_count() or 1)))  # concurrent decoders
+MAX_QUEUE_SIZE = int(os.getenv("MAX_QUEUE_SIZE", "100"))  # queued tasks before rejecting uploads
+QUEUE_RETRY_AFTER = int(os.getenv("QUEUE_RETRY_AFTER", "30"))  # seconds, sent in Retry-After
+# Idle recognizers kept per model for reuse across tasks (0 disables pooling)
+RECOGNIZER_POOL_SIZE = int(os.getenv("RECOGNIZER_POOL_SIZE", str(WORKER_COUNT)))
+SYNC_MAX_CONCURRENT = int(os.getenv("SYNC_MAX_CONCURRENT", str(WORKER_COUNT)))  # inline decodes outside the worker pool
+
+# Decoding backend: "thread" runs in the API process, "process" in isolated worker processes
+DECODE_BACKEND = os.getenv("DECODE_BACKEND", "thread").lower()
+# Models each worker process loads at startup, e.g. "en:small,zh:small"
+# Note: every worker process holds its own copy of these models
+PROCESS_PRELOAD_MODELS = os.getenv("PROCESS_PRELOAD_MODELS", "")
+
+# Stream ffmpeg-decoded PCM into the recognizer instead of converting to a temporary WAV
+STREAMING_DECODE_ENABLED = os.getenv("STREAMING_DECODE_ENABLED", "true").lower() == "true"
+
+# Parallel decoding of long audio split at silence (threads per task)
+PARALLEL_DECODE_ENABLED = os.getenv("PARALLEL_DECODE_ENABLED", "false").lower() == "true"
+PARALLEL_DECODE_WORKERS = int(os.getenv("PARALLEL_DECODE_WORKERS", str(os.cpu_count() or 1)))
+PARALLEL_CHUNK_SECONDS = float(os.getenv("PARALLEL_CHUNK_SECONDS", "60"))  # maximum piece length
+
+# Real-time streaming
+MAX_STREAM_SESSIONS = int(os.getenv("MAX_STREAM_SESSIONS", str(os.cpu_count() or 1)))  # concurrent /stream connections
+
+# Task storage backend: "json" (one file per task) or "sqlite"
+TASK_STORE = os.getenv("TASK_STORE", "json").lower()
+TASK_DB_PATH = os.getenv("TASK_DB_PATH", os.path.join(TASKS_DIR, "tasks.db"))
+TASK_JOURNAL_MAX_BYTES = int(os.getenv("TASK_JOURNAL_MAX_BYTES", str(64 * 1024)))  # json store: journal size before compaction
+
+# Result cache for repeated submissions of identical audio
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+RESULT_CACHE_MAX_MB = int(os.getenv("RESULT_CACHE_MAX_MB", "512"))
+
+# Webhook callbacks on task completion
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")  # HMAC key for X-Webhook-Signature; deliveries are unsigned when empty
+WEBHOOK_TIMEOUT = float(os.getenv("WEBHOOK_TIMEOUT", "10"))  # seconds per delivery attempt
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "8"))
+WEBHOOK_BACKOFF_BASE = float(os.getenv("WEBHOOK_BACKOFF_BASE", "5"))  # seconds, doubled after each failure
+WEBHOOK_BACKOFF_MAX = float(os.getenv("WEBHOOK_BACKOFF_MAX", "3600"))
+WEBHOOK_ALLOW_PRIVATE_HOSTS = os.getenv("WEBHOOK_ALLOW_PRIVATE_HOSTS", "false").lower() == "true"  # allow loopback, link-local and private callback hosts
@@ -0,0 +1,94 @@
+"""
+In-process notification bus for task status changes
+
+Worker threads publish task updates; async request handlers (long-poll
+and Server-Sent Events) subscribe per task and are woken immediately.
+"""
+import asyncio
+import threading
+from typing import Callable, Dict, Optional, Set, Tuple
+from starlette.concurrency import run_in_threadpool
+
+TERMINAL_STATUSES = ("done", "failed")
+
+class TaskEventBus:
+    """
+    Thread-safe publish/subscribe of task events to asyncio subscribers
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, task_id: str) -> asyncio.Queue:
+        """
+        Subscribe to events of a task (call from a running event loop)
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers.setdefault(task_id, set()).add(subscriber)
+        return queue
+
+    def unsubscribe(self, task_id: str, queue: asyncio.Queue):
+        """Stop receiving events of a task"""
+        with self._lock:
+            subscribers = self._subscribers.get(task_id)
+            if not subscribers:
+                return
+            subscribers.difference_update({s for s in subscribers if s[1] is queue})
+            if not subscribers:
+                del self._subscribers[task_id]
+
+    def publish(self, task_id: str, event: Dict):
+        """
+        Deliver an event to all subscribers of a task (callable from any thread)
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.get(task_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # Subscriber's event loop is closed
+                pass
+
+    def subscriber_count(self, task_id: str) -> int:
+        """Number of subscribers of a task"""
+        with self._lock:
+            return len(self._subscribers.get(task_id, ()))
+
+_event_bus = TaskEventBus()
+
+def get_event_bus() -> TaskEventBus:
+    """
+    Get the process-wide task event bus
+    """
+    return _event_bus
+
+async def wait_for_task_completion(task_id: str, timeout: float, get_status: Callable[[], Optional[str]]):
+    """
+    Wait up to timeout seconds for a task to reach a terminal status
+    get_status returns the current stored status; it is checked after
+    subscribing so a completion between the check and the wait is not missed
+    """
+    bus = get_event_bus()
+    queue = bus.subscribe(task_id)
+    try:
+        status = await run_in_threadpool(get_status)
+        if status is None or status in TERMINAL_STATUSES:
+            return
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            event = await asyncio.wait_for(queue.get(), remaining)
+            if event.get("status") in TERMINAL_STATUSES:
+                return
+    except asyncio.TimeoutError:
+        return
+    finally:
+        bus.unsubscribe(task_id, queue)
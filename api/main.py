@@ -1,27 +1,86 @@
 """
 Main API entry point for Vosk Speech-to-Text service
 """
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request, Depends, Query
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request, Depends, Query, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 import os
+import json
 import uuid
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager
 from datetime import datetime
-from .auth import verify_api_key
-from .tasks import create_task, get_task_status, start_background_task
-from .stt import process_audio_file
+from typing import List, Optional
+from starlette.concurrency import run_in_threadpool
+from .auth import verify_api_key, verify_websocket_api_key
+from .tasks import (
+    create_task, get_task_status, get_stored_task_status, start_background_task, start_batch_tasks,
+    update_task_status, format_task_response, recover_interrupted_tasks, task_exists, get_task as get_task_record
+)
+from .batches import (
+    InvalidBatchError, is_archive, count_archive_members, extract_archive, create_batch, get_batch, get_batch_status,
+    iter_batch_results
+)
+from .events import get_event_bus, wait_for_task_completion, TERMINAL_STATUSES
+from .scheduler import get_scheduler, QueueFullError
+from .stt import (
+    process_audio_file, create_recognizer, complete_task, acquire_sync_slot, release_sync_slot,
+    transcribe_pcm_bytes
+)
+from .audio import decode_audio_bytes, AudioTooLongError
+from .result_cache import get_content_key, get_result_cache
+from .webhooks import get_webhook_dispatcher
+from .artifacts import get_artifact_info, is_not_modified, read_artifact_result
+from .words import InvalidCursorError, WordTable, get_page, get_task_words
+from .partial_results import get_partial_transcript
+from .model_cache import get_model, get_model_cache
+from .metrics import UPLOAD_SECONDS, register_gauge, render_metrics
+from .streaming import run_stream_session, acquire_stream_session, release_stream_session
 from .models import get_supported_languages_and_models
-from .utils import validate_uploaded_file, validate_language_and_model
-from .config import RATE_LIMIT_REQUESTS, RATE_LIMIT_WINDOW, INPUT_DIR
+from .utils import (
+    validate_uploaded_file, validate_language_and_model, cleanup_temp_files,
+    save_upload_file, read_upload_bytes, FileTooLargeError, validate_callback_url, RequestSizeLimitMiddleware
+)
+from .config import (
+    RATE_LIMIT_REQUESTS, RATE_LIMIT_WINDOW, INPUT_DIR, QUEUE_RETRY_AFTER, DECODE_BACKEND,
+    MAX_FILE_SIZE, UPLOAD_FORM_OVERHEAD, MAX_BATCH_REQUEST_SIZE,
+    RESULT_CACHE_ENABLED, MAX_LONG_POLL_WAIT, SSE_HEARTBEAT_SECONDS, MAX_BATCH_FILES, MAX_ARCHIVE_SIZE,
+    SYNC_MAX_FILE_SIZE, SYNC_MAX_DURATION, SYNC_AUTO_MAX_DURATION, TRANSCRIPT_PAGE_SIZE, TRANSCRIPT_MAX_PAGE_SIZE
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background services with the application"""
+    if DECODE_BACKEND == "process":
+        # Start decode worker processes so models are preloaded before the first task
+        from .process_pool import get_process_pool
+        get_process_pool().start()
+    # Resume webhook deliveries persisted before a restart
+    get_webhook_dispatcher().start()
+    # Re-queue tasks interrupted by the previous shutdown
+    await run_in_threadpool(recover_interrupted_tasks)
+    yield
+    get_webhook_dispatcher().stop()
+    if DECODE_BACKEND == "process":
+        get_process_pool().shutdown()
 
 # Initialize rate limiter
 limiter = Limiter(key_func=get_remote_address)
-app = FastAPI(title="Vosk STT API", version="1.0.0")
+app = FastAPI(title="Vosk STT API", version="1.0.0", lifespan=lifespan)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+# Reject oversized uploads before the multipart body is parsed
+UPLOAD_REQUEST_LIMITS = {
+    "/transcribe": MAX_FILE_SIZE + UPLOAD_FORM_OVERHEAD,
+    "/batch": MAX_BATCH_REQUEST_SIZE + UPLOAD_FORM_OVERHEAD
+}
+app.add_middleware(RequestSizeLimitMiddleware, limits=UPLOAD_REQUEST_LIMITS)
+
 # Add CORS middleware for development
 app.add_middleware(
     CORSMiddleware,
@@ -31,6 +90,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Gauges sampled at scrape time
+register_gauge("stt_queue_depth", "Jobs waiting in the task queue", lambda: get_scheduler().queue_size())
+register_gauge("stt_active_workers", "Worker threads currently running a job", lambda: get_scheduler().active_count())
+register_gauge("stt_model_cache_resident_bytes", "Estimated size of models resident in the model cache",
+               lambda: get_model_cache().stats()["resident_bytes"])
+register_gauge("stt_model_cache_models", "Number of models resident in the model cache",
+               lambda: len(get_model_cache().stats()["models"]))
+
 def create_error_response(error_message: str):
     """Create standardized error response"""
     return {"status": "failed", "error": error_message, "data": None}
@@ -39,6 +106,87 @@ def create_success_response(data: dict):
     """Create standardized success response"""
     return {"status": "success", "error": None, "data": data}
 
+def create_queue_full_exception():
+    """Create 503 response asking the client to retry later"""
+    return HTTPException(
+        status_code=503,
+        detail=create_error_response("Server busy: task queue is full, please retry later"),
+        headers={"Retry-After": str(QUEUE_RETRY_AFTER)}
+    )
+
+async def complete_from_result_cache(task_id: str, input_file_path: str, content_hash: str,
+                                     language: str, model_size: str) -> bool:
+    """
+    Complete a task immediately when identical audio was already transcribed
+    """
+    if not RESULT_CACHE_ENABLED:
+        return False
+    cached_result = await run_in_threadpool(get_result_cache().get, content_hash, language, model_size)
+    if cached_result is None:
+        return False
+    await run_in_threadpool(complete_task, task_id, cached_result, cache_result=False)
+    cleanup_temp_files([input_file_path])
+    return True
+
+async def transcribe_inline(file: UploadFile, language: str, model_size: str, output_format: str,
+                            explicit: bool, audio_track: int = 0) -> Optional[dict]:
+    """
+    Decode a short clip in memory and build the inline response
+    No task record or temporary files are written. Returns None when the
+    clip should go through the task queue instead: all inline slots are busy,
+    or (automatic mode only) the clip is too large, too long or undecodable
+    """
+    if not acquire_sync_slot():
+        return None
+    try:
+        try:
+            with UPLOAD_SECONDS.time():
+                data = await read_upload_bytes(file, SYNC_MAX_FILE_SIZE)
+        except FileTooLargeError as e:
+            if not explicit:
+                return None
+            raise HTTPException(
+                status_code=413,
+                detail=create_error_response(f"{str(e)} for sync mode; submit without sync=true")
+            )
+        
+        content_hash = get_content_key(hashlib.sha256(data).hexdigest(), audio_track)
+        result = None
+        if RESULT_CACHE_ENABLED:
+            result = await run_in_threadpool(get_result_cache().get, content_hash, language, model_size)
+        
+        if result is None:
+            # The decode stops at the duration limit instead of expanding the whole clip
+            max_duration = SYNC_MAX_DURATION if explicit else SYNC_AUTO_MAX_DURATION
+            try:
+                pcm = await run_in_threadpool(decode_audio_bytes, data, file.filename, audio_track, max_duration)
+            except AudioTooLongError:
+                if not explicit:
+                    return None
+                raise HTTPException(
+                    status_code=400,
+                    detail=create_error_response(
+                        f"Audio exceeds {max_duration:g} seconds for sync mode; submit without sync=true"
+                    )
+                )
+            except Exception as e:
+                if not explicit:
+                    return None
+                raise HTTPException(
+                    status_code=400,
+                    detail=create_error_response(str(e))
+                )
+            
+            result = await run_in_threadpool(transcribe_pcm_bytes, pcm, language, model_size)
+            if RESULT_CACHE_ENABLED:
+                await run_in_threadpool(get_result_cache().put, content_hash, language, model_size, result)
+        
+        return create_success_response(format_task_response(
+            {"id": None, "status": "done", "result": result, "error": None}, output_format
+        ))
+    finally:
+        release_sync_slot()
+
 @app.post("/transcribe")
 @limiter.limit(f"{RATE_LIMIT_REQUESTS}/{RATE_LIMIT_WINDOW} seconds")
 async def transcribe(
@@ -46,10 +194,18 @@ async def transcribe(
     file: UploadFile = File(...),
     language: str = Form(...),
     model_size: str = Form("small"),
+    callback_url: Optional[str] = Form(None),
+    sync: bool = Form(False),
+    output_format: str = Form("text", pattern="^(text|subtitle|vtt|srt)$"),
+    audio_track: int = Form(0, ge=0),
     api_key: str = Depends(verify_api_key)
 ):
     """
     Upload audio file and submit STT task
+    Optional callback_url receives a signed POST when the task finishes
+    audio_track selects the audio stream (0-based) of multi-track video files
+    With sync=true short clips are decoded in memory and the result is
+    returned inline in output_format, without creating a task
     """
     try:
         # Validate file
@@ -68,21 +224,71 @@ async def transcribe(
                 detail=create_error_response(param_validation["error"])
             )
         
+        # Validate webhook callback URL
+        if callback_url:
+            callback_validation = await run_in_threadpool(validate_callback_url, callback_url)
+            if not callback_validation["valid"]:
+                raise HTTPException(
+                    status_code=400,
+                    detail=create_error_response(callback_validation["error"])
+                )
+        
+        if sync and callback_url:
+            raise HTTPException(
+                status_code=400,
+                detail=create_error_response("callback_url cannot be combined with sync=true")
+            )
+        
+        # Decode short clips inline instead of queueing a task
+        auto_sync = (SYNC_AUTO_MAX_DURATION > 0 and not callback_url
+                     and file.size is not None and file.size <= SYNC_MAX_FILE_SIZE)
+        if sync or auto_sync:
+            inline_response = await transcribe_inline(file, language, model_size, output_format, explicit=sync,
+                                                      audio_track=audio_track)
+            if inline_response is not None:
+                return inline_response
+            await file.seek(0)
+        
+        # Reject early when the job queue has no room
+        if get_scheduler().is_full():
+            raise create_queue_full_exception()
+        
         # Generate unique task ID
         task_id = str(uuid.uuid4())
         
         # Save uploaded file
         input_file_path = os.path.join(INPUT_DIR, f"{task_id}_{file.filename}")
         
-        with open(input_file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        hasher = hashlib.sha256()
+        try:
+            with UPLOAD_SECONDS.time():
+                await save_upload_file(file, input_file_path, hasher=hasher)
+        except FileTooLargeError as e:
+            raise HTTPException(
+                status_code=413,
+                detail=create_error_response(str(e))
+            )
+        content_hash = get_content_key(hasher.hexdigest(), audio_track)
         
         # Create task record
-        create_task(task_id, input_file_path, language, model_size)
+        await run_in_threadpool(create_task, task_id, input_file_path, language, model_size,
+                                content_hash=content_hash, callback_url=callback_url or None,
+                                audio_track=audio_track)
+        
+        # Complete immediately when identical audio was already transcribed
+        if await complete_from_result_cache(task_id, input_file_path, content_hash, language, model_size):
+            return create_success_response({
+                "task_id": task_id,
+                "status": "done"
+            })
         
         # Start background processing
-        start_background_task(task_id, input_file_path, language, model_size)
+        try:
+            start_background_task(task_id, input_file_path, language, model_size, audio_track=audio_track)
+        except QueueFullError:
+            await run_in_threadpool(update_task_status, task_id, "failed", error="Task queue is full")
+            cleanup_temp_files([input_file_path])
+            raise create_queue_full_exception()
         
         return create_success_response({
             "task_id": task_id,
@@ -97,20 +303,242 @@ async def transcribe(
             detail=create_error_response(f"Internal server error: {str(e)}")
         )
 
+@app.post("/batch")
+@limiter.limit(f"{RATE_LIMIT_REQUESTS}/{RATE_LIMIT_WINDOW} seconds")
+async def transcribe_batch(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    language: str = Form(...),
+    model_size: str = Form("small"),
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Upload many audio files, or zip/tar archives of them, as one batch
+    All files share language and model_size and are queued back to back
+    """
+    try:
+        # Validate language and model parameters
+        param_validation = validate_language_and_model(language, model_size)
+        if not param_validation["valid"]:
+            raise HTTPException(
+                status_code=400,
+                detail=create_error_response(param_validation["error"])
+            )
+        
+        # Validate files before saving anything
+        if len(files) > MAX_BATCH_FILES:
+            raise HTTPException(
+                status_code=400,
+                detail=create_error_response(f"Batch exceeds maximum of {MAX_BATCH_FILES} files")
+            )
+        for file in files:
+            if file.filename and is_archive(file.filename):
+                continue
+            file_validation = validate_uploaded_file(file)
+            if not file_validation["valid"]:
+                raise HTTPException(
+                    status_code=400,
+                    detail=create_error_response(f"{file.filename}: {file_validation['error']}")
+                )
+        
+        # Reject a batch the queue cannot take before saving anything;
+        # submit_many below stays the authoritative check
+        remaining_files = sum(1 for file in files if not is_archive(file.filename))
+        if get_scheduler().free_slots() < max(1, remaining_files):
+            raise create_queue_full_exception()
+        
+        batch_id = str(uuid.uuid4())
+        children = []
+        
+        def destination_for(filename: str) -> str:
+            task_id = str(uuid.uuid4())
+            path = os.path.join(INPUT_DIR, f"{task_id}_{filename}")
+            children.append({"task_id": task_id, "filename": filename, "path": path})
+            return path
+        
+        # Save uploads and extract archives
+        try:
+            for file in files:
+                if is_archive(file.filename):
+                    archive_path = os.path.join(INPUT_DIR, f"{batch_id}_{os.path.basename(file.filename)}")
+                    with UPLOAD_SECONDS.time():
+                        await save_upload_file(file, archive_path, max_size=MAX_ARCHIVE_SIZE)
+                    try:
+                        # Checked again once the archive's file count is known
+                        member_count = await run_in_threadpool(count_archive_members, archive_path)
+                        if get_scheduler().free_slots() < len(children) + member_count + remaining_files:
+                            raise QueueFullError()
+                        members = await run_in_threadpool(
+                            extract_archive, archive_path, destination_for, MAX_BATCH_FILES - len(children)
+                        )
+                    finally:
+                        cleanup_temp_files([archive_path])
+                    hashes = {member["path"]: member["content_hash"] for member in members}
+                    for child in children:
+                        child.setdefault("content_hash", hashes.get(child["path"]))
+                else:
+                    if len(children) >= MAX_BATCH_FILES:
+                        raise InvalidBatchError(f"Batch exceeds maximum of {MAX_BATCH_FILES} files")
+                    remaining_files -= 1
+                    path = destination_for(file.filename)
+                    hasher = hashlib.sha256()
+                    try:
+                        with UPLOAD_SECONDS.time():
+                            await save_upload_file(file, path, hasher=hasher)
+                    except BaseException:
+                        children.pop()
+                        raise
+                    children[-1]["content_hash"] = hasher.hexdigest()
+        except (FileTooLargeError, InvalidBatchError) as e:
+            cleanup_temp_files([child["path"] for child in children])
+            raise HTTPException(
+                status_code=413 if isinstance(e, FileTooLargeError) else 400,
+                detail=create_error_response(str(e))
+            )
+        except QueueFullError:
+            cleanup_temp_files([child["path"] for child in children])
+            raise create_queue_full_exception()
+        except BaseException:
+            cleanup_temp_files([child["path"] for child in children])
+            raise
+        
+        if not children:
+            raise HTTPException(
+                status_code=400,
+                detail=create_error_response("No supported audio files in batch")
+            )
+        
+        # The whole batch is queued or rejected together
+        if get_scheduler().free_slots() < len(children):
+            cleanup_temp_files([child["path"] for child in children])
+            raise create_queue_full_exception()
+        
+        await run_in_threadpool(create_batch, batch_id, children, language, model_size)
+        
+        pending = []
+        for child in children:
+            await run_in_threadpool(create_task, child["task_id"], child["path"], language, model_size,
+                                    content_hash=child["content_hash"], batch_id=batch_id)
+            if not await complete_from_result_cache(child["task_id"], child["path"], child["content_hash"],
+                                                    language, model_size):
+                pending.append((child["task_id"], child["path"]))
+        
+        # Start background processing
+        try:
+            start_batch_tasks(pending, language, model_size)
+        except QueueFullError:
+            for task_id, path in pending:
+                await run_in_threadpool(update_task_status, task_id, "failed", error="Task queue is full")
+            cleanup_temp_files([path for _, path in pending])
+            raise create_queue_full_exception()
+        
+        return create_success_response({
+            "batch_id": batch_id,
+            "status": "queued" if pending else "done",
+            "total": len(children),
+            "tasks": [{"task_id": child["task_id"], "filename": child["filename"]} for child in children]
+        })
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=create_error_response(f"Internal server error: {str(e)}")
+        )
+
+@app.get("/batches/{batch_id}")
+@limiter.limit(f"{RATE_LIMIT_REQUESTS}/{RATE_LIMIT_WINDOW} seconds")
+async def get_batch_info(
+    request: Request,
+    batch_id: str,
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Get aggregate status and progress of a batch and its tasks
+    """
+    batch_data = await run_in_threadpool(get_batch, batch_id)
+    if batch_data is None:
+        raise HTTPException(
+            status_code=404,
+            detail=create_error_response("Batch not found")
+        )
+    return create_success_response(await run_in_threadpool(get_batch_status, batch_data))
+
+@app.get("/batches/{batch_id}/results")
+@limiter.limit(f"{RATE_LIMIT_REQUESTS}/{RATE_LIMIT_WINDOW} seconds")
+async def download_batch_results(
+    request: Request,
+    batch_id: str,
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Download the combined results of all tasks in a batch as one JSON file
+    """
+    batch_data = await run_in_threadpool(get_batch, batch_id)
+    if batch_data is None:
+        raise HTTPException(
+            status_code=404,
+            detail=create_error_response("Batch not found")
+        )
+    return StreamingResponse(
+        iter_batch_results(batch_data),
+        media_type="application/json",
+        headers={"Content-Disposition": f'attachment; filename="batch_{batch_id}.json"'}
+    )
+
 @app.get("/tasks/{task_id}")
 @limiter.limit(f"{RATE_LIMIT_REQUESTS}/{RATE_LIMIT_WINDOW} seconds")
 async def get_task(
     request: Request,
     task_id: str,
-    output_format: str = Query("text", pattern="^(text|subtitle|vtt)$"),
+    output_format: str = Query("text", pattern="^(text|subtitle|vtt|srt)$"),
+    wait: int = Query(0, ge=0, le=MAX_LONG_POLL_WAIT),
     api_key: str = Depends(verify_api_key)
 ):
     """
     Get task status and result
+    With wait=N the request is held up to N seconds until the task is done or failed.
+    Completed tasks are served from pre-rendered artifacts with ETag and
+    Last-Modified headers; conditional requests get 304 Not Modified
     """
     try:
-        # Check task status
-        status = get_task_status(task_id, output_format)
+        # Output files are only served for tasks that still exist
+        if not await run_in_threadpool(task_exists, task_id):
+            raise HTTPException(
+                status_code=404,
+                detail=create_error_response("Task not found")
+            )
+        
+        artifact = get_artifact_info(task_id, output_format)
+        
+        # Long-poll until completion
+        if wait and artifact is None:
+            await wait_for_task_completion(task_id, wait, lambda: get_stored_task_status(task_id))
+            artifact = get_artifact_info(task_id, output_format)
+        
+        if artifact is not None:
+            headers = {
+                "ETag": artifact["etag"],
+                "Last-Modified": artifact["last_modified"],
+                "Cache-Control": "no-cache"
+            }
+            if is_not_modified(artifact, request.headers.get("if-none-match"), request.headers.get("if-modified-since")):
+                return Response(status_code=304, headers=headers)
+            
+            result = await run_in_threadpool(read_artifact_result, task_id, output_format, artifact["path"])
+            return JSONResponse(
+                content=create_success_response({
+                    "task_id": task_id,
+                    "status": "done",
+                    "result": result,
+                    "error": None
+                }),
+                headers=headers
+            )
+        
+        # Check task status (processing tasks build their partial transcript)
+        status = await run_in_threadpool(get_task_status, task_id, output_format)
         
         if not status:
             raise HTTPException(
@@ -132,6 +560,188 @@ async def get_task(
             detail=create_error_response(f"Internal server error: {str(e)}")
         )
 
+def get_transcript_page(task_id: str, kind: str, start: Optional[float], end: Optional[float],
+                        cursor: Optional[str], limit: int) -> dict:
+    """
+    Build one page of the words or segments of a task
+    Only the requested page is serialized; the time range is resolved by
+    binary search over the word table. While the task is processing, the
+    segments decoded so far are served
+    """
+    if start is not None and end is not None and end < start:
+        raise HTTPException(status_code=400, detail=create_error_response("end must not be before start"))
+    
+    task_data = get_task_record(task_id)
+    if task_data is None:
+        raise HTTPException(status_code=404, detail=create_error_response("Task not found"))
+    if task_data["status"] == "processing":
+        # Parsed incrementally and cached while the log grows
+        table = get_partial_transcript(task_id, WordTable.from_segments)
+        if table is None:
+            table = WordTable()
+    elif task_data["status"] == "done":
+        table = get_task_words(task_id, task_data.get("result"))
+    else:
+        raise HTTPException(
+            status_code=409,
+            detail=create_error_response(f"Transcript is not available while the task is {task_data['status']}")
+        )
+    
+    if table is None:
+        raise HTTPException(status_code=404, detail=create_error_response("Word-level results not found"))
+    
+    if kind == "words":
+        item_range, get_item = table.find_words(start or 0.0, end), table.word
+    else:
+        item_range, get_item = table.find_segments(start or 0.0, end), table.segment
+    try:
+        page = get_page(item_range, cursor, limit, get_item)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=create_error_response(str(e)))
+    
+    return create_success_response({
+        "task_id": task_id,
+        "start": start,
+        "end": end,
+        "partial": task_data["status"] == "processing",
+        "total": page["total"],
+        kind: page["items"],
+        "next_cursor": page["next_cursor"]
+    })
+
+@app.get("/tasks/{task_id}/words")
+@limiter.limit(f"{RATE_LIMIT_REQUESTS}/{RATE_LIMIT_WINDOW} seconds")
+async def get_task_words_page(
+    request: Request,
+    task_id: str,
+    start: Optional[float] = Query(None, ge=0),
+    end: Optional[float] = Query(None, ge=0),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(TRANSCRIPT_PAGE_SIZE, ge=1, le=TRANSCRIPT_MAX_PAGE_SIZE),
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Get the words of a task overlapping start..end seconds
+    Pass next_cursor back as cursor to fetch the following page
+    """
+    return await run_in_threadpool(get_transcript_page, task_id, "words", start, end, cursor, limit)
+
+@app.get("/tasks/{task_id}/segments")
+@limiter.limit(f"{RATE_LIMIT_REQUESTS}/{RATE_LIMIT_WINDOW} seconds")
+async def get_task_segments_page(
+    request: Request,
+    task_id: str,
+    start: Optional[float] = Query(None, ge=0),
+    end: Optional[float] = Query(None, ge=0),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(TRANSCRIPT_PAGE_SIZE, ge=1, le=TRANSCRIPT_MAX_PAGE_SIZE),
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Get the recognizer segments of a task overlapping start..end seconds
+    Pass next_cursor back as cursor to fetch the following page
+    """
+    return await run_in_threadpool(get_transcript_page, task_id, "segments", start, end, cursor, limit)
+
+@app.websocket("/stream")
+async def stream_transcription(
+    websocket: WebSocket,
+    language: str = Query(...),
+    model_size: str = Query("small"),
+    sample_rate: int = Query(16000, ge=8000, le=48000),
+    encoding: str = Query("pcm", pattern="^(pcm|opus)$")
+):
+    """
+    Real-time transcription of raw PCM (s16le mono) or Opus audio frames
+    """
+    await websocket.accept()
+    
+    async def close_with_error(code: int, error_message: str):
+        await websocket.send_json(create_error_response(error_message))
+        await websocket.close(code=code)
+    
+    if not verify_websocket_api_key(websocket):
+        await close_with_error(1008, "Invalid or missing API key")
+        return
+    
+    param_validation = validate_language_and_model(language, model_size)
+    if not param_validation["valid"]:
+        await close_with_error(1008, param_validation["error"])
+        return
+    
+    if not acquire_stream_session():
+        await close_with_error(1013, "Server busy: too many streaming sessions, please retry later")
+        return
+    
+    try:
+        try:
+            model = await run_in_threadpool(get_model, language, model_size)
+            rec = create_recognizer(model, sample_rate)
+        except Exception as e:
+            await close_with_error(1011, f"Failed to load model: {str(e)}")
+            return
+        
+        await run_stream_session(websocket, rec, encoding, sample_rate)
+    finally:
+        release_stream_session()
+
+def format_sse_event(event: str, data: dict) -> str:
+    """Format a Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.get("/tasks/{task_id}/events")
+@limiter.limit(f"{RATE_LIMIT_REQUESTS}/{RATE_LIMIT_WINDOW} seconds")
+async def get_task_events(
+    request: Request,
+    task_id: str,
+    output_format: str = Query("text", pattern="^(text|subtitle|vtt|srt)$"),
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Stream task status changes as Server-Sent Events
+    Sends the current status first, a "status" event on every change,
+    "progress" events while decoding and a final "result" event with the
+    formatted task once it is done or failed
+    """
+    bus = get_event_bus()
+    queue = bus.subscribe(task_id)
+    
+    status = await run_in_threadpool(get_task_status, task_id, output_format)
+    if not status:
+        bus.unsubscribe(task_id, queue)
+        raise HTTPException(
+            status_code=404,
+            detail=create_error_response("Task not found")
+        )
+    
+    async def event_stream():
+        try:
+            if status["status"] in TERMINAL_STATUSES:
+                yield format_sse_event("result", status)
+                return
+            yield format_sse_event("status", status)
+            
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                
+                if event.get("status") in TERMINAL_STATUSES:
+                    final_status = await run_in_threadpool(get_task_status, task_id, output_format)
+                    yield format_sse_event("result", final_status or event)
+                    return
+                yield format_sse_event(event.get("type", "status"), event)
+        finally:
+            bus.unsubscribe(task_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/models")
 @limiter.limit(f"{RATE_LIMIT_REQUESTS}/{RATE_LIMIT_WINDOW} seconds")
 async def get_models(
@@ -155,6 +765,32 @@ async def get_models(
             detail=create_error_response(f"Failed to get models: {str(e)}")
         )
 
+@app.get("/cache/stats")
+@limiter.limit(f"{RATE_LIMIT_REQUESTS}/{RATE_LIMIT_WINDOW} seconds")
+async def get_cache_stats(
+    request: Request,
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Get result cache statistics
+    """
+    try:
+        stats = await run_in_threadpool(get_result_cache().stats)
+        stats["enabled"] = RESULT_CACHE_ENABLED
+        return create_success_response(stats)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=create_error_response(f"Failed to get cache stats: {str(e)}")
+        )
+
+@app.get("/metrics")
+async def get_metrics(api_key: str = Depends(verify_api_key)):
+    """
+    Prometheus metrics in text exposition format - not rate limited so scrapers are never throttled
+    """
+    return Response(content=render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/health")
 async def health_check():
     """
@@ -167,9 +803,10 @@ async def health_check():
 async def http_exception_handler(request: Request, exc: HTTPException):
     """Custom HTTP exception handler"""
     from fastapi.responses import JSONResponse
+    headers = getattr(exc, "headers", None)
     if isinstance(exc.detail, dict):
-        return JSONResponse(status_code=exc.status_code, content=exc.detail)
-    return JSONResponse(status_code=exc.status_code, content=create_error_response(exc.detail))
+        return JSONResponse(status_code=exc.status_code, content=exc.detail, headers=headers)
+    return JSONResponse(status_code=exc.status_code, content=create_error_response(exc.detail), headers=headers)
 
 @app.exception_handler(429)
 async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
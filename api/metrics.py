@@ -0,0 +1,222 @@
+"""
+Prometheus metrics for the STT pipeline
+
+A small dependency-free implementation of counters, gauges and
+histograms rendered in the Prometheus text exposition format.
+Metrics are per process: with DECODE_BACKEND=process, stages that run
+inside worker processes (conversion, model load) are not exported.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Buckets in seconds, from sub-second uploads to multi-hour decodes
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+RTF_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 5)
+
+def _escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(label_names: Sequence[str], label_values: Sequence[str], extra: Tuple = ()) -> str:
+    pairs = list(zip(label_names, label_values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in pairs) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class Metric:
+    """Base class for labelled metrics"""
+
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        lines.extend(self._render_samples())
+        return lines
+
+    def _render_samples(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(Metric):
+    """Monotonically increasing counter"""
+
+    metric_type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in items]
+
+class Gauge(Metric):
+    """Value that can go up and down, optionally read from a callback at scrape time"""
+
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 function: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function = function
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def _render_samples(self) -> List[str]:
+        if self._function is not None:
+            try:
+                return [f"{self.name} {_format_value(self._function())}"]
+            except Exception:
+                return []
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in items]
+
+class Histogram(Metric):
+    """Distribution of observations in cumulative buckets"""
+
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], Dict] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+                self._series[key] = series
+            series["counts"][bisect.bisect_left(self.buckets, value)] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a with-block"""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - started, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return series["count"] if series else 0
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, dict(series, counts=list(series["counts"]))) for key, series in self._series.items())
+        lines = []
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series["counts"]):
+                cumulative += count
+                labels = _format_labels(self.label_names, key, (("le", _format_value(bound)),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series['sum'])}")
+            lines.append(f"{self.name}_count{labels} {series['count']}")
+        return lines
+
+class MetricsRegistry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+UPLOAD_SECONDS = REGISTRY.register(Histogram(
+    "stt_upload_seconds", "Time spent receiving and storing uploads"))
+QUEUE_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "stt_queue_wait_seconds", "Time tasks wait in the job queue before a worker starts them"))
+CONVERSION_SECONDS = REGISTRY.register(Histogram(
+    "stt_conversion_seconds", "Time spent converting input files to 16kHz mono WAV"))
+MODEL_LOAD_SECONDS = REGISTRY.register(Histogram(
+    "stt_model_load_seconds", "Time spent loading models into the model cache", ("language", "model_size")))
+DECODE_SECONDS = REGISTRY.register(Histogram(
+    "stt_decode_seconds", "Time spent decoding audio, including streaming conversion", ("language", "model_size")))
+PERSIST_SECONDS = REGISTRY.register(Histogram(
+    "stt_persist_seconds", "Time spent saving results and marking tasks done"))
+REAL_TIME_FACTOR = REGISTRY.register(Histogram(
+    "stt_real_time_factor", "Decode time divided by audio duration", ("language", "model_size"), RTF_BUCKETS))
+AUDIO_SECONDS = REGISTRY.register(Counter(
+    "stt_audio_seconds_total", "Seconds of audio decoded", ("language", "model_size")))
+TASKS_TOTAL = REGISTRY.register(Counter(
+    "stt_tasks_total", "Tasks finished by outcome", ("status",)))
+
+def register_gauge(name: str, documentation: str, function: Callable[[], float]) -> Gauge:
+    """
+    Register a gauge read from function at scrape time
+    """
+    return REGISTRY.register(Gauge(name, documentation, function=function))
+
+def observe_decode(language: str, model_size: str, decode_seconds: float, audio_seconds: float):
+    """
+    Record decode latency, decoded audio duration and real-time factor of a task
+    """
+    DECODE_SECONDS.observe(decode_seconds, language=language, model_size=model_size)
+    if audio_seconds > 0:
+        AUDIO_SECONDS.inc(audio_seconds, language=language, model_size=model_size)
+        REAL_TIME_FACTOR.observe(decode_seconds / audio_seconds, language=language, model_size=model_size)
+
+def render_metrics() -> str:
+    """
+    Render all metrics in Prometheus text format
+    """
+    return REGISTRY.render()
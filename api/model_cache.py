@@ -0,0 +1,169 @@
+"""
+Process-wide Vosk model cache with LRU eviction and memory budget
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from .config import MODELS_DIR, MODEL_CACHE_MAX_MB
+from .metrics import MODEL_LOAD_SECONDS
+from .recognizer_pool import get_recognizer_pool
+
+def get_model_path(language: str, model_size: str) -> str:
+    """
+    Get filesystem path of a model for language and model size
+    """
+    return os.path.join(MODELS_DIR, language, model_size)
+
+def estimate_model_size(model_path: str) -> int:
+    """
+    Estimate in-memory size of a model from its size on disk (bytes)
+    """
+    total_size = 0
+    for root, _, files in os.walk(model_path):
+        for filename in files:
+            try:
+                total_size += os.path.getsize(os.path.join(root, filename))
+            except OSError:
+                pass
+    return total_size
+
+def _load_vosk_model(model_path: str):
+    """Load a Vosk model from disk"""
+    from vosk import Model
+    return Model(model_path)
+
+class ModelCache:
+    """
+    Thread-safe LRU cache of loaded models keyed by (language, model_size)
+
+    Models are loaded at most once and shared between recognizers. When the
+    estimated size of resident models exceeds max_bytes, least recently used
+    models are evicted. The most recently requested model is never evicted,
+    so a single model larger than the budget can still be used.
+    """
+
+    def __init__(self, max_bytes: int,
+                 loader: Callable[[str], object] = _load_vosk_model,
+                 size_estimator: Callable[[str], int] = estimate_model_size,
+                 on_evict: Optional[Callable[[object], None]] = None):
+        self.max_bytes = max_bytes
+        self._loader = loader
+        self._size_estimator = size_estimator
+        self._on_evict = on_evict
+        self._models: "OrderedDict[Tuple[str, str], Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[Tuple[str, str], threading.Lock] = {}
+
+    def get(self, language: str, model_size: str):
+        """
+        Get a loaded model, loading it on first use
+        """
+        key = (language, model_size)
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                self._models.move_to_end(key)
+                return entry["model"]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Load outside the cache lock so other models stay available
+        with load_lock:
+            with self._lock:
+                entry = self._models.get(key)
+                if entry is not None:
+                    self._models.move_to_end(key)
+                    return entry["model"]
+
+            model_path = get_model_path(language, model_size)
+            if not os.path.exists(model_path):
+                raise Exception(f"Model not found at {model_path}. Please ensure models are downloaded.")
+
+            with MODEL_LOAD_SECONDS.time(language=language, model_size=model_size):
+                model = self._loader(model_path)
+            size = self._size_estimator(model_path)
+
+            with self._lock:
+                self._models[key] = {"model": model, "size": size}
+                self._models.move_to_end(key)
+                evicted = self._evict_locked()
+            self._notify_evicted(evicted)
+            return model
+
+    def _evict_locked(self) -> List[Dict]:
+        """Evict least recently used models until within budget"""
+        evicted = []
+        while len(self._models) > 1 and self.resident_bytes() > self.max_bytes:
+            evicted.append(self._models.popitem(last=False)[1])
+        return evicted
+
+    def _notify_evicted(self, entries: List[Dict]):
+        """
+        Let dependents (e.g. the recognizer pool) release evicted models
+        Called without the cache lock held, after the models stopped being
+        resident, so dependents may call is_resident()
+        """
+        if self._on_evict is not None:
+            for entry in entries:
+                self._on_evict(entry["model"])
+
+    def resident_bytes(self) -> int:
+        """Total estimated size of resident models"""
+        return sum(entry["size"] for entry in self._models.values())
+
+    def is_resident(self, model) -> bool:
+        """Check whether a model object is still held by the cache"""
+        with self._lock:
+            return any(entry["model"] is model for entry in self._models.values())
+
+    def evict(self, language: str, model_size: str) -> bool:
+        """
+        Drop a model from the cache
+        """
+        with self._lock:
+            entry = self._models.pop((language, model_size), None)
+        self._notify_evicted([entry] if entry is not None else [])
+        return entry is not None
+
+    def clear(self):
+        """Drop all cached models"""
+        with self._lock:
+            entries = list(self._models.values())
+            self._models.clear()
+        self._notify_evicted(entries)
+
+    def stats(self) -> Dict:
+        """
+        Get cache residency information
+        """
+        with self._lock:
+            return {
+                "models": [
+                    {"language": key[0], "model_size": key[1], "size": entry["size"]}
+                    for key, entry in self._models.items()
+                ],
+                "resident_bytes": self.resident_bytes(),
+                "max_bytes": self.max_bytes
+            }
+
+_model_cache: Optional[ModelCache] = None
+_model_cache_lock = threading.Lock()
+
+def get_model_cache() -> ModelCache:
+    """
+    Get the process-wide model cache
+    """
+    global _model_cache
+    with _model_cache_lock:
+        if _model_cache is None:
+            _model_cache = ModelCache(
+                MODEL_CACHE_MAX_MB * 1024 * 1024,
+                on_evict=lambda model: get_recognizer_pool().discard_model(model)
+            )
+        return _model_cache
+
+def get_model(language: str, model_size: str):
+    """
+    Get a shared model for language and model size
+    """
+    return get_model_cache().get(language, model_size)
@@ -0,0 +1,155 @@
+"""
+Append-only log of finalized segments of tasks being transcribed
+
+Every finalized recognizer segment is appended as one JSON line to
+OUTPUT_DIR/{task_id}.partial.jsonl while decoding runs, so the transcript
+so far can be served without rewriting the task record. The log is
+removed once the task finishes.
+
+The log doubles as the checkpoint of an interrupted task: decoding resumes
+at the end of the last logged word instead of from the start of the file.
+
+Status polls and transcript pages read the log through a small per-task
+cache of the parsed prefix, so each request only parses the lines appended
+since the last one.
+"""
+import os
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+from .config import OUTPUT_DIR, PARTIAL_RESULTS_CACHE_SIZE
+
+PARTIAL_SUFFIX = ".partial.jsonl"
+
+def get_partial_log_path(task_id: str) -> str:
+    """Get path of the partial results log of a task"""
+    return os.path.join(OUTPUT_DIR, f"{task_id}{PARTIAL_SUFFIX}")
+
+def append_partial_result(path: str, segment: Dict):
+    """
+    Append one finalized segment to a partial results log
+    Each segment is a single write to a file opened in append mode, so
+    readers never see interleaved lines
+    """
+    line = json.dumps(segment, ensure_ascii=False, separators=(',', ':')) + "\n"
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(line)
+
+def read_partial_results(task_id: str) -> List[Dict]:
+    """
+    Read the segments logged so far, skipping a line that is still being written
+    """
+    segments = []
+    try:
+        with open(get_partial_log_path(task_id), 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                try:
+                    segments.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    except OSError:
+        pass
+    return segments
+
+def _parse_lines(data: bytes) -> List[Dict]:
+    """Parse complete JSON lines, skipping lines that do not parse"""
+    segments = []
+    for line in data.splitlines():
+        try:
+            segments.append(json.loads(line))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            continue
+    return segments
+
+_log_cache: OrderedDict = OrderedDict()
+_log_cache_lock = threading.Lock()
+
+def _get_log_entry(task_id: str, inode: int) -> Dict:
+    """Get the cached parse state of a log, starting over for a new file"""
+    with _log_cache_lock:
+        entry = _log_cache.get(task_id)
+        if entry is None or entry["inode"] != inode:
+            entry = {"inode": inode, "offset": 0, "segments": [], "results": {}, "lock": threading.Lock()}
+            _log_cache[task_id] = entry
+        _log_cache.move_to_end(task_id)
+        while len(_log_cache) > max(1, PARTIAL_RESULTS_CACHE_SIZE):
+            _log_cache.popitem(last=False)
+        return entry
+
+def _refresh_log_entry(task_id: str, entry: Dict):
+    """Parse the complete lines appended since the entry was last read; needs entry["lock"]"""
+    with open(get_partial_log_path(task_id), 'rb') as f:
+        if os.fstat(f.fileno()).st_size < entry["offset"]:
+            # Rewritten from scratch
+            entry.update(offset=0, segments=[], results={})
+        f.seek(entry["offset"])
+        data = f.read()
+    complete = data.rfind(b"\n") + 1
+    if complete:
+        entry["segments"].extend(_parse_lines(data[:complete]))
+        entry["offset"] += complete
+
+def get_partial_transcript(task_id: str, build: Callable[[List[Dict]], Dict]) -> Optional[Dict]:
+    """
+    Get build(segments) over the segments logged so far, or None if nothing
+    was logged yet
+    The parsed segments and the result of each build function are cached
+    per task; only new lines are parsed, and results are rebuilt only when
+    lines were added. Results are shared between callers and must not be
+    modified
+    """
+    try:
+        inode = os.stat(get_partial_log_path(task_id)).st_ino
+    except OSError:
+        return None
+    entry = _get_log_entry(task_id, inode)
+    with entry["lock"]:
+        try:
+            _refresh_log_entry(task_id, entry)
+        except OSError:
+            return None
+        if not entry["segments"]:
+            return None
+        cached = entry["results"].get(build)
+        if cached is None or cached[0] != entry["offset"]:
+            cached = (entry["offset"], build(entry["segments"]))
+            entry["results"][build] = cached
+        return cached[1]
+
+def load_checkpoint(task_id: str) -> List[Dict]:
+    """
+    Read the log of an interrupted run before resuming it
+    A line cut short by the interruption is truncated away so segments of
+    the resumed run are appended after complete lines only
+    """
+    try:
+        with open(get_partial_log_path(task_id), 'rb+') as f:
+            data = f.read()
+            complete = data.rfind(b"\n") + 1
+            if complete < len(data):
+                f.truncate(complete)
+    except OSError:
+        return []
+    return read_partial_results(task_id)
+
+def get_resume_offset(segments: List[Dict]) -> float:
+    """
+    Get the audio position in seconds after the last logged word
+    """
+    for segment in reversed(segments):
+        words = segment.get("result") or []
+        if words:
+            return max(word.get("end", 0.0) for word in words)
+    return 0.0
+
+def delete_partial_results(task_id: str):
+    """Remove the partial results log of a task"""
+    with _log_cache_lock:
+        _log_cache.pop(task_id, None)
+    try:
+        os.remove(get_partial_log_path(task_id))
+    except OSError:
+        pass
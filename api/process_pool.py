@@ -0,0 +1,193 @@
+"""
+Process-pool decoding backend
+
+Each worker process preloads its models at startup and receives jobs over
+a pipe. A worker that dies mid-job (e.g. a segfault in libvosk) fails only
+the job it was running and is respawned for the next one.
+"""
+import multiprocessing
+import queue
+import threading
+from typing import Callable, List, Optional, Tuple
+from .config import WORKER_COUNT, PROCESS_PRELOAD_MODELS
+
+class WorkerCrashedError(Exception):
+    """Raised when a worker process exits while running a job"""
+    pass
+
+def parse_preload_models(value: str) -> List[Tuple[str, str]]:
+    """
+    Parse "en:small,zh:large" into [(language, model_size), ...]
+    """
+    models = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        language, _, model_size = item.partition(":")
+        models.append((language, model_size or "small"))
+    return models
+
+def _worker_main(conn, preload_models: List[Tuple[str, str]]):
+    """
+    Worker process entry point: preload models and recognizers then serve jobs until closed
+    """
+    from .model_cache import get_model
+    from .recognizer_pool import get_recognizer_pool
+    from .stt import create_recognizer, VOSK_SAMPLE_RATE
+    send_lock = threading.Lock()
+
+    def send_progress(*payload):
+        # Decode threads of one job may report concurrently
+        with send_lock:
+            conn.send(("progress", payload))
+
+    for language, model_size in preload_models:
+        try:
+            model = get_model(language, model_size)
+            # The worker runs one job at a time, so one ready recognizer per model is enough
+            get_recognizer_pool().prewarm(model, VOSK_SAMPLE_RATE, create_recognizer, count=1)
+        except Exception:
+            # Missing models fail the jobs that need them, not the worker
+            pass
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            break
+        if job is None:
+            break
+
+        func, args, with_progress = job
+        kwargs = {}
+        if with_progress:
+            # Forward progress reports to the parent while the job runs
+            kwargs["progress_callback"] = send_progress
+        try:
+            response = ("ok", func(*args, **kwargs))
+        except Exception as e:
+            response = ("error", str(e))
+        with send_lock:
+            conn.send(response)
+
+class DecodeWorkerProcess:
+    """
+    A single worker process with its own job pipe
+    """
+
+    def __init__(self, context, preload_models: List[Tuple[str, str]]):
+        self._context = context
+        self._preload_models = preload_models
+        self._process = None
+        self._conn = None
+
+    def is_alive(self) -> bool:
+        """Whether the worker process is running"""
+        return self._process is not None and self._process.is_alive()
+
+    def start(self):
+        """Start (or restart) the worker process"""
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, self._preload_models),
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        self._process = process
+        self._conn = parent_conn
+
+    def run(self, func: Callable, args: tuple, on_progress: Optional[Callable[[tuple], None]] = None):
+        """
+        Run func(*args) in the worker process and return its result
+        With on_progress, func also receives a progress_callback keyword
+        argument whose calls are forwarded to on_progress as tuples
+        """
+        if not self.is_alive():
+            self.start()
+
+        try:
+            self._conn.send((func, args, on_progress is not None))
+            while True:
+                status, payload = self._conn.recv()
+                if status != "progress":
+                    break
+                try:
+                    on_progress(payload)
+                except Exception:
+                    # Progress is best effort
+                    pass
+        except (EOFError, OSError):
+            self._process.join(timeout=5)
+            exitcode = self._process.exitcode
+            self._conn.close()
+            self._process = None
+            self._conn = None
+            raise WorkerCrashedError(f"Decode worker process crashed (exit code {exitcode})")
+
+        if status == "error":
+            raise Exception(payload)
+        return payload
+
+    def stop(self):
+        """Ask the worker process to exit"""
+        if self.is_alive():
+            try:
+                self._conn.send(None)
+            except OSError:
+                pass
+            self._process.join(timeout=5)
+            if self._process.is_alive():
+                self._process.terminate()
+        self._process = None
+        self._conn = None
+
+class ProcessDecodePool:
+    """
+    Fixed set of worker processes handed out to callers one job at a time
+    """
+
+    def __init__(self, size: int, preload_models: Optional[List[Tuple[str, str]]] = None,
+                 start_method: str = "spawn"):
+        context = multiprocessing.get_context(start_method)
+        self._workers = [DecodeWorkerProcess(context, preload_models or []) for _ in range(max(1, size))]
+        self._idle: "queue.Queue[DecodeWorkerProcess]" = queue.Queue()
+        for worker in self._workers:
+            self._idle.put(worker)
+
+    def start(self):
+        """Start all worker processes so models are preloaded before the first job"""
+        for worker in self._workers:
+            if not worker.is_alive():
+                worker.start()
+
+    def run(self, func: Callable, args: tuple = (), on_progress: Optional[Callable[[tuple], None]] = None):
+        """
+        Run func(*args) on the next idle worker process
+        func and args must be picklable
+        """
+        worker = self._idle.get()
+        try:
+            return worker.run(func, args, on_progress)
+        finally:
+            self._idle.put(worker)
+
+    def shutdown(self):
+        """Stop all worker processes"""
+        for worker in self._workers:
+            worker.stop()
+
+_process_pool: Optional[ProcessDecodePool] = None
+_process_pool_lock = threading.Lock()
+
+def get_process_pool() -> ProcessDecodePool:
+    """
+    Get the process-wide decode pool, sized to match the worker threads
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessDecodePool(WORKER_COUNT, parse_preload_models(PROCESS_PRELOAD_MODELS))
+        return _process_pool
@@ -0,0 +1,126 @@
+"""
+Pool of reusable Vosk recognizers per loaded model
+
+Constructing a KaldiRecognizer is a measurable part of the latency of
+short clips. Recognizers are borrowed for one decode, Reset() and kept
+idle for the next task on the same model and sample rate.
+"""
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+from .config import RECOGNIZER_POOL_SIZE
+
+class RecognizerPool:
+    """
+    Thread-safe idle lists of recognizers keyed by (model, sample rate)
+
+    At most max_idle recognizers are kept per key; extra recognizers
+    borrowed under load are dropped when returned. Models are tracked by
+    identity, and the pool holds a reference to each model it has
+    recognizers for, so discard_model must be called when a model is
+    evicted from the model cache. is_live(model) tells whether a model is
+    still cached: recognizers of evicted models that were borrowed during
+    the eviction are dropped when returned instead of pinning the model.
+    """
+
+    def __init__(self, max_idle: int, is_live: Optional[Callable[[object], bool]] = None):
+        self.max_idle = max_idle
+        self._is_live = is_live
+        self._idle: Dict[Tuple[int, int], List] = {}
+        self._models: Dict[int, object] = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, model, sample_rate: int, factory: Callable):
+        """
+        Borrow an idle recognizer, or build one with factory(model, sample_rate)
+        """
+        with self._lock:
+            idle = self._idle.get((id(model), sample_rate))
+            if idle:
+                self.reused += 1
+                return idle.pop()
+            self.created += 1
+        return factory(model, sample_rate)
+
+    def release(self, model, sample_rate: int, rec):
+        """
+        Reset a recognizer and keep it for reuse if the pool has room
+        Recognizers that fail to reset or whose model was evicted are dropped
+        """
+        try:
+            rec.Reset()
+        except Exception:
+            return
+        with self._lock:
+            # Checked under the pool lock: an eviction either happened before
+            # and is seen here, or runs discard_model after this append
+            if self._is_live is not None and not self._is_live(model):
+                return
+            idle = self._idle.setdefault((id(model), sample_rate), [])
+            if len(idle) < self.max_idle:
+                idle.append(rec)
+                self._models[id(model)] = model
+
+    @contextmanager
+    def recognizer(self, model, sample_rate: int, factory: Callable):
+        """Borrow a recognizer for the duration of a with-block"""
+        rec = self.acquire(model, sample_rate, factory)
+        try:
+            yield rec
+        finally:
+            self.release(model, sample_rate, rec)
+
+    def prewarm(self, model, sample_rate: int, factory: Callable, count: Optional[int] = None):
+        """
+        Construct idle recognizers ahead of the first task
+        """
+        count = self.max_idle if count is None else min(count, self.max_idle)
+        with self._lock:
+            missing = count - len(self._idle.get((id(model), sample_rate), []))
+        for _ in range(max(0, missing)):
+            self.release(model, sample_rate, factory(model, sample_rate))
+
+    def discard_model(self, model):
+        """Drop all idle recognizers of a model"""
+        with self._lock:
+            for key in [key for key in self._idle if key[0] == id(model)]:
+                del self._idle[key]
+            self._models.pop(id(model), None)
+
+    def clear(self):
+        """Drop all idle recognizers"""
+        with self._lock:
+            self._idle.clear()
+            self._models.clear()
+
+    def stats(self) -> Dict:
+        """
+        Get pool usage counters
+        """
+        with self._lock:
+            return {
+                "idle": sum(len(idle) for idle in self._idle.values()),
+                "created": self.created,
+                "reused": self.reused,
+                "max_idle": self.max_idle
+            }
+
+_recognizer_pool: Optional[RecognizerPool] = None
+_recognizer_pool_lock = threading.Lock()
+
+def _is_cached_model(model) -> bool:
+    """Check whether a model is still resident in the process-wide model cache"""
+    from .model_cache import get_model_cache
+    return get_model_cache().is_resident(model)
+
+def get_recognizer_pool() -> RecognizerPool:
+    """
+    Get the process-wide recognizer pool
+    """
+    global _recognizer_pool
+    with _recognizer_pool_lock:
+        if _recognizer_pool is None:
+            _recognizer_pool = RecognizerPool(RECOGNIZER_POOL_SIZE, is_live=_is_cached_model)
+        return _recognizer_pool
@@ -0,0 +1,130 @@
+"""
+Content-hash result cache for repeated audio submissions
+
+Results are stored as JSON files keyed by (sha256 of the upload, language,
+model_size). The least recently used entries are evicted when the cache
+grows past its size budget.
+"""
+import os
+import json
+import tempfile
+import threading
+from typing import Dict, Optional
+from .config import RESULT_CACHE_DIR, RESULT_CACHE_MAX_MB
+
+def get_content_key(content_hash: str, audio_track: int = 0) -> str:
+    """
+    Cache key of an upload: its sha256, qualified by the audio track when not the first
+    """
+    return f"{content_hash}-a{audio_track}" if audio_track else content_hash
+
+class ResultCache:
+    """
+    Size-bounded LRU cache of transcription results on disk
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size_bytes = sum(size for _, size, _ in self._entries())
+
+    def _entry_path(self, content_hash: str, language: str, model_size: str) -> str:
+        return os.path.join(self.cache_dir, f"{content_hash}_{language}_{model_size}.json")
+
+    def _entries(self):
+        """List (path, size, last_used) of cache entries"""
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith('.json'):
+                path = os.path.join(self.cache_dir, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def get(self, content_hash: str, language: str, model_size: str) -> Optional[Dict]:
+        """
+        Get a cached result, or None on a miss
+        """
+        path = self._entry_path(content_hash, language, model_size)
+        with self._lock:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    result = json.load(f)
+                # Mark as recently used
+                os.utime(path)
+            except (OSError, json.JSONDecodeError):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return result
+
+    def put(self, content_hash: str, language: str, model_size: str, result: Dict):
+        """
+        Store a result and evict least recently used entries over budget
+        """
+        path = self._entry_path(content_hash, language, model_size)
+        data = json.dumps(result, ensure_ascii=False).encode('utf-8')
+        if len(data) > self.max_bytes:
+            return
+
+        with self._lock:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+            except OSError:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                return
+            self._size_bytes += len(data) - old_size
+            self._evict_locked()
+
+    def _evict_locked(self):
+        """Remove least recently used entries until within budget"""
+        if self._size_bytes <= self.max_bytes:
+            return
+        for path, size, _ in sorted(self._entries(), key=lambda entry: entry[2]):
+            if self._size_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                self._size_bytes -= size
+            except OSError:
+                pass
+
+    def stats(self) -> Dict:
+        """
+        Get cache statistics including hit rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries()),
+                "size_bytes": self._size_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+_result_cache: Optional[ResultCache] = None
+_result_cache_lock = threading.Lock()
+
+def get_result_cache() -> ResultCache:
+    """
+    Get the process-wide result cache
+    """
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = ResultCache(RESULT_CACHE_DIR, RESULT_CACHE_MAX_MB * 1024 * 1024)
+        return _result_cache
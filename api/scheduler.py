@@ -0,0 +1,160 @@
+"""
+Bounded worker pool with priority job queue for background tasks
+"""
+import heapq
+import itertools
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from .config import WORKER_COUNT, MAX_QUEUE_SIZE
+
+# Lower rank runs first
+MODEL_SIZE_PRIORITY = {"small": 0, "large": 1}
+
+class QueueFullError(Exception):
+    """Raised when the job queue has no free slots"""
+    pass
+
+def get_task_priority(model_size: str, input_file_path: Optional[str] = None) -> Tuple[int, int]:
+    """
+    Get scheduling priority for a task (lower runs first)
+    Small-model jobs run before large-model jobs, then shorter files
+    before longer ones, using the file size in MB as a duration estimate
+    """
+    model_rank = MODEL_SIZE_PRIORITY.get(model_size, len(MODEL_SIZE_PRIORITY))
+    size_rank = 0
+    if input_file_path and os.path.exists(input_file_path):
+        size_rank = os.path.getsize(input_file_path) // (1024 * 1024)
+    return (model_rank, size_rank)
+
+class TaskScheduler:
+    """
+    Fixed-size pool of worker threads consuming a priority queue
+
+    Jobs with equal priority run in submission order. Worker threads are
+    started lazily on first submission.
+    """
+
+    def __init__(self, max_workers: int, max_queue_size: int):
+        self.max_workers = max(1, max_workers)
+        self.max_queue_size = max_queue_size
+        self._heap: List = []
+        self._queued: Dict[str, List] = {}
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._workers: List[threading.Thread] = []
+        self._active = 0
+
+    def submit(self, task_id: str, func: Callable[[], None], priority=(0,)):
+        """
+        Queue a job for execution
+        Raises QueueFullError when the queue is at capacity
+        """
+        with self._condition:
+            if len(self._queued) >= self.max_queue_size:
+                raise QueueFullError("Task queue is full")
+            entry = [tuple(priority), next(self._counter), task_id, func]
+            self._queued[task_id] = entry
+            heapq.heappush(self._heap, entry)
+            self._start_workers_locked()
+            self._condition.notify()
+
+    def submit_many(self, jobs: List[Tuple[str, Callable[[], None]]], priority=(0,)):
+        """
+        Queue a group of jobs atomically so they run back to back
+        All jobs share one priority and consecutive sequence numbers, so no
+        other job of equal priority can be interleaved between them.
+        Raises QueueFullError without queueing anything when they do not all fit
+        """
+        with self._condition:
+            if len(self._queued) + len(jobs) > self.max_queue_size:
+                raise QueueFullError("Task queue is full")
+            for task_id, func in jobs:
+                entry = [tuple(priority), next(self._counter), task_id, func]
+                self._queued[task_id] = entry
+                heapq.heappush(self._heap, entry)
+            self._start_workers_locked()
+            self._condition.notify_all()
+
+    def free_slots(self) -> int:
+        """Number of jobs that can still be queued"""
+        with self._condition:
+            return max(0, self.max_queue_size - len(self._queued))
+
+    def cancel(self, task_id: str) -> bool:
+        """
+        Remove a queued job that has not started yet
+        """
+        with self._condition:
+            entry = self._queued.pop(task_id, None)
+            if entry is None:
+                return False
+            self._heap.remove(entry)
+            heapq.heapify(self._heap)
+            return True
+
+    def queue_position(self, task_id: str) -> Optional[int]:
+        """
+        Get 1-based position of a queued job, or None if not queued
+        """
+        with self._condition:
+            entry = self._queued.get(task_id)
+            if entry is None:
+                return None
+            return sum(1 for other in self._heap if other[:2] < entry[:2]) + 1
+
+    def queue_size(self) -> int:
+        """Number of jobs waiting to run"""
+        with self._condition:
+            return len(self._queued)
+
+    def active_count(self) -> int:
+        """Number of jobs currently running"""
+        with self._condition:
+            return self._active
+
+    def is_full(self) -> bool:
+        """Whether the queue is at capacity"""
+        return self.queue_size() >= self.max_queue_size
+
+    def _start_workers_locked(self):
+        """Start worker threads up to the pool size"""
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(
+                target=self._worker_loop,
+                name=f"stt-worker-{len(self._workers)}",
+                daemon=True
+            )
+            self._workers.append(worker)
+            worker.start()
+
+    def _worker_loop(self):
+        """Run queued jobs forever"""
+        while True:
+            with self._condition:
+                while not self._heap:
+                    self._condition.wait()
+                _, _, task_id, func = heapq.heappop(self._heap)
+                self._queued.pop(task_id, None)
+                self._active += 1
+            try:
+                func()
+            except Exception:
+                # Jobs report their own failures through the task store
+                pass
+            finally:
+                with self._condition:
+                    self._active -= 1
+
+_scheduler: Optional[TaskScheduler] = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler() -> TaskScheduler:
+    """
+    Get the process-wide task scheduler
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = TaskScheduler(WORKER_COUNT, MAX_QUEUE_SIZE)
+        return _scheduler
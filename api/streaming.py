@@ -0,0 +1,195 @@
+"""
+Real-time streaming transcription over WebSocket
+
+Message protocol follows vosk-server so existing Vosk clients work:
+binary messages carry audio, the text message {"eof": 1} (or "EOF") ends
+the stream, and the server answers every chunk with either a
+{"partial": ...} or a final {"text": ..., "result": [...]} JSON message.
+"""
+import asyncio
+import concurrent.futures
+import json
+import threading
+from typing import Optional
+import ffmpeg
+from fastapi import WebSocket
+from starlette.concurrency import run_in_threadpool
+from .config import MAX_STREAM_SESSIONS
+
+# Audio messages buffered between the socket and the recognizer
+STREAM_QUEUE_SIZE = 32
+# Bytes read from the ffmpeg decoder per recognizer call
+DECODER_READ_SIZE = 8000
+# Seconds between retries while the queue is full, so the decoder thread can stop
+DECODER_PUT_RETRY_INTERVAL = 0.1
+
+_active_sessions = 0
+_sessions_lock = threading.Lock()
+
+def acquire_stream_session() -> bool:
+    """
+    Reserve a streaming session slot, False when all slots are taken
+    """
+    global _active_sessions
+    with _sessions_lock:
+        if _active_sessions >= MAX_STREAM_SESSIONS:
+            return False
+        _active_sessions += 1
+        return True
+
+def release_stream_session():
+    """Release a streaming session slot"""
+    global _active_sessions
+    with _sessions_lock:
+        _active_sessions = max(0, _active_sessions - 1)
+
+def is_eof_message(text: str) -> bool:
+    """
+    Check if a text message marks the end of the audio stream
+    """
+    if text.strip().upper() == "EOF":
+        return True
+    try:
+        message = json.loads(text)
+    except ValueError:
+        return False
+    return isinstance(message, dict) and bool(message.get("eof"))
+
+class FfmpegPipeDecoder:
+    """
+    Decode a compressed audio stream (e.g. Ogg/WebM Opus) to s16le PCM through ffmpeg
+    """
+
+    def __init__(self, sample_rate: int):
+        self.process = (
+            ffmpeg
+            .input('pipe:')
+            .output('pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar=sample_rate)
+            .global_args('-loglevel', 'quiet')
+            .run_async(pipe_stdin=True, pipe_stdout=True)
+        )
+
+    def write(self, data: bytes):
+        """Feed compressed audio to ffmpeg"""
+        self.process.stdin.write(data)
+        self.process.stdin.flush()
+
+    def close_input(self):
+        """Signal end of compressed audio"""
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+
+    def read(self, size: int = DECODER_READ_SIZE) -> bytes:
+        """Read decoded PCM, returns b'' at end of stream"""
+        return self.process.stdout.read1(size)
+
+    def kill(self):
+        """Stop ffmpeg"""
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+
+async def run_stream_session(websocket: WebSocket, rec, encoding: str = "pcm", sample_rate: int = 16000):
+    """
+    Pump audio from an accepted WebSocket through a recognizer, sending results back
+    """
+    loop = asyncio.get_running_loop()
+    pcm_queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+    decoder: Optional[FfmpegPipeDecoder] = None
+    pump_thread: Optional[threading.Thread] = None
+    stopped = threading.Event()
+    disconnected = False
+
+    if encoding != "pcm":
+        decoder = FfmpegPipeDecoder(sample_rate)
+
+        async def try_put(item) -> bool:
+            try:
+                pcm_queue.put_nowait(item)
+            except asyncio.QueueFull:
+                return False
+            return True
+
+        def offer(item) -> bool:
+            """Queue an item, giving up once the session has stopped"""
+            while not stopped.is_set():
+                try:
+                    future = asyncio.run_coroutine_threadsafe(try_put(item), loop)
+                except RuntimeError:
+                    # Event loop closed
+                    return False
+                try:
+                    if future.result(DECODER_PUT_RETRY_INTERVAL):
+                        return True
+                except concurrent.futures.TimeoutError:
+                    # Loop busy: withdraw the attempt so the item is not queued twice
+                    if not future.cancel() and future.result():
+                        return True
+                except concurrent.futures.CancelledError:
+                    return False
+                stopped.wait(DECODER_PUT_RETRY_INTERVAL)
+            return False
+
+        def pump_decoder():
+            """Move decoded PCM from ffmpeg into the queue until end of stream or stop"""
+            while not stopped.is_set():
+                data = decoder.read()
+                if not offer(data or None) or not data:
+                    break
+
+        pump_thread = threading.Thread(target=pump_decoder, name="stream-decoder", daemon=True)
+        pump_thread.start()
+
+    async def receive_audio():
+        nonlocal disconnected
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    disconnected = True
+                    break
+                if message.get("bytes") is not None:
+                    if decoder is not None:
+                        await run_in_threadpool(decoder.write, message["bytes"])
+                    else:
+                        await pcm_queue.put(message["bytes"])
+                elif message.get("text") is not None and is_eof_message(message["text"]):
+                    break
+        finally:
+            if decoder is not None:
+                decoder.close_input()
+            else:
+                await pcm_queue.put(None)
+
+    async def process_audio():
+        while True:
+            data = await pcm_queue.get()
+            if data is None:
+                break
+            if disconnected:
+                continue
+            if await run_in_threadpool(rec.AcceptWaveform, data):
+                await websocket.send_text(rec.Result())
+            else:
+                await websocket.send_text(rec.PartialResult())
+
+        if not disconnected:
+            await websocket.send_text(rec.FinalResult())
+            await websocket.close()
+
+    receiver = asyncio.ensure_future(receive_audio())
+    try:
+        await process_audio()
+        await receiver
+    finally:
+        if not receiver.done():
+            receiver.cancel()
+        # Stop the decoder thread even if nothing reads the queue anymore;
+        # killing ffmpeg makes its pending read() return
+        stopped.set()
+        if decoder is not None:
+            decoder.kill()
+        if pump_thread is not None:
+            await run_in_threadpool(pump_thread.join, 5)
@@ -4,14 +4,42 @@ Speech-to-Text processing module using Vosk
 import os
 import json
 import asyncio
+import shutil
+import threading
+import time
 import wave
-from typing import Dict, List
+from collections import deque
+from contextlib import contextmanager
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 from pydub import AudioSegment
 import ffmpeg
 from vosk import Model, KaldiRecognizer
-from .tasks import update_task_status
-from .config import MODELS_DIR, INPUT_DIR, OUTPUT_DIR
-from .utils import cleanup_temp_files, generate_vtt_subtitle
+from .tasks import update_task_status, update_task_progress, get_task
+from .config import (
+    INPUT_DIR, OUTPUT_DIR, DECODE_BACKEND, STREAMING_DECODE_ENABLED,
+    PARALLEL_DECODE_ENABLED, PARALLEL_DECODE_WORKERS, PARALLEL_CHUNK_SECONDS, RESULT_CACHE_ENABLED,
+    PROGRESS_UPDATE_INTERVAL, SYNC_MAX_CONCURRENT
+)
+from .model_cache import get_model, get_model_path
+from .recognizer_pool import get_recognizer_pool
+from .result_cache import get_result_cache
+from .artifacts import write_task_artifacts, delete_task_artifacts
+from .utils import cleanup_temp_files, generate_vtt_subtitle, save_upload_file
+from .vad import split_pcm_at_silence
+from .audio import (
+    VOSK_SAMPLE_RATE, AUDIO_ONLY_OUTPUT, format_ffmpeg_error, get_pcm_duration, is_video_file,
+    probe_audio_file, probe_wav_file, select_audio_track, stream_wav_pcm
+)
+from .metrics import CONVERSION_SECONDS, PERSIST_SECONDS, observe_decode
+from .words import WordTable, write_task_words
+from .partial_results import (
+    append_partial_result, delete_partial_results, get_partial_log_path, get_resume_offset, load_checkpoint
+)
+
+# Frames fed to the recognizer per AcceptWaveform call
+PCM_CHUNK_FRAMES = 4000
 
 async def process_audio_file(file, language: str, model_size: str, task_id: str):
     """
@@ -20,167 +48,571 @@ async def process_audio_file(file, language: str, model_size: str, task_id: str)
     # Save uploaded file first
     input_file_path = os.path.join(INPUT_DIR, f"{task_id}_{file.filename}")
     
-    # Write file content
-    with open(input_file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
+    # Stream file content to disk
+    await save_upload_file(file, input_file_path)
     
     # For now, return immediately - actual processing will be in background
     return {"status": "queued", "task_id": task_id}
 
-def process_audio_sync(input_file_path: str, language: str, model_size: str, task_id: str):
+def complete_task(task_id: str, result: Dict, cache_result: bool = True) -> Dict:
     """
-    Synchronous audio processing for background tasks
+    Save result files, cache the result and mark the task done
+    Word-level segments are stored as a compact word table; the task record
+    only keeps the text, confidence and subtitle segments. Rendered artifacts
+    are served without reading the task record, so they are written only
+    once the task is done. cache_result=False skips storing a result that
+    was itself read from the result cache
+    """
+    # Save results
+    output_text_path = os.path.join(OUTPUT_DIR, f"{task_id}.txt")
+    
+    # Save text result
+    with open(output_text_path, 'w', encoding='utf-8') as f:
+        f.write(result['text'])
+    
+    # Save word-level results in columnar form
+    words = WordTable.from_segments(result.get('segments') or [])
+    write_task_words(task_id, words)
+    
+    # Cache result for identical uploads
+    if RESULT_CACHE_ENABLED and cache_result:
+        task_data = get_task(task_id)
+        if task_data and task_data.get("content_hash"):
+            get_result_cache().put(task_data["content_hash"], task_data["language"], task_data["model_size"], result)
+    
+    # Update task status with result
+    stored_result = {key: value for key, value in result.items() if key != 'segments'}
+    stored_result['word_count'] = len(words)
+    updated = update_task_status(task_id, "done", result=stored_result)
+    delete_partial_results(task_id)
+    
+    # Render text and subtitle formats once for status polls
+    if updated:
+        try:
+            write_task_artifacts(task_id, result)
+        except OSError:
+            # Polls fall back to rendering from the task record
+            delete_task_artifacts(task_id)
+    
+    return result
+
+class ProgressReporter:
+    """
+    Throttled progress reporting from the decode loop
+    Counts decoded PCM bytes and calls callback(processed_seconds,
+    total_seconds, real_time_factor) at most once per interval.
+    offset_seconds is audio already decoded before a resume
+    """
+    
+    def __init__(self, callback: Callable[[float, Optional[float], Optional[float]], None],
+                 total_seconds: Optional[float] = None, sample_rate: int = VOSK_SAMPLE_RATE,
+                 interval: float = PROGRESS_UPDATE_INTERVAL, offset_seconds: float = 0.0):
+        self.callback = callback
+        self.total_seconds = total_seconds
+        self.offset_seconds = offset_seconds
+        self.bytes_per_second = sample_rate * 2
+        self.interval = interval
+        self.processed_bytes = 0
+        self._started = time.monotonic()
+        self._last_report = self._started
+        self._lock = threading.Lock()
+    
+    def advance(self, num_bytes: int):
+        """Record decoded bytes and report if the interval has passed"""
+        with self._lock:
+            self.processed_bytes += num_bytes
+            now = time.monotonic()
+            if now - self._last_report < self.interval:
+                return
+        self.report()
+    
+    def report(self):
+        """Report current progress regardless of the interval"""
+        with self._lock:
+            now = time.monotonic()
+            self._last_report = now
+            processed_seconds = self.processed_bytes / self.bytes_per_second
+            elapsed = now - self._started
+        
+        real_time_factor = elapsed / processed_seconds if processed_seconds > 0 else None
+        try:
+            self.callback(self.offset_seconds + processed_seconds, self.total_seconds, real_time_factor)
+        except Exception:
+            # Progress is best effort and must never fail the transcription
+            pass
+
+def get_audio_duration(input_file_path: str) -> Optional[float]:
     """
+    Get audio duration in seconds from the WAV header or ffprobe, None if unknown
+    """
+    info = probe_audio_file(input_file_path)
+    return info.get("duration") if info else None
+
+def run_transcription(input_file_path: str, language: str, model_size: str,
+                      progress_callback: Optional[Callable] = None, audio_track: int = 0,
+                      partial_log: Optional[str] = None, start_seconds: float = 0.0) -> Dict:
+    """
+    Convert and transcribe an audio file without touching task state
+    Runs in the API process or in a decode worker process
+    audio_track selects the audio stream of multi-track video files
+    partial_log is a file every finalized segment is appended to while decoding
+    start_seconds resumes decoding part way into the file; timestamps stay
+    relative to the start of the file
+    progress_callback(processed_seconds, total_seconds, real_time_factor)
+    is called at throttled intervals while decoding
+    """
+    # Get shared model from cache
+    model_path = get_model_path(language, model_size)
+    model = get_model(language, model_size)
+    
+    reporter = None
+    if progress_callback is not None:
+        reporter = ProgressReporter(progress_callback, get_audio_duration(input_file_path),
+                                    offset_seconds=start_seconds)
+    
+    on_segment = None
+    if partial_log is not None:
+        on_segment = lambda segment: append_partial_result(partial_log, segment)
+    
+    result = decode_audio_file(input_file_path, model_path, model, reporter.advance if reporter else None,
+                               audio_track=audio_track, on_segment=on_segment, start_seconds=start_seconds)
+    
+    # Final report carries the exact decoded duration
+    if reporter is not None:
+        reporter.report()
+    return result
+
+def decode_audio_file(input_file_path: str, model_path: str, model,
+                      progress: Optional[Callable[[int], None]] = None, audio_track: int = 0,
+                      on_segment: Optional[Callable[[Dict], None]] = None, start_seconds: float = 0.0) -> Dict:
+    """
+    Decode an audio file with a loaded model, streaming through ffmpeg when available
+    on_segment is called with each finalized segment, in audio order
+    start_seconds skips audio that was already transcribed
+    """
+    # Decode pieces of long audio in parallel when enabled
+    transcribe = transcribe_pcm_parallel if PARALLEL_DECODE_ENABLED else transcribe_pcm_stream
+    
+    if start_seconds > 0:
+        # Every finalized segment passes through on_segment, so shifting it
+        # there also shifts the segments of the returned result
+        on_segment = shift_segments(on_segment, start_seconds)
+    
+    # Read PCM WAV directly, resampling in-stream only when it is not 16kHz mono
+    if audio_track == 0 and probe_wav_file(input_file_path) is not None:
+        return transcribe(stream_wav_pcm(input_file_path, PCM_CHUNK_FRAMES, start_seconds), model,
+                          progress=progress, on_segment=on_segment)
+    
+    # Stream decoded PCM straight into the recognizer when ffmpeg is available
+    if is_streaming_decode_available():
+        chunks = stream_pcm_with_ffmpeg(input_file_path, audio_track=audio_track, start_seconds=start_seconds)
+        return transcribe(chunks, model, progress=progress, on_segment=on_segment)
+    
     temp_files = []
     
     try:
-        # Update task status to processing
-        update_task_status(task_id, "processing")
-        
         # Convert to WAV if needed
-        audio_file_path = convert_to_wav_sync(input_file_path)
+        audio_file_path = convert_to_wav_sync(input_file_path, audio_track=audio_track)
         temp_files.append(audio_file_path)
         
-        # Get model path
-        model_path = os.path.join(MODELS_DIR, language, model_size)
-        
         # Process with Vosk
-        result = transcribe_with_vosk_sync(audio_file_path, model_path)
+        if start_seconds > 0:
+            return transcribe(stream_wav_pcm(audio_file_path, PCM_CHUNK_FRAMES, start_seconds), model,
+                              progress=progress, on_segment=on_segment)
+        if PARALLEL_DECODE_ENABLED:
+            return transcribe(read_wav_chunks(audio_file_path), model, progress=progress, on_segment=on_segment)
+        return transcribe_with_vosk_sync(audio_file_path, model_path, model=model, progress=progress,
+                                         on_segment=on_segment)
+    finally:
+        # Clean up temporary files
+        cleanup_temp_files(temp_files)
+
+# Inline decodes run outside the worker pool, so they are bounded separately
+_sync_slots = threading.BoundedSemaphore(max(1, SYNC_MAX_CONCURRENT))
+
+def acquire_sync_slot() -> bool:
+    """
+    Reserve a slot for an inline decode, False when all slots are taken
+    """
+    return _sync_slots.acquire(blocking=False)
+
+def release_sync_slot():
+    """Release an inline decode slot"""
+    _sync_slots.release()
+
+def transcribe_pcm_bytes(pcm: bytes, language: str, model_size: str) -> Dict:
+    """
+    Transcribe in-memory 16kHz mono PCM with a pooled recognizer
+    """
+    model = get_model(language, model_size)
+    step = PCM_CHUNK_FRAMES * 2
+    started = time.monotonic()
+    result = transcribe_pcm_stream((pcm[i:i + step] for i in range(0, len(pcm), step)), model)
+    observe_decode(language, model_size, time.monotonic() - started, get_pcm_duration(pcm))
+    return result
+
+def process_audio_sync(input_file_path: str, language: str, model_size: str, task_id: str,
+                       audio_track: int = 0):
+    """
+    Synchronous audio processing for background tasks
+    """
+    try:
+        # Update task status to processing
+        update_task_status(task_id, "processing")
         
-        # Save results
-        output_text_path = os.path.join(OUTPUT_DIR, f"{task_id}.txt")
-        output_json_path = os.path.join(OUTPUT_DIR, f"{task_id}.json")
+        decoded = {"seconds": 0.0, "decode_seconds": None}
         
-        # Save text result
-        with open(output_text_path, 'w', encoding='utf-8') as f:
-            f.write(result['text'])
+        # Finalized segments are logged as they are decoded for partial results.
+        # A log left by an interrupted run is the checkpoint to resume from
+        partial_log = get_partial_log_path(task_id)
+        checkpoint = load_checkpoint(task_id)
+        start_seconds = get_resume_offset(checkpoint)
+        if start_seconds == 0:
+            checkpoint = []
+            delete_partial_results(task_id)
         
-        # Save full result with segments
-        with open(output_json_path, 'w', encoding='utf-8') as f:
-            json.dump(result, f, indent=2, ensure_ascii=False)
+        def report_progress(processed_seconds, total_seconds, real_time_factor):
+            decoded["seconds"] = processed_seconds
+            if real_time_factor is not None:
+                # The reporter's clock starts after the model is loaded, also in
+                # worker processes, so this excludes cold model loads
+                decoded["decode_seconds"] = real_time_factor * (processed_seconds - start_seconds)
+            update_task_progress(task_id, processed_seconds, total_seconds, real_time_factor)
+        
+        # Decode in a worker process or in this process
+        started = time.monotonic()
+        if DECODE_BACKEND == "process":
+            from .process_pool import get_process_pool
+            result = get_process_pool().run(
+                partial(run_transcription, audio_track=audio_track, partial_log=partial_log,
+                        start_seconds=start_seconds),
+                (input_file_path, language, model_size),
+                on_progress=lambda payload: report_progress(*payload)
+            )
+        else:
+            result = run_transcription(input_file_path, language, model_size, progress_callback=report_progress,
+                                       audio_track=audio_track, partial_log=partial_log, start_seconds=start_seconds)
+        decode_seconds = decoded["decode_seconds"]
+        if decode_seconds is None:
+            decode_seconds = time.monotonic() - started
+        observe_decode(language, model_size, decode_seconds, max(0.0, decoded["seconds"] - start_seconds))
         
-        # Update task status with result
-        update_task_status(task_id, "done", result=result)
+        # Merge the segments finalized before the interruption
+        if checkpoint:
+            result = build_transcription_result(checkpoint + result['segments'])
         
-        return result
+        with PERSIST_SECONDS.time():
+            return complete_task(task_id, result)
         
     except Exception as e:
         # Update task status with error
         update_task_status(task_id, "failed", error=str(e))
+        delete_partial_results(task_id)
+        delete_task_artifacts(task_id)
         raise e
-    finally:
-        # Clean up temporary files
-        cleanup_temp_files(temp_files)
 
-def convert_to_wav_sync(input_file_path: str) -> str:
+def convert_to_wav_sync(input_file_path: str, audio_track: int = 0) -> str:
     """
     Convert audio to WAV format (synchronous)
+    Video files are converted by extracting only the selected audio track
     """
     output_file_path = input_file_path.replace(os.path.splitext(input_file_path)[1], ".wav")
     
+    if audio_track or is_video_file(input_file_path):
+        with CONVERSION_SECONDS.time():
+            extract_audio_track(input_file_path, output_file_path, audio_track)
+        return output_file_path
+    
     try:
-        # Use pydub to convert
-        audio = AudioSegment.from_file(input_file_path)
-        # Convert to mono and set sample rate to 16kHz for Vosk
-        audio = audio.set_channels(1).set_frame_rate(16000)
-        audio.export(output_file_path, format="wav")
+        with CONVERSION_SECONDS.time():
+            # Use pydub to convert
+            audio = AudioSegment.from_file(input_file_path)
+            # Convert to mono and set sample rate to 16kHz for Vosk
+            audio = audio.set_channels(1).set_frame_rate(VOSK_SAMPLE_RATE)
+            audio.export(output_file_path, format="wav")
         
         return output_file_path
     except Exception as e:
         raise Exception(f"Audio conversion failed: {str(e)}")
 
-def transcribe_with_vosk_sync(audio_file_path: str, model_path: str) -> Dict:
+def extract_audio_track(input_file_path: str, output_file_path: str, audio_track: int = 0):
     """
-    Transcribe audio file using Vosk model (synchronous)
+    Write one audio track of a media file as a 16kHz mono PCM WAV file
+    Video streams are never decoded and the container is not loaded into memory
     """
-    # Check if model exists
-    if not os.path.exists(model_path):
-        raise Exception(f"Model not found at {model_path}. Please ensure models are downloaded.")
+    try:
+        (
+            select_audio_track(input_file_path, audio_track)
+            .output(output_file_path, acodec='pcm_s16le', ac=1, ar=VOSK_SAMPLE_RATE, **AUDIO_ONLY_OUTPUT)
+            .global_args('-nostdin', '-loglevel', 'error')
+            .overwrite_output()
+            .run(capture_stdout=True, capture_stderr=True)
+        )
+    except ffmpeg.Error as e:
+        message = e.stderr.decode("utf-8", errors="replace").strip() if e.stderr else str(e)
+        raise Exception(f"Audio conversion failed: {format_ffmpeg_error(message, audio_track)}")
+    except FileNotFoundError:
+        raise Exception("Audio conversion failed: ffmpeg not found")
+
+def stream_pcm_with_ffmpeg(input_file_path: str, chunk_size: int = PCM_CHUNK_FRAMES * 2,
+                           audio_track: int = 0, start_seconds: float = 0.0) -> Iterator[bytes]:
+    """
+    Decode one audio track of any ffmpeg-readable file to 16kHz mono s16le PCM,
+    yielding fixed-size chunks
+    Memory use is bounded by chunk_size regardless of input length, and video
+    streams of the container are dropped without being decoded
+    """
+    process = (
+        select_audio_track(input_file_path, audio_track, start_seconds)
+        .output('pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar=VOSK_SAMPLE_RATE, **AUDIO_ONLY_OUTPUT)
+        .global_args('-nostdin', '-loglevel', 'error')
+        .run_async(pipe_stdout=True, pipe_stderr=True)
+    )
+    
+    # Drain stderr in the background so a chatty ffmpeg can never block on a full pipe
+    stderr_tail = deque(maxlen=20)
+    stderr_thread = threading.Thread(
+        target=lambda: stderr_tail.extend(process.stderr),
+        daemon=True
+    )
+    stderr_thread.start()
     
     try:
-        # Load model
-        model = Model(model_path)
-        
-        # Open WAV file
-        wf = wave.open(audio_file_path, 'rb')
+        while True:
+            data = process.stdout.read(chunk_size)
+            if not data:
+                break
+            yield data
         
+        returncode = process.wait()
+        stderr_thread.join(timeout=5)
+        if returncode != 0:
+            message = b"".join(stderr_tail).decode("utf-8", errors="replace").strip()
+            message = format_ffmpeg_error(message, audio_track)
+            raise Exception(f"Audio decoding failed: {message or f'ffmpeg exited with code {returncode}'}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+def is_streaming_decode_available() -> bool:
+    """
+    Check if the streaming ffmpeg decode path can be used
+    """
+    return STREAMING_DECODE_ENABLED and shutil.which("ffmpeg") is not None
+
+def read_wav_chunks(audio_file_path: str, chunk_frames: int = PCM_CHUNK_FRAMES) -> Iterator[bytes]:
+    """
+    Read a 16kHz mono PCM WAV file in fixed-size chunks
+    """
+    with wave.open(audio_file_path, 'rb') as wf:
         # Verify audio format
-        if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getframerate() != 16000:
+        if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getframerate() != VOSK_SAMPLE_RATE:
             raise Exception("Audio file must be WAV format mono PCM 16kHz")
         
-        # Create recognizer
-        rec = KaldiRecognizer(model, wf.getframerate())
-        rec.SetWords(True)  # Enable word-level timestamps
-        
-        # Process audio
-        segments = []
-        full_text = ""
-        total_confidence = 0
-        word_count = 0
-        
         while True:
-            data = wf.readframes(4000)
+            data = wf.readframes(chunk_frames)
             if len(data) == 0:
                 break
-            
-            if rec.AcceptWaveform(data):
-                result = json.loads(rec.Result())
-                if result.get('text'):
-                    segments.append(result)
-                    full_text += result['text'] + " "
-                    
-                    # Calculate confidence from words
-                    for word in result.get('result', []):
-                        if 'conf' in word:
-                            total_confidence += word['conf']
-                            word_count += 1
-        
-        # Get final result
-        final_result = json.loads(rec.FinalResult())
-        if final_result.get('text'):
-            segments.append(final_result)
-            full_text += final_result['text']
-            
-            # Add final confidence
-            for word in final_result.get('result', []):
-                if 'conf' in word:
-                    total_confidence += word['conf']
-                    word_count += 1
-        
-        wf.close()
-        
-        # Calculate average confidence
-        avg_confidence = total_confidence / word_count if word_count > 0 else 0.0
-        
-        # Process segments for VTT
-        vtt_segments = []
-        for segment in segments:
-            if segment.get('result'):
-                for i, word in enumerate(segment['result']):
-                    start_time = word.get('start', 0)
-                    end_time = word.get('end', start_time + 1)
-                    text = word.get('word', '')
-                    
-                    vtt_segments.append({
-                        'start': start_time,
-                        'end': end_time,
-                        'text': text
-                    })
-        
-        # Group words into sentences for better VTT display
-        sentence_segments = group_words_into_sentences(vtt_segments)
-        
-        return {
-            'text': full_text.strip(),
-            'confidence': round(avg_confidence, 3),
-            'segments': segments,
-            'vtt_segments': sentence_segments
-        }
+            yield data
+
+def transcribe_with_vosk_sync(audio_file_path: str, model_path: str, model=None,
+                              progress: Optional[Callable[[int], None]] = None,
+                              on_segment: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Transcribe audio file using Vosk model (synchronous)
+    An already loaded model (e.g. from the model cache) can be passed to skip loading
+    """
+    # Check if model exists
+    if model is None and not os.path.exists(model_path):
+        raise Exception(f"Model not found at {model_path}. Please ensure models are downloaded.")
+    
+    # Load model unless a shared one was provided
+    if model is None:
+        # A private model is not pooled: its recognizer is dropped along with it
+        try:
+            rec = create_recognizer(Model(model_path))
+            segments = decode_pcm_segments(rec, read_wav_chunks(audio_file_path), progress, on_segment)
+            return build_transcription_result(segments)
+        except Exception as e:
+            raise Exception(f"Speech recognition failed: {str(e)}")
+    
+    return transcribe_pcm_stream(read_wav_chunks(audio_file_path), model, progress=progress, on_segment=on_segment)
+
+def create_recognizer(model, sample_rate: int = VOSK_SAMPLE_RATE):
+    """
+    Create a recognizer with word-level timestamps enabled
+    """
+    rec = KaldiRecognizer(model, sample_rate)
+    rec.SetWords(True)  # Enable word-level timestamps
+    return rec
+
+@contextmanager
+def pooled_recognizer(model, sample_rate: int = VOSK_SAMPLE_RATE):
+    """
+    Borrow a recognizer for the model from the pool, creating one if none is idle
+    It is Reset() and returned to the pool afterwards
+    """
+    with get_recognizer_pool().recognizer(model, sample_rate, create_recognizer) as rec:
+        yield rec
+
+def transcribe_pcm_stream(chunks: Iterable[bytes], model, sample_rate: int = VOSK_SAMPLE_RATE,
+                          progress: Optional[Callable[[int], None]] = None,
+                          on_segment: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Transcribe a stream of mono s16le PCM chunks using a loaded Vosk model
+    progress is called with the byte count of every decoded chunk and
+    on_segment with every finalized segment
+    """
+    try:
+        with pooled_recognizer(model, sample_rate) as rec:
+            segments = decode_pcm_segments(rec, chunks, progress, on_segment)
+        return build_transcription_result(segments)
         
     except Exception as e:
         raise Exception(f"Speech recognition failed: {str(e)}")
 
+def transcribe_pcm_parallel(chunks: Iterable[bytes], model, sample_rate: int = VOSK_SAMPLE_RATE,
+                            workers: int = PARALLEL_DECODE_WORKERS,
+                            max_chunk_seconds: float = PARALLEL_CHUNK_SECONDS,
+                            progress: Optional[Callable[[int], None]] = None,
+                            on_segment: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Transcribe long audio by splitting it at silence and decoding pieces in parallel
+    Each piece gets its own recognizer on the shared model; word timestamps are
+    shifted by the piece offset so the result matches a serial decode in shape.
+    on_segment receives the segments of each piece once all earlier pieces are done
+    """
+    def decode_piece(offset: float, pcm: bytes) -> List[Dict]:
+        step = PCM_CHUNK_FRAMES * 2
+        with pooled_recognizer(model, sample_rate) as rec:
+            segments = decode_pcm_segments(rec, (pcm[i:i + step] for i in range(0, len(pcm), step)), progress)
+        return offset_segment_times(segments, offset)
+    
+    try:
+        pieces = split_pcm_at_silence(
+            chunks, sample_rate,
+            max_seconds=max_chunk_seconds, min_seconds=max_chunk_seconds / 2
+        )
+        segments = []
+        pending = deque()
+        
+        def collect(piece_segments: List[Dict]):
+            segments.extend(piece_segments)
+            if on_segment is not None:
+                for segment in piece_segments:
+                    on_segment(segment)
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # Bound the number of undecoded pieces held in memory
+            for offset, pcm in pieces:
+                pending.append(executor.submit(decode_piece, offset, pcm))
+                if len(pending) >= workers * 2:
+                    collect(pending.popleft().result())
+            while pending:
+                collect(pending.popleft().result())
+        
+        return build_transcription_result(segments)
+        
+    except Exception as e:
+        raise Exception(f"Speech recognition failed: {str(e)}")
+
+def offset_segment_times(segments: List[Dict], offset: float) -> List[Dict]:
+    """
+    Shift word timestamps of recognizer segments by offset seconds
+    """
+    if offset:
+        for segment in segments:
+            for word in segment.get('result', []):
+                if 'start' in word:
+                    word['start'] = round(word['start'] + offset, 6)
+                if 'end' in word:
+                    word['end'] = round(word['end'] + offset, 6)
+    return segments
+
+def shift_segments(on_segment: Optional[Callable[[Dict], None]], offset: float) -> Callable[[Dict], None]:
+    """
+    Wrap an on_segment callback to shift each segment by offset seconds first
+    Segments are shifted in place
+    """
+    def shifted(segment: Dict):
+        offset_segment_times([segment], offset)
+        if on_segment is not None:
+            on_segment(segment)
+    return shifted
+
+def decode_pcm_segments(rec, chunks: Iterable[bytes],
+                        progress: Optional[Callable[[int], None]] = None,
+                        on_segment: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+    """
+    Feed PCM chunks into a recognizer and collect finalized result segments
+    on_segment is called with each segment as soon as it is finalized
+    """
+    segments = []
+    
+    for data in chunks:
+        accepted = rec.AcceptWaveform(data)
+        if progress is not None:
+            progress(len(data))
+        if accepted:
+            result = json.loads(rec.Result())
+            if result.get('text'):
+                segments.append(result)
+                if on_segment is not None:
+                    on_segment(result)
+    
+    # Get final result
+    final_result = json.loads(rec.FinalResult())
+    if final_result.get('text'):
+        segments.append(final_result)
+        if on_segment is not None:
+            on_segment(final_result)
+    
+    return segments
+
+def build_transcription_result(segments: List[Dict]) -> Dict:
+    """
+    Build text, confidence and VTT segments from recognizer result segments
+    """
+    full_text = " ".join(segment['text'] for segment in segments)
+    
+    # Calculate confidence from words
+    total_confidence = 0
+    word_count = 0
+    for segment in segments:
+        for word in segment.get('result', []):
+            if 'conf' in word:
+                total_confidence += word['conf']
+                word_count += 1
+    
+    # Calculate average confidence
+    avg_confidence = total_confidence / word_count if word_count > 0 else 0.0
+    
+    # Process segments for VTT
+    vtt_segments = []
+    for segment in segments:
+        if segment.get('result'):
+            for word in segment['result']:
+                start_time = word.get('start', 0)
+                end_time = word.get('end', start_time + 1)
+                text = word.get('word', '')
+                
+                vtt_segments.append({
+                    'start': start_time,
+                    'end': end_time,
+                    'text': text
+                })
+    
+    # Group words into sentences for better VTT display
+    sentence_segments = group_words_into_sentences(vtt_segments)
+    
+    return {
+        'text': full_text.strip(),
+        'confidence': round(avg_confidence, 3),
+        'segments': segments,
+        'vtt_segments': sentence_segments
+    }
+
 def group_words_into_sentences(word_segments: List[Dict], max_duration: float = 5.0) -> List[Dict]:
     """
     Group words into sentences for better subtitle display
@@ -0,0 +1,427 @@
+"""
+Pluggable task storage backends
+
+JsonTaskStore keeps one JSON document per task in TASKS_DIR (default),
+with updates appended to a per-task journal.
+SqliteTaskStore keeps tasks in an indexed SQLite database in WAL mode,
+with results stored in a separate table so status updates stay small.
+"""
+import os
+import json
+import sqlite3
+import tempfile
+import threading
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from .config import TASKS_DIR, TASK_STORE, TASK_DB_PATH, TASK_JOURNAL_MAX_BYTES
+
+class JsonTaskStore:
+    """
+    One JSON document per task: TASKS_DIR/{task_id}.json
+
+    Field updates are appended as single JSON lines to an append-only
+    journal (TASKS_DIR/{task_id}.journal) and merged over the document on
+    read, so status and progress updates are constant-size appends. The
+    document is rewritten (temp file plus rename) only when a result is
+    stored or the journal grows past journal_max_bytes. Access to one task
+    is serialized by one of a fixed array of locks picked by task id hash,
+    so memory does not grow with the number of tasks.
+
+    The first record of every journal carries a unique journal id. A
+    compacted document records the id and size of the journal it absorbed,
+    so if a crash leaves that journal behind, its already absorbed records
+    are not replayed over the newer document.
+    """
+
+    JOURNAL_ID_KEY = "_journal_id"
+    COMPACTED_KEY = "_compacted_journal"
+    LOCK_STRIPES = 64
+
+    def __init__(self, tasks_dir: str, journal_max_bytes: int = TASK_JOURNAL_MAX_BYTES):
+        self.tasks_dir = tasks_dir
+        self.journal_max_bytes = journal_max_bytes
+        self._locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+
+    def _task_file(self, task_id: str) -> str:
+        return os.path.join(self.tasks_dir, f"{task_id}.json")
+
+    def _journal_file(self, task_id: str) -> str:
+        return os.path.join(self.tasks_dir, f"{task_id}.journal")
+
+    def _lock(self, task_id: str) -> threading.Lock:
+        """Get the lock serializing access to one task (shared with other tasks)"""
+        return self._locks[hash(task_id) % len(self._locks)]
+
+    def _write(self, task_data: Dict) -> bool:
+        """Atomically replace the task document"""
+        fd, temp_path = tempfile.mkstemp(dir=self.tasks_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(task_data, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self._task_file(task_data["id"]))
+            return True
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return False
+
+    def _append(self, task_id: str, fields: Dict) -> bool:
+        """
+        Append one update to the journal as a single write
+        Records start with a newline so one cut short by a crash is always
+        terminated by the next record instead of corrupting it
+        """
+        path = self._journal_file(task_id)
+        try:
+            try:
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_APPEND, 0o644)
+                # New journal: its first record carries the journal id
+                fields = dict(fields, **{self.JOURNAL_ID_KEY: uuid.uuid4().hex})
+            except FileExistsError:
+                fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+            line = ("\n" + json.dumps(fields, ensure_ascii=False, separators=(',', ':')) + "\n").encode('utf-8')
+            try:
+                os.write(fd, line)
+                return True
+            finally:
+                os.close(fd)
+        except OSError:
+            return False
+
+    def _read(self, task_id: str, journal_state: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        Read the task document with journaled updates applied
+        journal_state, if given, receives the id and size of the journal read
+        """
+        try:
+            with open(self._task_file(task_id), 'r', encoding='utf-8') as f:
+                task_data = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return None
+        compacted = task_data.pop(self.COMPACTED_KEY, None) or {}
+
+        try:
+            with open(self._journal_file(task_id), 'rb') as f:
+                journal = f.read()
+        except IOError:
+            journal = b""
+
+        # (offset, record) pairs; a record cut short by a crash never parses
+        records = []
+        offset = 0
+        for line in journal.split(b"\n"):
+            start, offset = offset, offset + len(line) + 1
+            if not line.strip():
+                continue
+            try:
+                records.append((start, json.loads(line)))
+            except ValueError:
+                continue
+
+        journal_id = records[0][1].get(self.JOURNAL_ID_KEY) if records else None
+        absorbed = 0
+        if journal_id is not None and journal_id == compacted.get("id"):
+            # Left behind by a crash during compaction
+            absorbed = compacted.get("size", 0)
+        for start, record in records:
+            if start < absorbed:
+                continue
+            record.pop(self.JOURNAL_ID_KEY, None)
+            task_data.update(record)
+        if journal_state is not None:
+            journal_state.update(id=journal_id, size=len(journal))
+        return task_data
+
+    def _journal_size(self, task_id: str) -> int:
+        try:
+            return os.path.getsize(self._journal_file(task_id))
+        except OSError:
+            return 0
+
+    def _remove_journal(self, task_id: str):
+        try:
+            os.remove(self._journal_file(task_id))
+        except OSError:
+            pass
+
+    def create(self, task_data: Dict) -> bool:
+        """Store a new task"""
+        os.makedirs(self.tasks_dir, exist_ok=True)
+        with self._lock(task_data["id"]):
+            self._remove_journal(task_data["id"])
+            return self._write(task_data)
+
+    def get(self, task_id: str) -> Optional[Dict]:
+        """Get a task with its result, or None if missing or unreadable"""
+        with self._lock(task_id):
+            return self._read(task_id)
+
+    def exists(self, task_id: str) -> bool:
+        """Check whether a task is stored, without reading it"""
+        return os.path.exists(self._task_file(task_id))
+
+    def update(self, task_id: str, fields: Dict) -> bool:
+        """
+        Merge fields into a task
+        Updates are journaled; storing a result or a full journal compacts
+        the journal into the document
+        """
+        with self._lock(task_id):
+            if not os.path.exists(self._task_file(task_id)):
+                return False
+            if "result" not in fields and self._journal_size(task_id) < self.journal_max_bytes:
+                return self._append(task_id, fields)
+
+            journal_state = {}
+            task_data = self._read(task_id, journal_state)
+            if task_data is None:
+                return False
+            task_data.update(fields)
+            if journal_state["id"] is not None:
+                # Lets a read skip this journal's records if removing it below
+                # is cut short by a crash
+                task_data[self.COMPACTED_KEY] = {"id": journal_state["id"], "size": journal_state["size"]}
+            if not self._write(task_data):
+                return False
+            self._remove_journal(task_id)
+            return True
+
+    def delete(self, task_id: str) -> bool:
+        """Delete a task"""
+        with self._lock(task_id):
+            self._remove_journal(task_id)
+            try:
+                os.remove(self._task_file(task_id))
+                deleted = True
+            except OSError:
+                deleted = False
+        return deleted
+
+    def list(self, status: Optional[str] = None) -> List[Dict]:
+        """List tasks, optionally filtered by status"""
+        if not os.path.exists(self.tasks_dir):
+            return []
+        tasks = []
+        for filename in os.listdir(self.tasks_dir):
+            if filename.endswith('.json'):
+                task_data = self.get(filename[:-5])
+                if task_data and (status is None or task_data.get("status") == status):
+                    tasks.append(task_data)
+        return tasks
+
+    def delete_created_before(self, cutoff: datetime, on_delete: Optional[Callable[[str], None]] = None) -> int:
+        """
+        Delete tasks created before cutoff
+        on_delete(task_id) is called for every deleted task.
+        Unreadable task files and stale temporary files are aged by their
+        modification time instead of being deleted straight away
+        """
+        if not os.path.exists(self.tasks_dir):
+            return 0
+        deleted_count = 0
+        for filename in os.listdir(self.tasks_dir):
+            path = os.path.join(self.tasks_dir, filename)
+            if filename.endswith('.tmp'):
+                try:
+                    if datetime.fromtimestamp(os.path.getmtime(path)) < cutoff:
+                        os.remove(path)
+                except OSError:
+                    pass
+                continue
+            if not filename.endswith('.json'):
+                continue
+
+            task_id = filename[:-5]
+            task_data = self.get(task_id)
+            try:
+                created_at = datetime.fromisoformat(task_data['created_at'])
+            except (TypeError, KeyError, ValueError):
+                try:
+                    created_at = datetime.fromtimestamp(os.path.getmtime(path))
+                except OSError:
+                    continue
+            if created_at < cutoff and self.delete(task_id):
+                deleted_count += 1
+                if on_delete is not None:
+                    on_delete(task_id)
+        return deleted_count
+
+class SqliteTaskStore:
+    """
+    SQLite task table indexed by status and created_at
+
+    Fields without a dedicated column are kept in a JSON "extra" column.
+    Results live in their own table and are only written when they change.
+    """
+
+    COLUMNS = ("id", "status", "input_file", "output_file", "language", "model_size",
+               "error", "created_at", "updated_at")
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._init_schema()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connection()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                input_file TEXT,
+                output_file TEXT,
+                language TEXT,
+                model_size TEXT,
+                error TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                extra TEXT NOT NULL DEFAULT '{}'
+            );
+            CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status);
+            CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks (created_at);
+            CREATE TABLE IF NOT EXISTS task_results (
+                task_id TEXT PRIMARY KEY REFERENCES tasks (id) ON DELETE CASCADE,
+                result TEXT NOT NULL
+            );
+        """)
+
+    def _row_to_task(self, row: sqlite3.Row, result_json: Optional[str]) -> Dict:
+        task_data = {column: row[column] for column in self.COLUMNS}
+        task_data.update(json.loads(row["extra"]))
+        task_data["result"] = json.loads(result_json) if result_json is not None else None
+        return task_data
+
+    def _split_fields(self, fields: Dict):
+        """Split fields into column values, extra values and the result"""
+        columns = {k: v for k, v in fields.items() if k in self.COLUMNS}
+        extra = {k: v for k, v in fields.items() if k not in self.COLUMNS and k != "result"}
+        return columns, extra
+
+    def create(self, task_data: Dict) -> bool:
+        """Store a new task"""
+        columns, extra = self._split_fields(task_data)
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO tasks (id, status, input_file, output_file, language, model_size, "
+                "error, created_at, updated_at, extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                tuple(columns.get(column) for column in self.COLUMNS) + (json.dumps(extra, ensure_ascii=False),)
+            )
+            if task_data.get("result") is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO task_results (task_id, result) VALUES (?, ?)",
+                    (task_data["id"], json.dumps(task_data["result"], ensure_ascii=False))
+                )
+        return True
+
+    def get(self, task_id: str) -> Optional[Dict]:
+        """Get a task with its result, or None if missing"""
+        row = self._connection().execute(
+            "SELECT tasks.*, task_results.result AS result_json FROM tasks "
+            "LEFT JOIN task_results ON task_results.task_id = tasks.id WHERE tasks.id = ?",
+            (task_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return self._row_to_task(row, row["result_json"])
+
+    def exists(self, task_id: str) -> bool:
+        """Check whether a task is stored, without reading it"""
+        return self._connection().execute("SELECT 1 FROM tasks WHERE id = ?", (task_id,)).fetchone() is not None
+
+    def update(self, task_id: str, fields: Dict) -> bool:
+        """Merge fields into a task"""
+        columns, extra = self._split_fields(fields)
+        columns.pop("id", None)
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT extra FROM tasks WHERE id = ?", (task_id,)).fetchone()
+            if row is None:
+                return False
+            if extra:
+                merged = json.loads(row["extra"])
+                merged.update(extra)
+                columns["extra"] = json.dumps(merged, ensure_ascii=False)
+            if columns:
+                assignments = ", ".join(f"{column} = ?" for column in columns)
+                conn.execute(f"UPDATE tasks SET {assignments} WHERE id = ?", tuple(columns.values()) + (task_id,))
+            if fields.get("result") is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO task_results (task_id, result) VALUES (?, ?)",
+                    (task_id, json.dumps(fields["result"], ensure_ascii=False))
+                )
+        return True
+
+    def delete(self, task_id: str) -> bool:
+        """Delete a task and its result"""
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+        return cursor.rowcount > 0
+
+    def list(self, status: Optional[str] = None) -> List[Dict]:
+        """
+        List tasks, optionally filtered by status (uses the status index)
+        Results are not read: "result" is None in listed tasks, use get()
+        """
+        query = "SELECT * FROM tasks"
+        params = ()
+        if status is not None:
+            query += " WHERE status = ?"
+            params = (status,)
+        query += " ORDER BY created_at"
+        rows = self._connection().execute(query, params).fetchall()
+        return [self._row_to_task(row, None) for row in rows]
+
+    def delete_created_before(self, cutoff: datetime, on_delete: Optional[Callable[[str], None]] = None) -> int:
+        """
+        Delete tasks created before cutoff (uses the created_at index)
+        on_delete(task_id) is called for every deleted task
+        """
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            task_ids = [row["id"] for row in conn.execute(
+                "SELECT id FROM tasks WHERE created_at < ?", (cutoff.isoformat(),)
+            )]
+            conn.execute("DELETE FROM tasks WHERE created_at < ?", (cutoff.isoformat(),))
+        if on_delete is not None:
+            for task_id in task_ids:
+                on_delete(task_id)
+        return len(task_ids)
+
+_task_store = None
+_task_store_lock = threading.Lock()
+
+def get_task_store():
+    """
+    Get the configured task store (TASK_STORE=json|sqlite)
+    """
+    global _task_store
+    with _task_store_lock:
+        if _task_store is None:
+            if TASK_STORE == "sqlite":
+                _task_store = SqliteTaskStore(TASK_DB_PATH)
+            else:
+                _task_store = JsonTaskStore(TASKS_DIR)
+        return _task_store
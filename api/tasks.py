@@ -2,20 +2,29 @@
 Task management module for asynchronous processing
 """
 import os
-import json
+import time
 import uuid
-import threading
-from datetime import datetime
-from typing import Optional, Dict
-from .config import TASKS_DIR, BACKGROUND_TASK_ENABLED
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from .config import BACKGROUND_TASK_ENABLED, OUTPUT_DIR
+from .scheduler import get_scheduler, get_task_priority, QueueFullError
+from .task_store import get_task_store
+from .events import get_event_bus, TERMINAL_STATUSES
+from .partial_results import get_partial_transcript, delete_partial_results
+from .artifacts import delete_task_artifacts
+from .words import delete_task_words
+from .metrics import QUEUE_WAIT_SECONDS, TASKS_TOTAL
 
-def create_task(task_id: str, input_file_path: str, language: str, model_size: str):
+def create_task(task_id: str, input_file_path: str, language: str, model_size: str,
+                content_hash: Optional[str] = None, callback_url: Optional[str] = None,
+                batch_id: Optional[str] = None, audio_track: int = 0):
     """
     Create a new task with initial status
+    content_hash is the result cache key of the uploaded file
+    callback_url receives a signed POST when the task is done or failed
+    batch_id links the task to the batch it was submitted with
+    audio_track is the index of the audio stream to transcribe
     """
-    # Ensure tasks directory exists
-    os.makedirs(TASKS_DIR, exist_ok=True)
-    
     task_data = {
         "id": task_id,
         "status": "queued",
@@ -25,41 +34,72 @@ def create_task(task_id: str, input_file_path: str, language: str, model_size: s
         "model_size": model_size,
         "result": None,
         "error": None,
+        "content_hash": content_hash,
+        "callback_url": callback_url,
+        "batch_id": batch_id,
+        "audio_track": audio_track,
         "created_at": datetime.now().isoformat(),
         "updated_at": datetime.now().isoformat()
     }
     
-    task_file = os.path.join(TASKS_DIR, f"{task_id}.json")
-    with open(task_file, 'w', encoding='utf-8') as f:
-        json.dump(task_data, f, indent=2, ensure_ascii=False)
+    get_task_store().create(task_data)
     
     return task_id
 
+def get_task(task_id: str) -> Optional[Dict]:
+    """
+    Get the stored task record
+    """
+    return get_task_store().get(task_id)
+
+def get_stored_task_status(task_id: str) -> Optional[str]:
+    """
+    Get only the status of a task, or None if it does not exist
+    """
+    task_data = get_task_store().get(task_id)
+    return task_data["status"] if task_data else None
+
 def get_task_status(task_id: str, output_format: str = "text") -> Optional[Dict]:
     """
     Get status of a specific task with optional output format
     """
-    task_file = os.path.join(TASKS_DIR, f"{task_id}.json")
-    
-    if not os.path.exists(task_file):
-        return None
-    
-    try:
-        with open(task_file, 'r', encoding='utf-8') as f:
-            task_data = json.load(f)
-    except (json.JSONDecodeError, IOError):
+    task_data = get_task_store().get(task_id)
+    if task_data is None:
         return None
     
+    return format_task_response(task_data, output_format)
+
+def format_task_response(task_data: Dict, output_format: str = "text") -> Dict:
+    """
+    Build the API representation of a stored task
+    """
+    task_id = task_data["id"]
     response = {
-        "task_id": task_data["id"],
+        "task_id": task_id,
         "status": task_data["status"],
         "result": None,
         "error": task_data.get("error")
     }
     
+    # Report position in the job queue while waiting
+    if task_data["status"] == "queued":
+        response["queue_position"] = get_scheduler().queue_position(task_id)
+    
+    # Report decode progress while processing
+    if task_data["status"] == "processing" and task_data.get("progress"):
+        response.update(get_progress_fields(task_data["progress"]))
+    
+    # Serve the transcript decoded so far while processing
+    result_data = task_data.get("result")
+    if task_data["status"] == "processing":
+        from .stt import build_transcription_result
+        partial_result = get_partial_transcript(task_id, build_transcription_result)
+        if partial_result is not None:
+            result_data = partial_result
+            response["partial"] = True
+    
     # If task has a result, format it based on output_format
-    if task_data.get("result"):
-        result_data = task_data["result"]
+    if result_data:
         
         if output_format == "subtitle" or output_format == "vtt":
             # Generate VTT subtitle
@@ -70,6 +110,15 @@ def get_task_status(task_id: str, output_format: str = "text") -> Optional[Dict]
             else:
                 # Fallback for simple text
                 response["result"] = {"subtitle": f"WEBVTT\n\n00:00:00.000 --> 00:00:10.000\n{result_data}"}
+        elif output_format == "srt":
+            # Generate SRT subtitle
+            if isinstance(result_data, dict) and "vtt_segments" in result_data:
+                from .utils import generate_srt_subtitle
+                srt_content = generate_srt_subtitle(result_data["vtt_segments"])
+                response["result"] = {"subtitle": srt_content}
+            else:
+                # Fallback for simple text
+                response["result"] = {"subtitle": f"1\n00:00:00,000 --> 00:00:10,000\n{result_data}\n"}
         else:
             # Default text format
             if isinstance(result_data, dict):
@@ -86,94 +135,210 @@ def get_task_status(task_id: str, output_format: str = "text") -> Optional[Dict]
 def update_task_status(task_id: str, status: str, result=None, error=None) -> bool:
     """
     Update task status and result
+    Outcome counters and webhook callbacks only follow the first transition
+    into a terminal status
     """
-    task_file = os.path.join(TASKS_DIR, f"{task_id}.json")
+    fields = {"status": status, "updated_at": datetime.now().isoformat()}
+    if result is not None:
+        fields["result"] = result
+    if error is not None:
+        fields["error"] = error
     
-    if not os.path.exists(task_file):
-        return False
+    previous_status = get_stored_task_status(task_id) if status in TERMINAL_STATUSES else None
+    updated = get_task_store().update(task_id, fields)
+    if updated:
+        # Wake long-poll and SSE subscribers
+        get_event_bus().publish(task_id, {
+            "task_id": task_id,
+            "status": status,
+            "error": error,
+            "updated_at": fields["updated_at"]
+        })
+        if status in TERMINAL_STATUSES and previous_status not in TERMINAL_STATUSES:
+            TASKS_TOTAL.inc(status=status)
+            queue_task_callback(task_id)
+    return updated
+
+def queue_task_callback(task_id: str):
+    """
+    Queue webhook delivery for a finished task that has a callback_url
+    """
+    task_data = get_task_store().get(task_id)
+    if not task_data or not task_data.get("callback_url"):
+        return
     
-    try:
-        with open(task_file, 'r', encoding='utf-8') as f:
-            task_data = json.load(f)
-    except (json.JSONDecodeError, IOError):
-        return False
+    from .webhooks import get_webhook_dispatcher
+    payload = format_task_response(task_data)
+    payload["event"] = "task.completed" if task_data["status"] == "done" else "task.failed"
+    get_webhook_dispatcher().enqueue(task_id, task_data["callback_url"], payload)
+
+def get_progress_fields(progress: Dict) -> Dict:
+    """
+    Compute progress fraction and ETA from stored decode progress
+    """
+    processed = progress.get("processed_seconds", 0.0)
+    total = progress.get("total_seconds")
+    real_time_factor = progress.get("real_time_factor")
     
-    task_data["status"] = status
-    if result is not None:
-        task_data["result"] = result
-    if error is not None:
-        task_data["error"] = error
-    task_data["updated_at"] = datetime.now().isoformat()
+    fields = {"progress": None, "eta_seconds": None, "real_time_factor": real_time_factor}
+    if total:
+        fields["progress"] = round(min(processed / total, 1.0), 3)
+        if real_time_factor is not None:
+            fields["eta_seconds"] = round(max(total - processed, 0.0) * real_time_factor, 1)
+    return fields
+
+def update_task_progress(task_id: str, processed_seconds: float, total_seconds: Optional[float] = None,
+                         real_time_factor: Optional[float] = None) -> bool:
+    """
+    Record decode progress of a processing task
+    Called at throttled intervals from the decode loop
+    """
+    progress = {
+        "processed_seconds": round(processed_seconds, 2),
+        "total_seconds": round(total_seconds, 2) if total_seconds else None,
+        "real_time_factor": round(real_time_factor, 3) if real_time_factor is not None else None
+    }
+    updated_at = datetime.now().isoformat()
     
-    try:
-        with open(task_file, 'w', encoding='utf-8') as f:
-            json.dump(task_data, f, indent=2, ensure_ascii=False)
-        return True
-    except IOError:
-        return False
+    updated = get_task_store().update(task_id, {"progress": progress, "updated_at": updated_at})
+    if updated:
+        event = {"type": "progress", "task_id": task_id, "status": "processing", "updated_at": updated_at}
+        event.update(get_progress_fields(progress))
+        get_event_bus().publish(task_id, event)
+    return updated
 
-def start_background_task(task_id: str, input_file_path: str, language: str, model_size: str):
+def create_task_job(task_id: str, input_file_path: str, language: str, model_size: str,
+                    audio_track: int = 0) -> Callable[[], None]:
     """
-    Start background processing task
+    Build the worker pool job that processes a task
+    """
+    queued_at = time.monotonic()
+    
+    def process_task():
+        """
+        Background task processing function
+        process_audio_sync marks the task failed itself before re-raising
+        """
+        QUEUE_WAIT_SECONDS.observe(time.monotonic() - queued_at)
+        from .stt import process_audio_sync
+        process_audio_sync(input_file_path, language, model_size, task_id, audio_track=audio_track)
+
+    return process_task
+
+def start_background_task(task_id: str, input_file_path: str, language: str, model_size: str,
+                          audio_track: int = 0):
+    """
+    Queue task for background processing on the worker pool
+    Raises QueueFullError when the job queue is at capacity
     """
     if not BACKGROUND_TASK_ENABLED:
         return False
     
-    def process_task():
-        """Background task processing function"""
-        try:
-            from .stt import process_audio_sync
-            process_audio_sync(input_file_path, language, model_size, task_id)
-        except Exception as e:
-            update_task_status(task_id, "failed", error=str(e))
+    # Queue on the bounded worker pool
+    priority = get_task_priority(model_size, input_file_path)
+    job = create_task_job(task_id, input_file_path, language, model_size, audio_track=audio_track)
+    get_scheduler().submit(task_id, job, priority)
     
-    # Start background thread
-    thread = threading.Thread(target=process_task, daemon=True)
-    thread.start()
+    return True
+
+def start_batch_tasks(tasks: List[Tuple[str, str]], language: str, model_size: str):
+    """
+    Queue the (task_id, input_file_path) tasks of a batch as one contiguous group
+    Running them back to back keeps the batch's model hot in the model cache.
+    The group is ranked by its largest file so it does not jump ahead of
+    single uploads that are shorter than most of its files.
+    Raises QueueFullError when the whole group does not fit in the queue
+    """
+    if not BACKGROUND_TASK_ENABLED or not tasks:
+        return False
+    
+    priority = max(get_task_priority(model_size, input_file_path) for _, input_file_path in tasks)
+    jobs = [(task_id, create_task_job(task_id, input_file_path, language, model_size))
+            for task_id, input_file_path in tasks]
+    get_scheduler().submit_many(jobs, priority)
     
     return True
 
+def recover_interrupted_tasks() -> int:
+    """
+    Re-queue tasks left queued or processing when the service last stopped
+    Must run once at startup, before the worker pool has picked up any job.
+    Tasks are re-queued oldest first; processing tasks resume from the
+    checkpoint in their partial results log. Tasks whose input file is gone,
+    or that no longer fit in the queue, are failed.
+    Returns the number of re-queued tasks
+    """
+    if not BACKGROUND_TASK_ENABLED:
+        return 0
+    
+    store = get_task_store()
+    orphaned = store.list(status="queued") + store.list(status="processing")
+    orphaned.sort(key=lambda task_data: task_data.get("created_at", ""))
+    
+    recovered = 0
+    for task_data in orphaned:
+        task_id = task_data["id"]
+        input_file_path = task_data.get("input_file")
+        if not input_file_path or not os.path.exists(input_file_path):
+            update_task_status(task_id, "failed", error="Input file lost during service restart")
+            continue
+        
+        if task_data["status"] == "processing":
+            update_task_status(task_id, "queued")
+        try:
+            start_background_task(task_id, input_file_path, task_data["language"], task_data["model_size"],
+                                  audio_track=task_data.get("audio_track") or 0)
+        except QueueFullError:
+            update_task_status(task_id, "failed", error="Task queue is full")
+            continue
+        recovered += 1
+    
+    return recovered
+
 def get_all_tasks() -> list:
     """
     Get all tasks (for debugging/admin purposes)
+    Listing may skip results, so finished tasks are read in full
     """
-    if not os.path.exists(TASKS_DIR):
-        return []
-    
+    store = get_task_store()
     tasks = []
-    for filename in os.listdir(TASKS_DIR):
-        if filename.endswith('.json'):
-            task_id = filename[:-5]  # Remove .json extension
-            task_status = get_task_status(task_id)
-            if task_status:
-                tasks.append(task_status)
-    
+    for task_data in store.list():
+        if task_data["status"] == "done" and task_data.get("result") is None:
+            task_data = store.get(task_data["id"]) or task_data
+        tasks.append(format_task_response(task_data))
     return tasks
 
+def task_exists(task_id: str) -> bool:
+    """
+    Check whether a task exists without reading its record
+    """
+    return get_task_store().exists(task_id)
+
+def delete_task_outputs(task_id: str):
+    """
+    Remove the output files of a task: text file, rendered artifacts,
+    word table and partial results log
+    """
+    delete_task_artifacts(task_id)
+    delete_task_words(task_id)
+    delete_partial_results(task_id)
+    try:
+        os.remove(os.path.join(OUTPUT_DIR, f"{task_id}.txt"))
+    except OSError:
+        pass
+
+def delete_task(task_id: str) -> bool:
+    """
+    Delete a task and its output files
+    """
+    deleted = get_task_store().delete(task_id)
+    delete_task_outputs(task_id)
+    return deleted
+
 def cleanup_old_tasks(days_old: int = 7):
     """
-    Clean up tasks older than specified days
+    Clean up tasks older than specified days, with their output files
     """
-    if not os.path.exists(TASKS_DIR):
-        return 0
-    
-    deleted_count = 0
-    current_time = datetime.now()
-    
-    for filename in os.listdir(TASKS_DIR):
-        if filename.endswith('.json'):
-            task_file = os.path.join(TASKS_DIR, filename)
-            try:
-                with open(task_file, 'r', encoding='utf-8') as f:
-                    task_data = json.load(f)
-                
-                created_at = datetime.fromisoformat(task_data['created_at'])
-                if (current_time - created_at).days > days_old:
-                    os.remove(task_file)
-                    deleted_count += 1
-            except (json.JSONDecodeError, IOError, KeyError, ValueError):
-                # Remove corrupted task files
-                os.remove(task_file)
-                deleted_count += 1
-    
-    return deleted_count
\ No newline at end of file
+    # Tasks whose age in whole days exceeds days_old
+    cutoff = datetime.now() - timedelta(days=days_old + 1)
+    return get_task_store().delete_created_before(cutoff, on_delete=delete_task_outputs)
@@ -3,10 +3,18 @@ Utility functions for Vosk STT API
 """
 import os
 import json
+import socket
+import ipaddress
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 from fastapi import UploadFile, HTTPException
-from .config import MAX_FILE_SIZE, SUPPORTED_FILE_EXTENSIONS
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from .config import MAX_FILE_SIZE, SUPPORTED_FILE_EXTENSIONS, UPLOAD_CHUNK_SIZE, WEBHOOK_ALLOW_PRIVATE_HOSTS
+
+class FileTooLargeError(Exception):
+    """Raised when an upload exceeds MAX_FILE_SIZE while being saved"""
+    pass
 
 def create_directory_if_not_exists(path: str):
     """
@@ -49,11 +57,122 @@ def validate_uploaded_file(file: UploadFile) -> dict:
     if hasattr(file, 'size') and file.size and file.size > MAX_FILE_SIZE:
         return {
             "valid": False,
-            "error": f"File size exceeds maximum limit of {MAX_FILE_SIZE // (1024*1024)}MB"
+            "error": get_file_size_limit_message()
         }
     
     return {"valid": True}
 
+def get_file_size_limit_message(max_size: int = MAX_FILE_SIZE) -> str:
+    """
+    Get the error message for uploads over the size limit
+    """
+    return f"File size exceeds maximum limit of {max_size // (1024*1024)}MB"
+
+class RequestSizeLimitMiddleware:
+    """
+    ASGI middleware rejecting POST bodies over a per-path limit with 413
+    
+    Form uploads are parsed (and spooled to disk) before a handler runs, so
+    the limit must be enforced here. Requests declaring a larger
+    Content-Length are rejected without reading the body; bodies without one
+    are counted as they arrive and cut off once the limit is crossed.
+    limits maps request paths to maximum body sizes in bytes
+    """
+    
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+    
+    async def __call__(self, scope, receive, send):
+        limit = None
+        if scope["type"] == "http" and scope["method"] == "POST":
+            limit = self.limits.get(scope["path"])
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            await self.reject(scope, receive, send, limit)
+            return
+        
+        state = {"received": 0, "exceeded": False, "started": False}
+        
+        async def limited_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                state["received"] += len(message.get("body", b""))
+                if state["received"] > limit:
+                    state["exceeded"] = True
+                    raise FileTooLargeError(get_file_size_limit_message(limit))
+            return message
+        
+        async def guarded_send(message):
+            # The handler's own error response for the aborted body is replaced
+            if state["exceeded"] and not state["started"]:
+                return
+            if message["type"] == "http.response.start":
+                state["started"] = True
+            await send(message)
+        
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except FileTooLargeError:
+            pass
+        if state["exceeded"] and not state["started"]:
+            await self.reject(scope, receive, send, limit)
+    
+    async def reject(self, scope, receive, send, limit: int):
+        """Send the 413 response"""
+        response = JSONResponse(
+            status_code=413,
+            content={"status": "failed", "error": get_file_size_limit_message(limit), "data": None},
+            headers={"Connection": "close"}
+        )
+        await response(scope, receive, send)
+
+async def save_upload_file(file: UploadFile, destination: str, max_size: int = MAX_FILE_SIZE,
+                           chunk_size: int = UPLOAD_CHUNK_SIZE, hasher=None) -> int:
+    """
+    Stream an uploaded file to disk in fixed-size chunks
+    File writes run in the thread pool so the event loop is never blocked.
+    The size limit is enforced while streaming; on any failure the partial
+    file is removed. An optional hashlib object is updated with every chunk.
+    Returns the number of bytes written.
+    Raises FileTooLargeError as soon as max_size is crossed
+    """
+    buffer = await run_in_threadpool(open, destination, "wb")
+    total_size = 0
+    
+    try:
+        while True:
+            chunk = await file.read(chunk_size)
+            if not chunk:
+                break
+            total_size += len(chunk)
+            if total_size > max_size:
+                raise FileTooLargeError(get_file_size_limit_message(max_size))
+            if hasher is not None:
+                hasher.update(chunk)
+            await run_in_threadpool(buffer.write, chunk)
+    except BaseException:
+        await run_in_threadpool(buffer.close)
+        cleanup_temp_files([destination])
+        raise
+    
+    await run_in_threadpool(buffer.close)
+    return total_size
+
+async def read_upload_bytes(file: UploadFile, max_size: int) -> bytes:
+    """
+    Read a whole upload into memory
+    Raises FileTooLargeError when it is larger than max_size
+    """
+    data = await file.read(max_size + 1)
+    if len(data) > max_size:
+        raise FileTooLargeError(get_file_size_limit_message(max_size))
+    return data
+
 def validate_language_and_model(language: str, model_size: str) -> dict:
     """
     Validate language and model_size parameters
@@ -80,6 +199,56 @@ def validate_language_and_model(language: str, model_size: str) -> dict:
     
     return {"valid": True}
 
+def resolve_host_addresses(hostname: str, port: Optional[int]) -> List[str]:
+    """
+    Resolve a host name to its distinct IP addresses
+    Raises socket.gaierror, UnicodeError or ValueError if it cannot be resolved
+    """
+    return list(dict.fromkeys(info[4][0] for info in socket.getaddrinfo(hostname, port)))
+
+def is_public_address(address: str) -> bool:
+    """Check whether an IP address is globally routable"""
+    ip = ipaddress.ip_address(address.split('%', 1)[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return not (ip.is_private or ip.is_loopback or ip.is_link_local or ip.is_multicast
+                or ip.is_reserved or ip.is_unspecified)
+
+def validate_callback_url(callback_url: str, allow_private_hosts: bool = WEBHOOK_ALLOW_PRIVATE_HOSTS) -> dict:
+    """
+    Validate webhook callback URL
+    The host is resolved and rejected if any address is loopback, link-local
+    or private, unless allow_private_hosts is set. Resolving may block.
+    The webhook dispatcher checks the host again when delivering.
+    """
+    from urllib.parse import urlparse
+    
+    parsed = urlparse(callback_url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        return {
+            "valid": False,
+            "error": "Invalid callback_url. Must be an absolute http or https URL"
+        }
+    
+    if allow_private_hosts:
+        return {"valid": True}
+    
+    try:
+        addresses = resolve_host_addresses(parsed.hostname, parsed.port or None)
+    except (socket.gaierror, UnicodeError, ValueError):
+        return {
+            "valid": False,
+            "error": "Invalid callback_url. Host cannot be resolved"
+        }
+    
+    if not addresses or not all(is_public_address(address) for address in addresses):
+        return {
+            "valid": False,
+            "error": "Invalid callback_url. Loopback, link-local and private hosts are not allowed"
+        }
+    
+    return {"valid": True}
+
 def format_timestamp(timestamp: datetime) -> str:
     """
     Format timestamp to ISO string
@@ -100,18 +269,42 @@ def generate_vtt_subtitle(segments: list) -> str:
     Generate VTT subtitle format from segments
     Each segment should have: {'start': float, 'end': float, 'text': str}
     """
-    vtt_content = "WEBVTT\n\n"
+    lines = ["WEBVTT", ""]
+    
+    for segment in segments:
+        text = segment['text'].strip()
+        
+        if text:  # Only add non-empty segments
+            lines.append(f"{seconds_to_vtt_time(segment['start'])} --> {seconds_to_vtt_time(segment['end'])}")
+            lines.append(text)
+            lines.append("")
+    
+    return "\n".join(lines) + "\n"
+
+def seconds_to_srt_time(seconds: float) -> str:
+    """
+    Convert seconds to SRT time format (HH:MM:SS,mmm)
+    """
+    return seconds_to_vtt_time(seconds).replace(".", ",")
+
+def generate_srt_subtitle(segments: list) -> str:
+    """
+    Generate SRT subtitle format from segments
+    Each segment should have: {'start': float, 'end': float, 'text': str}
+    """
+    blocks = []
     
-    for i, segment in enumerate(segments):
-        start_time = seconds_to_vtt_time(segment['start'])
-        end_time = seconds_to_vtt_time(segment['end'])
+    for segment in segments:
         text = segment['text'].strip()
         
         if text:  # Only add non-empty segments
-            vtt_content += f"{start_time} --> {end_time}\n"
-            vtt_content += f"{text}\n\n"
+            blocks.append(
+                f"{len(blocks) + 1}\n"
+                f"{seconds_to_srt_time(segment['start'])} --> {seconds_to_srt_time(segment['end'])}\n"
+                f"{text}\n"
+            )
     
-    return vtt_content
+    return "\n".join(blocks)
 
 def read_json_file(file_path: str):
     """
@@ -0,0 +1,60 @@
+"""
+Energy-based silence detection for splitting long audio into chunks
+"""
+from typing import Iterable, Iterator, Tuple
+
+try:
+    import audioop
+except ImportError:
+    # audioop was removed from the standard library in Python 3.13
+    from pydub import pyaudioop as audioop
+
+SAMPLE_WIDTH = 2  # s16le
+
+def find_quietest_offset(pcm: bytes, start: int, end: int, window_bytes: int) -> int:
+    """
+    Find the byte offset of the quietest window in pcm[start:end]
+    Returns the middle of the window with the lowest RMS energy
+    """
+    best_offset = end
+    best_energy = None
+    position = start
+    while position + window_bytes <= end:
+        energy = audioop.rms(pcm[position:position + window_bytes], SAMPLE_WIDTH)
+        if best_energy is None or energy < best_energy:
+            best_energy = energy
+            best_offset = position + window_bytes // 2
+            if energy == 0:
+                break
+        position += window_bytes
+    # Keep the cut aligned to whole samples
+    return best_offset - best_offset % SAMPLE_WIDTH
+
+def split_pcm_at_silence(chunks: Iterable[bytes], sample_rate: int = 16000,
+                         max_seconds: float = 60.0, min_seconds: float = 30.0,
+                         window_ms: int = 30) -> Iterator[Tuple[float, bytes]]:
+    """
+    Regroup a stream of mono s16le PCM chunks into pieces cut at silence
+
+    Each piece is between min_seconds and max_seconds long (except the
+    last), cut in the quietest window_ms window of that range so words are
+    not split across pieces. Yields (offset_seconds, pcm) tuples.
+    """
+    bytes_per_second = sample_rate * SAMPLE_WIDTH
+    max_bytes = int(max_seconds * bytes_per_second)
+    min_bytes = int(min_seconds * bytes_per_second)
+    window_bytes = max(SAMPLE_WIDTH, int(sample_rate * window_ms / 1000) * SAMPLE_WIDTH)
+
+    buffer = bytearray()
+    consumed = 0
+
+    for data in chunks:
+        buffer.extend(data)
+        while len(buffer) >= max_bytes:
+            cut = find_quietest_offset(buffer, min_bytes, max_bytes, window_bytes)
+            yield consumed / bytes_per_second, bytes(buffer[:cut])
+            del buffer[:cut]
+            consumed += cut
+
+    if buffer:
+        yield consumed / bytes_per_second, bytes(buffer)
@@ -0,0 +1,260 @@
+"""
+Webhook callbacks on task completion
+
+Deliveries are persisted as JSON files in WEBHOOK_QUEUE_DIR and sent by a
+background thread with HMAC-SHA256 signing and exponential backoff, so
+pending callbacks survive restarts. Signing uses its own WEBHOOK_SECRET so
+receivers never need the API key; without one, deliveries are unsigned.
+
+The callback host is resolved and checked again on every attempt and the
+connection is made to the checked address, so a host that was rebound to a
+private address after submission is not reached. Redirects are not followed.
+"""
+import os
+import json
+import hmac
+import socket
+import logging
+import time
+import uuid
+import hashlib
+import tempfile
+import threading
+import http.client
+from urllib.parse import urlparse
+from typing import Dict, Optional
+from .config import (
+    WEBHOOK_QUEUE_DIR, WEBHOOK_SECRET, WEBHOOK_TIMEOUT, WEBHOOK_MAX_ATTEMPTS,
+    WEBHOOK_BACKOFF_BASE, WEBHOOK_BACKOFF_MAX, WEBHOOK_ALLOW_PRIVATE_HOSTS
+)
+from .utils import resolve_host_addresses, is_public_address
+
+logger = logging.getLogger(__name__)
+
+def sign_payload(secret: str, timestamp: str, body: bytes) -> str:
+    """
+    Compute the signature header value for a webhook body
+    The signed message is "{timestamp}.{body}" to prevent replays with old timestamps
+    """
+    digest = hmac.new(secret.encode('utf-8'), timestamp.encode('utf-8') + b"." + body, hashlib.sha256)
+    return f"sha256={digest.hexdigest()}"
+
+class _PinnedHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection to a fixed address, sending the host name in the Host header"""
+
+    def __init__(self, host: str, address: str, **kwargs):
+        super().__init__(host, **kwargs)
+        self.address = address
+
+    def connect(self):
+        self.sock = socket.create_connection((self.address, self.port), self.timeout)
+
+class _PinnedHTTPSConnection(http.client.HTTPSConnection):
+    """HTTPS connection to a fixed address, verifying the certificate of the host name"""
+
+    def __init__(self, host: str, address: str, **kwargs):
+        super().__init__(host, **kwargs)
+        self.address = address
+
+    def connect(self):
+        sock = socket.create_connection((self.address, self.port), self.timeout)
+        self.sock = self._context.wrap_socket(sock, server_hostname=self.host)
+
+class WebhookDispatcher:
+    """
+    Persistent retrying webhook delivery queue
+    """
+
+    def __init__(self, queue_dir: str, secret: str, timeout: float = WEBHOOK_TIMEOUT,
+                 max_attempts: int = WEBHOOK_MAX_ATTEMPTS, backoff_base: float = WEBHOOK_BACKOFF_BASE,
+                 backoff_max: float = WEBHOOK_BACKOFF_MAX,
+                 allow_private_hosts: bool = WEBHOOK_ALLOW_PRIVATE_HOSTS):
+        self.queue_dir = queue_dir
+        self.secret = secret
+        self.allow_private_hosts = allow_private_hosts
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        os.makedirs(queue_dir, exist_ok=True)
+
+    def _delivery_path(self, delivery_id: str) -> str:
+        return os.path.join(self.queue_dir, f"{delivery_id}.json")
+
+    def _save(self, delivery: Dict):
+        """Atomically persist a delivery"""
+        fd, temp_path = tempfile.mkstemp(dir=self.queue_dir, suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(delivery, f, ensure_ascii=False)
+        os.replace(temp_path, self._delivery_path(delivery["id"]))
+
+    def enqueue(self, task_id: str, url: str, payload: Dict) -> str:
+        """
+        Persist a delivery and wake the sender
+        """
+        delivery = {
+            "id": str(uuid.uuid4()),
+            "task_id": task_id,
+            "url": url,
+            "payload": payload,
+            "attempts": 0,
+            "next_attempt_at": time.time(),
+            "last_error": None
+        }
+        self._save(delivery)
+        self.start()
+        self._wakeup.set()
+        return delivery["id"]
+
+    def pending(self) -> list:
+        """List pending deliveries ordered by next attempt time"""
+        deliveries = []
+        for filename in os.listdir(self.queue_dir):
+            if filename.endswith('.json'):
+                try:
+                    with open(os.path.join(self.queue_dir, filename), 'r', encoding='utf-8') as f:
+                        deliveries.append(json.load(f))
+                except (OSError, json.JSONDecodeError):
+                    continue
+        return sorted(deliveries, key=lambda delivery: delivery["next_attempt_at"])
+
+    def _connect(self, url: str) -> http.client.HTTPConnection:
+        """
+        Open a connection to the resolved address of a callback URL
+        Raises if the host resolves to a private address and those are not allowed
+        """
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            raise ValueError(f"Invalid callback URL {url}")
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        addresses = resolve_host_addresses(parsed.hostname, port)
+        if not self.allow_private_hosts and not all(is_public_address(address) for address in addresses):
+            raise ValueError(f"Callback host {parsed.hostname} resolves to a private address")
+
+        connection_class = _PinnedHTTPSConnection if parsed.scheme == "https" else _PinnedHTTPConnection
+        return connection_class(parsed.hostname, addresses[0], port=port, timeout=self.timeout)
+
+    def send(self, delivery: Dict):
+        """
+        POST a delivery once, raising on network errors or non-2xx responses
+        Redirects are not followed and count as failed attempts.
+        The X-Webhook-Signature header is only sent when a secret is set
+        """
+        body = json.dumps(delivery["payload"], ensure_ascii=False).encode('utf-8')
+        timestamp = str(int(time.time()))
+        headers = {
+            "Content-Type": "application/json",
+            "User-Agent": "vosk-stt-api-webhook",
+            "X-Webhook-Id": delivery["id"],
+            "X-Webhook-Timestamp": timestamp
+        }
+        if self.secret:
+            headers["X-Webhook-Signature"] = sign_payload(self.secret, timestamp, body)
+        parsed = urlparse(delivery["url"])
+        path = parsed.path or "/"
+        if parsed.query:
+            path += f"?{parsed.query}"
+
+        connection = self._connect(delivery["url"])
+        try:
+            connection.request("POST", path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+        finally:
+            connection.close()
+        if not 200 <= response.status < 300:
+            raise Exception(f"Webhook returned HTTP {response.status}")
+
+    def _attempt(self, delivery: Dict):
+        """Try one delivery, then delete it or schedule a retry"""
+        try:
+            self.send(delivery)
+        except Exception as e:
+            delivery["attempts"] += 1
+            delivery["last_error"] = str(e)
+            if delivery["attempts"] >= self.max_attempts:
+                # Keep exhausted deliveries for inspection
+                os.replace(self._delivery_path(delivery["id"]),
+                           os.path.join(self.queue_dir, f"{delivery['id']}.failed"))
+                return
+            delay = min(self.backoff_base * (2 ** (delivery["attempts"] - 1)), self.backoff_max)
+            delivery["next_attempt_at"] = time.time() + delay
+            self._save(delivery)
+            return
+        try:
+            os.remove(self._delivery_path(delivery["id"]))
+        except OSError:
+            pass
+
+    def _run(self):
+        """
+        Deliver due webhooks until stopped
+        Queue I/O errors are logged and retried after backoff_base so one bad
+        file or a full disk does not stop the sender thread
+        """
+        while not self._stopped.is_set():
+            self._wakeup.clear()
+            now = time.time()
+            due = []
+            wait_time = 60.0
+            try:
+                for delivery in self.pending():
+                    if delivery["next_attempt_at"] > now:
+                        wait_time = delivery["next_attempt_at"] - now
+                        break
+                    due.append(delivery)
+            except Exception:
+                logger.exception("Failed to scan webhook queue %s", self.queue_dir)
+                self._wakeup.wait(timeout=self.backoff_base)
+                continue
+
+            errors = False
+            for delivery in due:
+                if self._stopped.is_set():
+                    return
+                try:
+                    self._attempt(delivery)
+                except Exception:
+                    logger.exception("Failed to update webhook delivery %s", delivery.get("id"))
+                    errors = True
+
+            # Rescan right away after attempts so retries are scheduled,
+            # but back off when the queue could not be updated
+            if errors:
+                self._wakeup.wait(timeout=self.backoff_base)
+            elif not due:
+                self._wakeup.wait(timeout=wait_time)
+
+    def start(self):
+        """Start the sender thread if not running"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._run, name="webhook-dispatcher", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """Stop the sender thread"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+_dispatcher: Optional[WebhookDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+def get_webhook_dispatcher() -> WebhookDispatcher:
+    """
+    Get the process-wide webhook dispatcher
+    """
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            if not WEBHOOK_SECRET:
+                logger.warning("WEBHOOK_SECRET is not set: webhook deliveries are sent without a signature")
+            _dispatcher = WebhookDispatcher(WEBHOOK_QUEUE_DIR, WEBHOOK_SECRET)
+        return _dispatcher
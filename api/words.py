@@ -0,0 +1,305 @@
+"""
+Compact columnar storage of word-level transcription results
+
+Words are held as parallel arrays (start/end in milliseconds, confidence,
+index into an interned word table) instead of one dict per word, and are
+persisted as a zlib-compressed binary file next to the other outputs.
+Vosk-style JSON segments are only rebuilt when a client asks for them.
+
+Words are in recognition order, so their start and end times are sorted
+and time-range queries are binary searches over the arrays.
+"""
+import os
+import sys
+import json
+import bisect
+import struct
+import tempfile
+import threading
+import zlib
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+from .config import OUTPUT_DIR, WORD_TABLE_CACHE_SIZE
+
+WORDS_SUFFIX = ".words"
+WORDS_MAGIC = b"VWT1"
+
+# 32-bit unsigned typecode ('I' is 4 bytes on all common platforms)
+_UINT32 = 'I' if array('I').itemsize == 4 else 'L'
+
+class WordTable:
+    """
+    Word-level results as parallel arrays with an interned word table
+
+    segment_ends[i] is the index one past the last word of recognizer
+    segment i, so segments can be rebuilt in their original grouping.
+    """
+
+    def __init__(self):
+        self.starts = array(_UINT32)
+        self.ends = array(_UINT32)
+        self.confs = array('f')
+        self.word_ids = array(_UINT32)
+        self.segment_ends = array(_UINT32)
+        self.vocabulary: List[str] = []
+        self._word_index: Dict[str, int] = {}
+        self._segment_index = None
+
+    @classmethod
+    def from_segments(cls, segments: List[Dict]) -> "WordTable":
+        """
+        Build a table from recognizer result segments
+        """
+        table = cls()
+        for segment in segments:
+            table.append_segment(segment.get("result") or [])
+        return table
+
+    def _intern(self, word: str) -> int:
+        word_id = self._word_index.get(word)
+        if word_id is None:
+            word_id = len(self.vocabulary)
+            self._word_index[word] = word_id
+            self.vocabulary.append(word)
+        return word_id
+
+    def append_segment(self, words: List[Dict]):
+        """
+        Append the words of one recognizer segment
+        """
+        for word in words:
+            start = word.get("start", 0)
+            self.starts.append(int(round(start * 1000)))
+            self.ends.append(int(round(word.get("end", start + 1) * 1000)))
+            self.confs.append(word.get("conf", 0.0))
+            self.word_ids.append(self._intern(word.get("word", "")))
+        self.segment_ends.append(len(self.word_ids))
+        self._segment_index = None
+
+    def __len__(self) -> int:
+        return len(self.word_ids)
+
+    def word(self, index: int) -> Dict:
+        """Get one word in Vosk result format"""
+        return {
+            "conf": round(self.confs[index], 6),
+            "end": self.ends[index] / 1000,
+            "start": self.starts[index] / 1000,
+            "word": self.vocabulary[self.word_ids[index]]
+        }
+
+    def iter_words(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Yield words start..stop in Vosk result format
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        for index in range(start, stop):
+            yield self.word(index)
+
+    def find_words(self, start: float = 0.0, end: Optional[float] = None) -> Tuple[int, int]:
+        """
+        Index range [first, stop) of the words overlapping start..end seconds
+        """
+        first = bisect.bisect_right(self.ends, int(round(start * 1000)))
+        stop = len(self) if end is None else bisect.bisect_left(self.starts, int(round(end * 1000)))
+        return first, max(first, stop)
+
+    def _get_segment_index(self) -> Tuple[array, array, array, array]:
+        """
+        (first word, stop word, start ms, end ms) arrays of the non-empty
+        segments, built on first use
+        """
+        if self._segment_index is None:
+            firsts, stops = array(_UINT32), array(_UINT32)
+            first = 0
+            for stop in self.segment_ends:
+                if stop > first:
+                    firsts.append(first)
+                    stops.append(stop)
+                first = stop
+            # Segment times, for binary search by time
+            starts = array(_UINT32, (self.starts[first] for first in firsts))
+            ends = array(_UINT32, (self.ends[stop - 1] for stop in stops))
+            self._segment_index = (firsts, stops, starts, ends)
+        return self._segment_index
+
+    def segment_count(self) -> int:
+        """Number of segments that contain words"""
+        return len(self._get_segment_index()[0])
+
+    def segment(self, index: int) -> Dict:
+        """
+        Get a non-empty segment as {"start", "end", "text", "confidence"}
+        """
+        firsts, stops, _, _ = self._get_segment_index()
+        first, stop = firsts[index], stops[index]
+        return {
+            "start": self.starts[first] / 1000,
+            "end": self.ends[stop - 1] / 1000,
+            "text": " ".join(self.vocabulary[self.word_ids[i]] for i in range(first, stop)),
+            "confidence": round(sum(self.confs[first:stop]) / (stop - first), 3)
+        }
+
+    def find_segments(self, start: float = 0.0, end: Optional[float] = None) -> Tuple[int, int]:
+        """
+        Index range [first, stop) of the non-empty segments overlapping start..end seconds
+        """
+        _, _, starts, ends = self._get_segment_index()
+        first = bisect.bisect_right(ends, int(round(start * 1000)))
+        stop = len(starts) if end is None else bisect.bisect_left(starts, int(round(end * 1000)))
+        return first, max(first, stop)
+
+    def to_segments(self) -> List[Dict]:
+        """
+        Rebuild the recognizer result segments as JSON-ready dicts
+        """
+        segments = []
+        first = 0
+        for last in self.segment_ends:
+            words = list(self.iter_words(first, last))
+            segments.append({"text": " ".join(word["word"] for word in words), "result": words})
+            first = last
+        return segments
+
+    def encode(self) -> bytes:
+        """
+        Serialize to a compressed binary blob
+        """
+        header = json.dumps({
+            "count": len(self),
+            "segments": len(self.segment_ends),
+            "vocabulary": self.vocabulary
+        }, ensure_ascii=False).encode('utf-8')
+
+        columns = [self.starts, self.ends, self.confs, self.word_ids, self.segment_ends]
+        if sys.byteorder == "big":
+            # Stored little-endian
+            columns = [array(column.typecode, column) for column in columns]
+            for column in columns:
+                column.byteswap()
+
+        payload = struct.pack("<I", len(header)) + header + b"".join(column.tobytes() for column in columns)
+        return WORDS_MAGIC + zlib.compress(payload, 6)
+
+    @classmethod
+    def decode(cls, data: bytes) -> "WordTable":
+        """
+        Deserialize a blob written by encode()
+        """
+        if data[:len(WORDS_MAGIC)] != WORDS_MAGIC:
+            raise ValueError("Not a word table")
+        payload = zlib.decompress(data[len(WORDS_MAGIC):])
+        header_size = struct.unpack_from("<I", payload)[0]
+        header = json.loads(payload[4:4 + header_size].decode('utf-8'))
+
+        table = cls()
+        table.vocabulary = header["vocabulary"]
+        table._word_index = {word: index for index, word in enumerate(table.vocabulary)}
+
+        offset = 4 + header_size
+        sizes = [header["count"]] * 4 + [header["segments"]]
+        columns = [table.starts, table.ends, table.confs, table.word_ids, table.segment_ends]
+        for column, size in zip(columns, sizes):
+            end = offset + size * column.itemsize
+            column.frombytes(payload[offset:end])
+            if sys.byteorder == "big":
+                column.byteswap()
+            offset = end
+        return table
+
+def get_words_path(task_id: str) -> str:
+    """Get path of the stored word table of a task"""
+    return os.path.join(OUTPUT_DIR, f"{task_id}{WORDS_SUFFIX}")
+
+def write_task_words(task_id: str, table: WordTable):
+    """
+    Atomically write the word table of a task
+    """
+    fd, temp_path = tempfile.mkstemp(dir=OUTPUT_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(table.encode())
+        os.replace(temp_path, get_words_path(task_id))
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def read_task_words(task_id: str) -> Optional[WordTable]:
+    """
+    Read the word table of a task, or None if it was not stored
+    """
+    try:
+        with open(get_words_path(task_id), 'rb') as f:
+            return WordTable.decode(f.read())
+    except (OSError, ValueError, zlib.error):
+        return None
+
+def delete_task_words(task_id: str):
+    """Remove the word table of a task"""
+    try:
+        os.remove(get_words_path(task_id))
+    except OSError:
+        pass
+
+class InvalidCursorError(Exception):
+    """Raised for pagination cursors that do not belong to the query"""
+    pass
+
+_table_cache: OrderedDict = OrderedDict()
+_table_cache_lock = threading.Lock()
+
+def get_task_words(task_id: str, result: Optional[Dict] = None) -> Optional[WordTable]:
+    """
+    Get the word table of a task through a small LRU cache of decoded tables
+    Tasks completed before word tables were stored are indexed from the
+    segments kept in their result
+    """
+    try:
+        stat = os.stat(get_words_path(task_id))
+    except OSError:
+        if result and result.get("segments") is not None:
+            return WordTable.from_segments(result["segments"])
+        return None
+
+    # Rewritten files are reloaded
+    version = (stat.st_mtime_ns, stat.st_size)
+    with _table_cache_lock:
+        cached = _table_cache.get(task_id)
+        if cached is not None and cached[0] == version:
+            _table_cache.move_to_end(task_id)
+            return cached[1]
+
+    table = read_task_words(task_id)
+    if table is None:
+        return None
+    with _table_cache_lock:
+        _table_cache[task_id] = (version, table)
+        _table_cache.move_to_end(task_id)
+        while len(_table_cache) > max(0, WORD_TABLE_CACHE_SIZE):
+            _table_cache.popitem(last=False)
+    return table
+
+def get_page(item_range: Tuple[int, int], cursor: Optional[str], limit: int, get_item) -> Dict:
+    """
+    Slice one page of items out of an index range
+    The cursor is the index of the next item, as returned in next_cursor
+    Raises InvalidCursorError for malformed or out of range cursors
+    """
+    first, stop = item_range
+    if cursor is not None:
+        try:
+            position = int(cursor)
+        except ValueError:
+            raise InvalidCursorError("Invalid cursor")
+        if position < first or position > stop:
+            raise InvalidCursorError("Cursor does not belong to this query")
+        first = position
+
+    page_stop = min(stop, first + limit)
+    return {
+        "items": [get_item(index) for index in range(first, page_stop)],
+        "total": item_range[1] - item_range[0],
+        "next_cursor": str(page_stop) if page_stop < stop else None
+    }
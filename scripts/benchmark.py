@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+STT 效能基準測試腳本
+產生不同長度與格式的合成音訊，量測轉檔、辨識與完整 API 往返的
+即時率 (RTF)、延遲百分位數、峰值記憶體與吞吐量，輸出 JSON 以便跨 commit 比較
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import wave
+import array
+import shutil
+import random
+import platform
+import resource
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# 合成音訊的原始取樣率與聲道數，讓轉檔路徑實際做重新取樣與降混
+SOURCE_SAMPLE_RATE = 44100
+SOURCE_CHANNELS = 2
+
+# ffmpeg 編碼參數
+ENCODERS = {
+    "mp3": {"acodec": "libmp3lame", "audio_bitrate": "128k"},
+    "mp4": {"acodec": "aac", "audio_bitrate": "128k"}
+}
+
+STAGES = ["conversion", "decode", "api"]
+
+class StubRecognizer:
+    """
+    離線使用的假辨識器，介面與 KaldiRecognizer 相同
+    每 5 秒音訊產生一段結果，每 0.5 秒一個字；cost 為每秒音訊模擬的辨識秒數
+    """
+
+    SEGMENT_SECONDS = 5.0
+    WORD_SECONDS = 0.5
+
+    def __init__(self, sample_rate: int, cost: float = 0.0):
+        self.bytes_per_second = sample_rate * 2
+        self.cost = cost
+        self.position = 0
+        self.segment_start = 0
+
+    def SetWords(self, enabled):
+        pass
+
+    def Reset(self):
+        self.position = 0
+        self.segment_start = 0
+
+    def AcceptWaveform(self, data) -> bool:
+        self.position += len(data)
+        if self.cost:
+            # sleep 會釋放 GIL，與原生辨識器的行為相近
+            time.sleep(len(data) / self.bytes_per_second * self.cost)
+        return (self.position - self.segment_start) / self.bytes_per_second >= self.SEGMENT_SECONDS
+
+    def _segment(self) -> str:
+        start = self.segment_start / self.bytes_per_second
+        end = self.position / self.bytes_per_second
+        self.segment_start = self.position
+        words = []
+        t = start
+        while t + self.WORD_SECONDS <= end:
+            words.append({"word": "word", "start": round(t, 2), "end": round(t + self.WORD_SECONDS, 2), "conf": 0.9})
+            t += self.WORD_SECONDS
+        return json.dumps({"text": " ".join(w["word"] for w in words), "result": words})
+
+    def Result(self) -> str:
+        return self._segment()
+
+    def FinalResult(self) -> str:
+        return self._segment()
+
+def percentile(values: list, pct: float) -> float:
+    """
+    計算百分位數 (線性內插)
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100.0
+    lower = math.floor(k)
+    upper = math.ceil(k)
+    if lower == upper:
+        return ordered[int(k)]
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+def get_peak_rss_mb() -> float:
+    """
+    取得本程序與已結束子程序 (ffmpeg) 的峰值常駐記憶體 (MB)
+    """
+    # Linux 上 ru_maxrss 單位為 KB，macOS 為 bytes
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(max(own, children) / scale, 1)
+
+def get_git_commit() -> str:
+    """
+    取得目前 commit，方便比較不同版本的結果
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def generate_wav(path: str, duration: float, seed: int = 0):
+    """
+    產生類似語音的合成 WAV：音調起伏的短音節與靜音交替，加上少量雜訊
+    以一秒為單位重複，長音訊也能快速產生
+    """
+    rng = random.Random(seed)
+    samples = array.array('h')
+    for i in range(SOURCE_SAMPLE_RATE):
+        t = i / SOURCE_SAMPLE_RATE
+        # 0.4 秒音節 + 0.1 秒靜音
+        voiced = (t % 0.5) < 0.4
+        freq = 180 + 120 * math.sin(2 * math.pi * 1.5 * t)
+        value = 8000 * math.sin(2 * math.pi * freq * t) if voiced else 0
+        value += rng.uniform(-300, 300)
+        sample = int(max(-32768, min(32767, value)))
+        samples.extend([sample] * SOURCE_CHANNELS)
+    second = samples.tobytes()
+
+    whole_seconds = int(duration)
+    remainder = int((duration - whole_seconds) * SOURCE_SAMPLE_RATE) * 2 * SOURCE_CHANNELS
+    with wave.open(path, 'wb') as wf:
+        wf.setnchannels(SOURCE_CHANNELS)
+        wf.setsampwidth(2)
+        wf.setframerate(SOURCE_SAMPLE_RATE)
+        for _ in range(whole_seconds):
+            wf.writeframes(second)
+        wf.writeframes(second[:remainder])
+
+def generate_audio(work_dir: str, duration: float, audio_format: str) -> str:
+    """
+    產生指定長度與格式的測試檔；mp3/mp4 需要 ffmpeg
+    """
+    wav_path = os.path.join(work_dir, f"bench_{duration:g}s.wav")
+    if not os.path.exists(wav_path):
+        generate_wav(wav_path, duration)
+    if audio_format == "wav":
+        return wav_path
+
+    import ffmpeg
+    path = os.path.join(work_dir, f"bench_{duration:g}s.{audio_format}")
+    if not os.path.exists(path):
+        (
+            ffmpeg
+            .input(wav_path)
+            .output(path, **ENCODERS[audio_format])
+            .global_args('-nostdin', '-loglevel', 'error')
+            .overwrite_output()
+            .run()
+        )
+    return path
+
+def configure_environment(work_dir: str, args):
+    """
+    在匯入 api 模組前設定環境變數，所有資料寫入暫存目錄
+    """
+    for name in ("input", "output", "tasks", "cache", "webhooks", "batches"):
+        os.makedirs(os.path.join(work_dir, name), exist_ok=True)
+    os.environ.update({
+        "API_KEY": os.environ.get("API_KEY") or "benchmark-key",
+        "INPUT_DIR": os.path.join(work_dir, "input"),
+        "OUTPUT_DIR": os.path.join(work_dir, "output"),
+        "TASKS_DIR": os.path.join(work_dir, "tasks"),
+        "RESULT_CACHE_DIR": os.path.join(work_dir, "cache"),
+        "WEBHOOK_QUEUE_DIR": os.path.join(work_dir, "webhooks"),
+        "BATCHES_DIR": os.path.join(work_dir, "batches"),
+        # 相同檔案重複提交時不可命中結果快取，也不可被限流
+        "RESULT_CACHE_ENABLED": "false",
+        "RATE_LIMIT_REQUESTS": "1000000",
+        "MAX_QUEUE_SIZE": str(max(100, args.iterations * max(args.concurrency))),
+        "PROGRESS_UPDATE_INTERVAL": "3600"
+    })
+    if args.workers:
+        os.environ["WORKER_COUNT"] = str(args.workers)
+    if args.stub:
+        # 假辨識器只存在於本程序
+        os.environ["DECODE_BACKEND"] = "thread"
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+def install_stub_recognizer(cost: float):
+    """
+    以假辨識器取代 Vosk 模型與辨識器
+    """
+    import api.stt
+
+    # 共用同一個假模型，辨識器池才能重複使用辨識器
+    stub_model = object()
+    api.stt.get_model = lambda language, model_size: stub_model
+    api.stt.create_recognizer = lambda model, sample_rate=16000: StubRecognizer(sample_rate, cost)
+
+def run_conversion(path: str, args):
+    """轉檔階段：解碼為 16kHz 單聲道 PCM"""
+    from api.stt import is_streaming_decode_available, stream_pcm_with_ffmpeg, convert_to_wav_sync
+    from api.utils import cleanup_temp_files
+
+    if is_streaming_decode_available():
+        for _ in stream_pcm_with_ffmpeg(path):
+            pass
+        return
+    # 轉出的 WAV 放在副本旁邊，避免並行時互相覆寫
+    copy_path = os.path.join(os.path.dirname(path), f"conv_{os.getpid()}_{time.monotonic_ns()}{Path(path).suffix}")
+    shutil.copyfile(path, copy_path)
+    try:
+        wav_path = convert_to_wav_sync(copy_path)
+        cleanup_temp_files([wav_path])
+    finally:
+        cleanup_temp_files([copy_path])
+
+def run_decode(path: str, args):
+    """辨識階段：轉檔加辨識，不經過 API"""
+    from api.stt import run_transcription
+    run_transcription(path, args.language, args.model_size)
+
+def run_api(path: str, args, client=None):
+    """API 往返：上傳、排隊、處理，直到任務完成"""
+    headers = {"x-api-key": os.environ["API_KEY"]}
+    with open(path, 'rb') as f:
+        response = client.post(
+            "/transcribe", headers=headers,
+            files={"file": (os.path.basename(path), f, "application/octet-stream")},
+            data={"language": args.language, "model_size": args.model_size}
+        )
+    if response.status_code != 200:
+        raise Exception(f"Upload failed: HTTP {response.status_code} {response.text}")
+    task_id = response.json()["data"]["task_id"]
+
+    while True:
+        response = client.get(f"/tasks/{task_id}", headers=headers, params={"wait": 30})
+        data = response.json().get("data") or {}
+        if data.get("status") == "done":
+            return
+        if data.get("status") == "failed":
+            raise Exception(f"Task failed: {data.get('error')}")
+
+def run_scenario(stage: str, path: str, duration: float, concurrency: int, args, client=None) -> dict:
+    """
+    以指定並行數執行一個情境並彙整統計
+    """
+    runner = {"conversion": run_conversion, "decode": run_decode, "api": run_api}[stage]
+    latencies = []
+    errors = []
+
+    def job():
+        started = time.monotonic()
+        try:
+            if stage == "api":
+                runner(path, args, client)
+            else:
+                runner(path, args)
+            latencies.append(time.monotonic() - started)
+        except Exception as e:
+            errors.append(str(e))
+
+    # 暖身一次，排除模型載入等一次性成本
+    if args.warmup:
+        job()
+        latencies.clear()
+        errors.clear()
+
+    wall_started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(args.iterations):
+            executor.submit(job)
+    wall_seconds = time.monotonic() - wall_started
+
+    rtfs = [latency / duration for latency in latencies]
+    return {
+        "stage": stage,
+        "format": Path(path).suffix.lstrip("."),
+        "audio_seconds": duration,
+        "concurrency": concurrency,
+        "runs": len(latencies),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "latency_mean": round(sum(latencies) / len(latencies), 4) if latencies else None,
+        "latency_p50": _round(percentile(latencies, 50)),
+        "latency_p95": _round(percentile(latencies, 95)),
+        "latency_p99": _round(percentile(latencies, 99)),
+        "rtf_mean": round(sum(rtfs) / len(rtfs), 4) if rtfs else None,
+        "rtf_p50": _round(percentile(rtfs, 50)),
+        "throughput_jobs_per_second": round(len(latencies) / wall_seconds, 4) if wall_seconds else None,
+        "throughput_audio_seconds_per_second": round(len(latencies) * duration / wall_seconds, 2) if wall_seconds else None,
+        # 峰值為程序累計值，只會隨情境增加
+        "peak_rss_mb": get_peak_rss_mb(),
+        "wall_seconds": round(wall_seconds, 3)
+    }
+
+def _round(value):
+    return round(value, 4) if value is not None else None
+
+def parse_list(value: str, cast=str) -> list:
+    return [cast(item.strip()) for item in value.split(",") if item.strip()]
+
+def main():
+    """
+    主函數
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="量測 STT 轉檔、辨識與 API 的效能")
+    parser.add_argument("--durations", default="5,30,120", help="音訊長度 (秒)，以逗號分隔")
+    parser.add_argument("--formats", default="wav,mp3,mp4", help="音訊格式，以逗號分隔")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"量測階段: {', '.join(STAGES)}")
+    parser.add_argument("--concurrency", default="1,4", help="並行數，以逗號分隔")
+    parser.add_argument("--iterations", type=int, default=8, help="每個情境的執行次數")
+    parser.add_argument("--language", "-l", default="en", help="模型語言")
+    parser.add_argument("--model-size", "-s", default="small", help="模型大小")
+    parser.add_argument("--stub", action="store_true", help="使用假辨識器，不需要模型即可離線執行")
+    parser.add_argument("--stub-cost", type=float, default=0.0, help="假辨識器每秒音訊模擬的辨識秒數")
+    parser.add_argument("--workers", type=int, help="API 背景工作執行緒數 (WORKER_COUNT)")
+    parser.add_argument("--no-warmup", dest="warmup", action="store_false", help="不執行暖身")
+    parser.add_argument("--work-dir", help="暫存目錄 (預設自動建立並在結束時刪除)")
+    parser.add_argument("--output", "-o", help="結果 JSON 輸出路徑 (預設輸出到 stdout)")
+    args = parser.parse_args()
+
+    args.concurrency = parse_list(args.concurrency, int)
+    durations = parse_list(args.durations, float)
+    formats = parse_list(args.formats)
+    stages = parse_list(args.stages)
+    for stage in stages:
+        if stage not in STAGES:
+            parser.error(f"不支援的階段: {stage}")
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="stt-bench-")
+    os.makedirs(work_dir, exist_ok=True)
+    configure_environment(work_dir, args)
+
+    if args.stub:
+        install_stub_recognizer(args.stub_cost)
+    else:
+        from api.model_cache import get_model_path
+        model_path = get_model_path(args.language, args.model_size)
+        if not os.path.exists(model_path):
+            print(f"找不到模型: {model_path}，請先下載模型或使用 --stub", file=sys.stderr)
+            sys.exit(1)
+
+    has_ffmpeg = shutil.which("ffmpeg") is not None
+    results = []
+    skipped = []
+    client_context = None
+
+    try:
+        client = None
+        if "api" in stages:
+            from starlette.testclient import TestClient
+            from api.main import app
+            client_context = TestClient(app)
+            client = client_context.__enter__()
+
+        for duration in durations:
+            for audio_format in formats:
+                if audio_format != "wav" and not has_ffmpeg:
+                    skipped.append({"format": audio_format, "audio_seconds": duration, "reason": "ffmpeg not found"})
+                    continue
+                path = generate_audio(work_dir, duration, audio_format)
+                for stage in stages:
+                    for concurrency in args.concurrency:
+                        print(f"執行中: {stage} {audio_format} {duration:g}s x{concurrency}", file=sys.stderr)
+                        results.append(run_scenario(stage, path, duration, concurrency, args, client))
+    finally:
+        if client_context is not None:
+            client_context.__exit__(None, None, None)
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "commit": get_git_commit(),
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "recognizer": "stub" if args.stub else f"vosk {args.language}/{args.model_size}",
+            "stub_cost": args.stub_cost if args.stub else None,
+            "iterations": args.iterations,
+            "ffmpeg": has_ffmpeg
+        },
+        "results": results,
+        "skipped": skipped
+    }
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+        print(f"結果已寫入 {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ API tests for Vosk STT service
 """
 import pytest
 import os
+import json
 import tempfile
 
 # Set API key BEFORE importing any app modules
@@ -23,6 +24,19 @@ def get_bearer_headers():
     """Get headers with Bearer token"""
     return {"Authorization": f"Bearer {TEST_API_KEY}"}
 
+def cleanup_completed_task(task_id):
+    """Remove a completed task and its output files"""
+    from api.task_store import get_task_store
+    from api.artifacts import delete_task_artifacts
+    from api.config import OUTPUT_DIR
+    
+    get_task_store().delete(task_id)
+    delete_task_artifacts(task_id)
+    for extension in (".txt", ".json", ".words"):
+        path = os.path.join(OUTPUT_DIR, task_id + extension)
+        if os.path.exists(path):
+            os.remove(path)
+
 def test_health_check():
     """Test health check endpoint"""
     response = client.get("/health")
@@ -165,4 +179,545 @@ def test_get_task_with_output_format():
         "/tasks/non-existent-id?output_format=invalid", 
         headers=get_test_headers()
     )
-    assert response.status_code == 422  # Validation error
\ No newline at end of file
+    assert response.status_code == 422  # Validation error
+
+def test_transcribe_rejects_oversized_body(monkeypatch):
+    """Test uploads over the limit get 413 before the form is parsed"""
+    import api.main
+    monkeypatch.setitem(api.main.UPLOAD_REQUEST_LIMITS, "/transcribe", 1000)
+    app.state.limiter.reset()
+    
+    files = {"file": ("large.wav", b"\x00" * 5000, "audio/wav")}
+    response = client.post("/transcribe", files=files, data={"language": "en"}, headers=get_test_headers())
+    assert response.status_code == 413
+    assert "File size exceeds" in response.json()["error"]
+    
+    # Bodies sent without Content-Length are cut off as they arrive
+    def chunks():
+        for _ in range(10):
+            yield b"x" * 500
+    
+    headers = dict(get_test_headers(), **{"Content-Type": "multipart/form-data; boundary=limit"})
+    response = client.post("/transcribe", content=chunks(), headers=headers)
+    assert response.status_code == 413
+
+def test_transcribe_queue_full(monkeypatch):
+    """Test transcribe returns 503 with Retry-After when the queue is full"""
+    from api.scheduler import get_scheduler
+    app.state.limiter.reset()
+    monkeypatch.setattr(get_scheduler(), "is_full", lambda: True)
+    
+    response = client.post(
+        "/transcribe",
+        headers=get_test_headers(),
+        files={"file": ("test.wav", b"fake wav content", "audio/wav")},
+        data={"language": "en", "model_size": "small"}
+    )
+    
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+    data = response.json()
+    assert data["status"] == "failed"
+    assert "queue is full" in data["error"]
+
+class FakeStreamRecognizer:
+    """Recognizer stand-in finalizing every second chunk"""
+    
+    def __init__(self):
+        self.chunks = 0
+    
+    def AcceptWaveform(self, data):
+        self.chunks += 1
+        return self.chunks % 2 == 0
+    
+    def Result(self):
+        return json.dumps({"text": f"chunk {self.chunks}"})
+    
+    def PartialResult(self):
+        return json.dumps({"partial": f"chunk {self.chunks}"})
+    
+    def FinalResult(self):
+        return json.dumps({"text": "final"})
+
+def test_stream_requires_api_key():
+    """Test streaming endpoint rejects connections without API key"""
+    with client.websocket_connect("/stream?language=en") as websocket:
+        data = websocket.receive_json()
+        assert data["status"] == "failed"
+        assert "API key" in data["error"]
+
+def test_stream_invalid_language():
+    """Test streaming endpoint rejects unsupported language"""
+    with client.websocket_connect(f"/stream?language=xx&api_key={TEST_API_KEY}") as websocket:
+        data = websocket.receive_json()
+        assert "Unsupported language" in data["error"]
+
+def test_stream_partial_and_final_results(monkeypatch):
+    """Test streaming returns partial, final and end-of-stream results"""
+    import api.main
+    monkeypatch.setattr(api.main, "get_model", lambda language, model_size: object())
+    monkeypatch.setattr(api.main, "create_recognizer", lambda model, sample_rate: FakeStreamRecognizer())
+    
+    with client.websocket_connect("/stream?language=en", headers=get_test_headers()) as websocket:
+        websocket.send_bytes(b"\x00" * 3200)
+        assert websocket.receive_json() == {"partial": "chunk 1"}
+        websocket.send_bytes(b"\x00" * 3200)
+        assert websocket.receive_json() == {"text": "chunk 2"}
+        websocket.send_text('{"eof" : 1}')
+        assert websocket.receive_json() == {"text": "final"}
+
+def test_transcribe_cached_result(monkeypatch, tmp_path):
+    """Test identical uploads complete instantly from the result cache"""
+    import hashlib
+    import api.main
+    import api.stt
+    from api.result_cache import ResultCache
+    
+    content = b"cached wav content"
+    cache = ResultCache(str(tmp_path), 10000)
+    cache.put(hashlib.sha256(content).hexdigest(), "en", "small",
+              {"text": "cached text", "confidence": 0.9, "segments": [], "vtt_segments": []})
+    monkeypatch.setattr(cache, "put", lambda *args: pytest.fail("cache hit stored again"))
+    monkeypatch.setattr(api.main, "get_result_cache", lambda: cache)
+    monkeypatch.setattr(api.stt, "get_result_cache", lambda: cache)
+    app.state.limiter.reset()
+    
+    response = client.post(
+        "/transcribe",
+        headers=get_test_headers(),
+        files={"file": ("test.wav", content, "audio/wav")},
+        data={"language": "en", "model_size": "small"}
+    )
+    
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["status"] == "done"
+    
+    task = client.get(f"/tasks/{data['task_id']}", headers=get_test_headers()).json()
+    assert task["data"]["result"]["text"] == "cached text"
+    
+    stats = client.get("/cache/stats", headers=get_test_headers()).json()
+    assert stats["data"]["hits"] == 1
+    
+    # Clean up
+    cleanup_completed_task(data["task_id"])
+
+def test_transcribe_audio_track_has_own_cache_entry(monkeypatch, tmp_path):
+    """Test a different audio track of cached content is queued, not served from cache"""
+    import hashlib
+    import api.main
+    import api.tasks
+    from api.result_cache import ResultCache
+    from api.task_store import get_task_store
+    
+    content = b"cached video content"
+    cache = ResultCache(str(tmp_path), 10000)
+    cache.put(hashlib.sha256(content).hexdigest(), "en", "small",
+              {"text": "track 0", "confidence": 0.9, "segments": [], "vtt_segments": []})
+    monkeypatch.setattr(api.main, "get_result_cache", lambda: cache)
+    monkeypatch.setattr(api.tasks, "BACKGROUND_TASK_ENABLED", False)
+    app.state.limiter.reset()
+    
+    response = client.post(
+        "/transcribe",
+        headers=get_test_headers(),
+        files={"file": ("test.mp4", content, "video/mp4")},
+        data={"language": "en", "model_size": "small", "audio_track": "1"}
+    )
+    
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["status"] == "queued"
+    task_data = get_task_store().get(data["task_id"])
+    assert task_data["audio_track"] == 1
+    assert task_data["content_hash"] != hashlib.sha256(content).hexdigest()
+    os.remove(task_data["input_file"])
+    
+    # Negative track indexes are rejected
+    response = client.post(
+        "/transcribe",
+        headers=get_test_headers(),
+        files={"file": ("test.mp4", content, "video/mp4")},
+        data={"language": "en", "model_size": "small", "audio_track": "-1"}
+    )
+    assert response.status_code == 422
+    
+    # Clean up
+    cleanup_completed_task(data["task_id"])
+
+def test_get_task_artifacts_with_etag():
+    """Test completed tasks are served from artifacts with conditional requests"""
+    from api.tasks import create_task
+    from api.stt import complete_task
+    
+    task_id = "test-task-artifacts"
+    create_task(task_id, "/test/input.wav", "en", "small")
+    complete_task(task_id, {
+        "text": "hello world",
+        "confidence": 0.8,
+        "segments": [],
+        "vtt_segments": [{"start": 0.0, "end": 1.2, "text": "hello world"}]
+    })
+    app.state.limiter.reset()
+    
+    try:
+        response = client.get(f"/tasks/{task_id}?output_format=srt", headers=get_test_headers())
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert data["status"] == "done"
+        assert data["result"]["subtitle"] == "1\n00:00:00,000 --> 00:00:01,200\nhello world\n"
+        etag = response.headers["ETag"]
+        assert response.headers["Last-Modified"]
+        
+        headers = dict(get_test_headers(), **{"If-None-Match": etag})
+        response = client.get(f"/tasks/{task_id}?output_format=srt", headers=headers)
+        assert response.status_code == 304
+        
+        response = client.get(f"/tasks/{task_id}", headers=get_test_headers())
+        assert response.json()["data"]["result"] == {"text": "hello world", "confidence": 0.8}
+        
+        # Artifacts left behind are not served once the task is deleted
+        from api.task_store import get_task_store
+        get_task_store().delete(task_id)
+        app.state.limiter.reset()
+        response = client.get(f"/tasks/{task_id}?output_format=srt", headers=get_test_headers())
+        assert response.status_code == 404
+    finally:
+        cleanup_completed_task(task_id)
+
+def test_get_task_words_and_segments_pages():
+    """Test transcripts are queried by time range and paged with cursors"""
+    from api.tasks import create_task
+    from api.stt import complete_task
+    
+    task_id = "test-task-words"
+    create_task(task_id, "/test/input.wav", "en", "small")
+    segments = [
+        {"text": f"w{i} x{i}", "result": [
+            {"conf": 1.0, "start": i * 2.0, "end": i * 2.0 + 0.5, "word": f"w{i}"},
+            {"conf": 1.0, "start": i * 2.0 + 1.0, "end": i * 2.0 + 1.5, "word": f"x{i}"}
+        ]}
+        for i in range(10)
+    ]
+    
+    try:
+        app.state.limiter.reset()
+        response = client.get(f"/tasks/{task_id}/words", headers=get_test_headers())
+        assert response.status_code == 409
+        
+        complete_task(task_id, {"text": "", "confidence": 1.0, "segments": segments, "vtt_segments": []})
+        
+        response = client.get(f"/tasks/{task_id}/words?start=3&end=8&limit=4", headers=get_test_headers())
+        data = response.json()["data"]
+        assert data["total"] == 5
+        assert [word["word"] for word in data["words"]] == ["x1", "w2", "x2", "w3"]
+        
+        response = client.get(f"/tasks/{task_id}/words?start=3&end=8&limit=4&cursor={data['next_cursor']}",
+                              headers=get_test_headers())
+        data = response.json()["data"]
+        assert [word["word"] for word in data["words"]] == ["x3"]
+        assert data["next_cursor"] is None
+        
+        app.state.limiter.reset()
+        response = client.get(f"/tasks/{task_id}/segments?start=17.6", headers=get_test_headers())
+        data = response.json()["data"]
+        assert data["segments"] == [{"start": 18.0, "end": 19.5, "text": "w9 x9", "confidence": 1.0}]
+        
+        response = client.get(f"/tasks/{task_id}/segments?start=5&end=1", headers=get_test_headers())
+        assert response.status_code == 400
+        response = client.get(f"/tasks/{task_id}/segments?cursor=bad", headers=get_test_headers())
+        assert response.status_code == 400
+    finally:
+        cleanup_completed_task(task_id)
+
+def complete_task_later(task_id, delay=0.3):
+    """Mark a task done from another thread after a delay"""
+    import threading
+    import time
+    from api.tasks import update_task_status
+    
+    def complete():
+        time.sleep(delay)
+        update_task_status(task_id, "processing")
+        update_task_status(task_id, "done", result={"text": "late result", "confidence": 0.5})
+    
+    thread = threading.Thread(target=complete)
+    thread.start()
+    return thread
+
+def test_get_task_long_poll():
+    """Test wait holds the request until the task completes"""
+    import time
+    from api.tasks import create_task
+    
+    task_id = "test-task-long-poll"
+    create_task(task_id, "/test/input.wav", "en", "small")
+    app.state.limiter.reset()
+    
+    try:
+        thread = complete_task_later(task_id)
+        started = time.time()
+        response = client.get(f"/tasks/{task_id}?wait=10", headers=get_test_headers())
+        thread.join()
+        
+        assert time.time() - started < 5
+        data = response.json()["data"]
+        assert data["status"] == "done"
+        assert data["result"]["text"] == "late result"
+    finally:
+        cleanup_completed_task(task_id)
+
+def test_get_task_events_stream():
+    """Test SSE stream delivers status changes and the final result"""
+    from api.tasks import create_task
+    
+    task_id = "test-task-events"
+    create_task(task_id, "/test/input.wav", "en", "small")
+    app.state.limiter.reset()
+    
+    try:
+        thread = complete_task_later(task_id)
+        events = []
+        with client.stream("GET", f"/tasks/{task_id}/events", headers=get_test_headers()) as response:
+            assert response.headers["content-type"].startswith("text/event-stream")
+            for line in response.iter_lines():
+                if line.startswith("event: "):
+                    events.append(line[len("event: "):])
+                elif line.startswith("data: ") and events[-1] == "result":
+                    final = json.loads(line[len("data: "):])
+        thread.join()
+        
+        assert events == ["status", "status", "result"]
+        assert final["status"] == "done"
+        assert final["result"]["text"] == "late result"
+    finally:
+        cleanup_completed_task(task_id)
+
+def test_metrics_endpoint():
+    """Test Prometheus metrics exposition"""
+    response = client.get("/metrics")
+    assert response.status_code == 401
+    
+    response = client.get("/metrics", headers=get_bearer_headers())
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE stt_decode_seconds histogram" in response.text
+    assert "stt_queue_depth " in response.text
+    assert "stt_model_cache_resident_bytes " in response.text
+
+def test_batch_transcription(monkeypatch):
+    """Test batch upload of files and an archive with aggregate status"""
+    import io
+    import zipfile
+    import api.tasks
+    from api.batches import delete_batch
+    
+    # Keep children queued instead of decoding them
+    monkeypatch.setattr(api.tasks, "BACKGROUND_TASK_ENABLED", False)
+    monkeypatch.setattr("api.main.RESULT_CACHE_ENABLED", False)
+    app.state.limiter.reset()
+    
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("inner/b.wav", b"batch wav b")
+        zf.writestr("readme.txt", b"ignored")
+    
+    response = client.post(
+        "/batch",
+        headers=get_test_headers(),
+        files=[
+            ("files", ("a.wav", b"batch wav a", "audio/wav")),
+            ("files", ("more.zip", archive.getvalue(), "application/zip"))
+        ],
+        data={"language": "en", "model_size": "small"}
+    )
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["total"] == 2
+    assert [task["filename"] for task in data["tasks"]] == ["a.wav", "b.wav"]
+    
+    try:
+        status = client.get(f"/batches/{data['batch_id']}", headers=get_test_headers()).json()["data"]
+        assert status["status"] == "queued"
+        assert status["counts"]["queued"] == 2
+        
+        results = client.get(f"/batches/{data['batch_id']}/results", headers=get_test_headers())
+        assert results.status_code == 200
+        assert "attachment" in results.headers["content-disposition"]
+        assert [item["filename"] for item in results.json()["results"]] == ["a.wav", "b.wav"]
+        
+        app.state.limiter.reset()
+        missing = client.get("/batches/unknown-batch", headers=get_test_headers())
+        assert missing.status_code == 404
+    finally:
+        from api.task_store import get_task_store
+        for task in data["tasks"]:
+            task_data = get_task_store().get(task["task_id"])
+            if task_data and os.path.exists(task_data["input_file"]):
+                os.remove(task_data["input_file"])
+            get_task_store().delete(task["task_id"])
+        delete_batch(data["batch_id"])
+
+def test_batch_rejects_invalid_file():
+    """Test batch upload validates every file"""
+    app.state.limiter.reset()
+    response = client.post(
+        "/batch",
+        headers=get_test_headers(),
+        files=[
+            ("files", ("a.wav", b"ok", "audio/wav")),
+            ("files", ("bad.txt", b"no", "text/plain"))
+        ],
+        data={"language": "en", "model_size": "small"}
+    )
+    assert response.status_code == 400
+    assert "bad.txt" in response.json()["error"]
+
+def test_batch_queue_full_rejected_before_saving(monkeypatch):
+    """Test a batch the queue cannot take is rejected before files are written"""
+    import io
+    import zipfile
+    import api.main
+    from api.scheduler import get_scheduler
+    monkeypatch.setattr(get_scheduler(), "free_slots", lambda: 1)
+    monkeypatch.setattr(api.main, "create_batch", lambda *args: pytest.fail("batch created"))
+    
+    monkeypatch.setattr(api.main, "save_upload_file", lambda *args, **kwargs: pytest.fail("upload saved"))
+    app.state.limiter.reset()
+    response = client.post(
+        "/batch",
+        headers=get_test_headers(),
+        files=[("files", ("a.wav", b"a", "audio/wav")), ("files", ("b.wav", b"b", "audio/wav"))],
+        data={"language": "en", "model_size": "small"}
+    )
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+    
+    # Archives are checked once their member count is known, before extraction
+    monkeypatch.undo()
+    monkeypatch.setattr(get_scheduler(), "free_slots", lambda: 2)
+    monkeypatch.setattr(api.main, "create_batch", lambda *args: pytest.fail("batch created"))
+    monkeypatch.setattr(api.main, "extract_archive", lambda *args: pytest.fail("archive extracted"))
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name in ("a.wav", "b.wav", "c.wav"):
+            archive.writestr(name, b"audio")
+    app.state.limiter.reset()
+    response = client.post(
+        "/batch",
+        headers=get_test_headers(),
+        files=[("files", ("clips.zip", buffer.getvalue(), "application/zip"))],
+        data={"language": "en", "model_size": "small"}
+    )
+    assert response.status_code == 503
+
+def test_transcribe_sync_returns_inline_result(monkeypatch):
+    """Test sync=true decodes short clips in memory without creating a task"""
+    import io
+    import wave
+    import api.stt
+    
+    model = object()
+    monkeypatch.setattr(api.stt, "get_model", lambda language, model_size: model)
+    monkeypatch.setattr(api.stt, "create_recognizer", lambda model, sample_rate=16000: FakeStreamRecognizer())
+    monkeypatch.setattr("api.main.RESULT_CACHE_ENABLED", False)
+    monkeypatch.setattr("api.main.create_task", lambda *args, **kwargs: pytest.fail("task created"))
+    
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(b"\x00\x00" * 8000)
+    
+    app.state.limiter.reset()
+    response = client.post(
+        "/transcribe",
+        headers=get_test_headers(),
+        files={"file": ("clip.wav", buffer.getvalue(), "audio/wav")},
+        data={"language": "en", "model_size": "small", "sync": "true"}
+    )
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["status"] == "done"
+    assert data["task_id"] is None
+    assert data["result"]["text"] == "chunk 2 final"
+    
+    # Clips over the sync duration limit are rejected
+    monkeypatch.setattr("api.main.SYNC_MAX_DURATION", 0.1)
+    response = client.post(
+        "/transcribe",
+        headers=get_test_headers(),
+        files={"file": ("clip.wav", buffer.getvalue(), "audio/wav")},
+        data={"language": "en", "model_size": "small", "sync": "true"}
+    )
+    assert response.status_code == 400
+    assert "sync mode" in response.json()["error"]
+    
+    app.state.limiter.reset()
+    response = client.post(
+        "/transcribe",
+        headers=get_test_headers(),
+        files={"file": ("clip.wav", buffer.getvalue(), "audio/wav")},
+        data={"language": "en", "model_size": "small", "sync": "true", "callback_url": "https://example.com/hook"}
+    )
+    assert response.status_code == 400
+
+def test_stream_decoder_thread_stops_when_consumer_fails(monkeypatch):
+    """Test the decoder thread exits when the session ends while the queue is full"""
+    import asyncio
+    import threading
+    import time
+    import api.streaming
+    
+    class EndlessDecoder:
+        """Decoder stand-in producing PCM until killed"""
+        
+        def __init__(self, sample_rate):
+            self.killed = threading.Event()
+            self.reader = None
+            decoders.append(self)
+        
+        def write(self, data):
+            pass
+        
+        def close_input(self):
+            pass
+        
+        def read(self):
+            self.reader = threading.current_thread()
+            return b"" if self.killed.is_set() else b"\x00" * 3200
+        
+        def kill(self):
+            self.killed.set()
+    
+    class GoneWebSocket:
+        """Client that stopped reading: sending fails, receiving never returns"""
+        
+        async def receive(self):
+            await asyncio.sleep(3600)
+        
+        async def send_text(self, text):
+            raise RuntimeError("client disconnected")
+    
+    class SlowRecognizer(FakeStreamRecognizer):
+        def AcceptWaveform(self, data):
+            # Let the decoder fill the queue before the consumer fails
+            time.sleep(0.2)
+            return super().AcceptWaveform(data)
+    
+    decoders = []
+    monkeypatch.setattr(api.streaming, "FfmpegPipeDecoder", EndlessDecoder)
+    # Keep the event loop running after the session, as in the server
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    try:
+        session = asyncio.run_coroutine_threadsafe(
+            api.streaming.run_stream_session(GoneWebSocket(), SlowRecognizer(), "opus"), loop
+        )
+        with pytest.raises(RuntimeError):
+            session.result(timeout=10)
+        decoders[0].reader.join(timeout=1)
+        assert not decoders[0].reader.is_alive()
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
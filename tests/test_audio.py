@@ -0,0 +1,125 @@
+"""
+In-memory audio decoding tests for Vosk STT service
+"""
+import io
+import wave
+import pytest
+from api.audio import (
+    pcm_from_wav_bytes, decode_audio_bytes, get_pcm_duration, is_video_file, format_ffmpeg_error,
+    select_audio_track, AudioTooLongError
+)
+
+def make_wav_bytes(frames, rate=16000, channels=1, width=2, value=b"\x00"):
+    """Build WAV bytes with constant samples"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(width)
+        wf.setframerate(rate)
+        wf.writeframes(value * width * frames * channels)
+    return buffer.getvalue()
+
+def test_compliant_wav_passes_through():
+    """16kHz mono 16-bit WAV frames are returned unchanged"""
+    data = make_wav_bytes(16000, value=b"\x01")
+    pcm = pcm_from_wav_bytes(data)
+    assert pcm == b"\x01" * 32000
+    assert get_pcm_duration(pcm) == 1.0
+
+def test_wav_is_downmixed_and_resampled():
+    """Stereo 44.1kHz WAV becomes 16kHz mono of the same duration"""
+    pcm = pcm_from_wav_bytes(make_wav_bytes(44100, rate=44100, channels=2))
+    assert abs(get_pcm_duration(pcm) - 1.0) < 0.01
+
+def test_8bit_wav_is_centered():
+    """Unsigned 8-bit silence (0x80) converts to zero samples"""
+    pcm = pcm_from_wav_bytes(make_wav_bytes(1600, width=1, value=b"\x80"))
+    assert pcm == b"\x00" * 3200
+
+def test_non_wav_needs_ffmpeg(monkeypatch):
+    """Non-WAV bytes are not parsed as WAV and fail cleanly without ffmpeg"""
+    import api.audio
+    assert pcm_from_wav_bytes(b"ID3 not a wav") is None
+    monkeypatch.setattr(api.audio.shutil, "which", lambda name: None)
+    with pytest.raises(Exception, match="ffmpeg not found"):
+        decode_audio_bytes(b"ID3 not a wav", "clip.mp3")
+
+def test_audio_track_of_wav_needs_ffmpeg(monkeypatch):
+    """Only track 0 of a WAV upload is read directly"""
+    import api.audio
+    monkeypatch.setattr(api.audio.shutil, "which", lambda name: None)
+    with pytest.raises(Exception, match="ffmpeg not found"):
+        decode_audio_bytes(make_wav_bytes(1600), "clip.wav", audio_track=1)
+
+def test_wav_over_max_duration_is_rejected_from_header():
+    """WAV files longer than the limit are rejected without decoding their samples"""
+    data = make_wav_bytes(32000)
+    assert get_pcm_duration(decode_audio_bytes(data, "clip.wav", max_duration=2)) == 2.0
+    with pytest.raises(AudioTooLongError):
+        decode_audio_bytes(data, "clip.wav", max_duration=1.5)
+
+def test_ffmpeg_decode_stops_at_max_duration(monkeypatch):
+    """ffmpeg is told to stop just past the limit and longer output is rejected"""
+    import api.audio
+    
+    class StandInStream:
+        """ffmpeg stream stand-in returning PCM of the decoded duration"""
+        
+        def __init__(self):
+            self.output_options = None
+        
+        def output(self, target, **options):
+            self.output_options = options
+            return self
+        
+        def global_args(self, *args):
+            return self
+        
+        def run(self, **kwargs):
+            return b"\x00\x00" * int(16000 * self.output_options.get("t", 10)), b""
+    
+    stream = StandInStream()
+    monkeypatch.setattr(api.audio.shutil, "which", lambda name: "/usr/bin/ffmpeg")
+    monkeypatch.setattr(api.audio, "select_audio_track", lambda source, audio_track: stream)
+    with pytest.raises(AudioTooLongError):
+        decode_audio_bytes(b"ID3 compressed", "clip.mp3", max_duration=5)
+    assert stream.output_options["t"] == 5 + api.audio.DURATION_LIMIT_MARGIN
+    
+    assert get_pcm_duration(decode_audio_bytes(b"ID3 compressed", "clip.mp3")) == 10
+
+def test_select_audio_track():
+    """Video inputs map a single audio stream and drop all other streams"""
+    from api.audio import AUDIO_ONLY_OUTPUT
+    args = select_audio_track("movie.mov", 1).output("pipe:", format="s16le", **AUDIO_ONLY_OUTPUT).get_args()
+    assert args[args.index("-map") + 1] == "0:a:1"
+    assert "-vn" in args and "-sn" in args and "-dn" in args
+    assert is_video_file("movie.MOV") and not is_video_file("clip.mp3")
+    assert format_ffmpeg_error("Stream map '0:a:2' matches no streams.", 2) == "Audio track 2 not found"
+    assert format_ffmpeg_error("Stream map '0:a:0' matches no streams.") == "No audio track found"
+
+def test_probe_wav_file(tmp_path):
+    """WAV headers are probed without decoding; other files are not WAV"""
+    from api.audio import probe_wav_file, is_vosk_format
+    path = tmp_path / "call.wav"
+    path.write_bytes(make_wav_bytes(8000, rate=8000))
+    info = probe_wav_file(str(path))
+    assert info["sample_rate"] == 8000 and info["channels"] == 1 and info["duration"] == 1.0
+    assert not is_vosk_format(info)
+    
+    other = tmp_path / "clip.mp3"
+    other.write_bytes(b"ID3 not a wav")
+    assert probe_wav_file(str(other)) is None
+
+def test_stream_wav_pcm(tmp_path):
+    """Compliant WAV streams unchanged; 8kHz stereo is resampled in blocks"""
+    from api.audio import stream_wav_pcm
+    compliant = tmp_path / "compliant.wav"
+    compliant.write_bytes(make_wav_bytes(10000, value=b"\x02"))
+    chunks = list(stream_wav_pcm(str(compliant), chunk_frames=4000))
+    assert [len(chunk) for chunk in chunks] == [8000, 8000, 4000]
+    assert b"".join(chunks) == b"\x02" * 20000
+    
+    call = tmp_path / "call.wav"
+    call.write_bytes(make_wav_bytes(8000 * 3, rate=8000, channels=2))
+    pcm = b"".join(stream_wav_pcm(str(call), chunk_frames=4000))
+    assert abs(get_pcm_duration(pcm) - 3.0) < 0.01
@@ -0,0 +1,109 @@
+"""
+Tests for batch archive extraction and status aggregation
+"""
+import io
+import os
+import json
+import tarfile
+import zipfile
+import pytest
+from api.batches import (
+    extract_archive, count_archive_members, get_batch_status, iter_batch_results, InvalidBatchError
+)
+from api.tasks import create_task, update_task_status, update_task_progress
+from api.task_store import get_task_store
+from api.utils import FileTooLargeError
+
+def make_zip(path, members):
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+
+def destination_in(directory):
+    return lambda filename: os.path.join(str(directory), f"out_{filename}")
+
+def test_extract_zip_keeps_only_audio_basenames(tmp_path):
+    """Archive paths are flattened and non-audio or hidden members skipped"""
+    archive_path = tmp_path / "batch.zip"
+    make_zip(archive_path, {
+        "../../evil.wav": b"a",
+        "sub/dir/b.mp3": b"bb",
+        "notes.txt": b"skip",
+        "__MACOSX/sub/._b.mp3": b"fork",
+        ".hidden.wav": b"hidden"
+    })
+    extracted = extract_archive(str(archive_path), destination_in(tmp_path), max_files=10)
+    assert [item["filename"] for item in extracted] == ["evil.wav", "b.mp3"]
+    assert all(os.path.dirname(item["path"]) == str(tmp_path) for item in extracted)
+    with open(extracted[1]["path"], "rb") as f:
+        assert f.read() == b"bb"
+    assert count_archive_members(str(archive_path)) == 2
+
+def test_extract_tar_skips_symlinks(tmp_path):
+    """Only regular tar members are extracted"""
+    archive_path = tmp_path / "batch.tar.gz"
+    with tarfile.open(archive_path, "w:gz") as archive:
+        info = tarfile.TarInfo("a.wav")
+        info.size = 3
+        archive.addfile(info, io.BytesIO(b"abc"))
+        link = tarfile.TarInfo("link.wav")
+        link.type = tarfile.SYMTYPE
+        link.linkname = "/etc/passwd"
+        archive.addfile(link)
+    extracted = extract_archive(str(archive_path), destination_in(tmp_path), max_files=10)
+    assert [item["filename"] for item in extracted] == ["a.wav"]
+
+def test_extract_limits_remove_partial_output(tmp_path):
+    """Too many files or an oversized member fail and leave nothing behind"""
+    archive_path = tmp_path / "batch.zip"
+    make_zip(archive_path, {"a.wav": b"a", "b.wav": b"b", "c.wav": b"c" * 100})
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    
+    with pytest.raises(InvalidBatchError):
+        extract_archive(str(archive_path), destination_in(out_dir), max_files=2)
+    assert os.listdir(out_dir) == []
+    
+    with pytest.raises(FileTooLargeError):
+        extract_archive(str(archive_path), destination_in(out_dir), max_files=10, max_size=10)
+    assert os.listdir(out_dir) == []
+    
+    (tmp_path / "bad.zip").write_bytes(b"not an archive")
+    with pytest.raises(InvalidBatchError):
+        extract_archive(str(tmp_path / "bad.zip"), destination_in(out_dir), max_files=10)
+
+def test_batch_status_aggregates_children():
+    """Batch progress combines finished and processing children"""
+    task_ids = ["test-batch-child-1", "test-batch-child-2", "test-batch-child-3"]
+    for task_id in task_ids:
+        create_task(task_id, "/test/input.wav", "en", "small", batch_id="test-batch")
+    batch_data = {
+        "id": "test-batch", "language": "en", "model_size": "small", "created_at": "now",
+        "tasks": [{"task_id": task_id, "filename": f"{n}.wav"} for n, task_id in enumerate(task_ids)]
+    }
+    
+    try:
+        assert get_batch_status(batch_data)["status"] == "queued"
+        
+        update_task_status(task_ids[0], "done", result={"text": "hello", "confidence": 0.9, "vtt_segments": []})
+        update_task_status(task_ids[1], "processing")
+        update_task_progress(task_ids[1], 5.0, 10.0, 0.5)
+        status = get_batch_status(batch_data)
+        assert status["status"] == "processing"
+        assert status["counts"] == {"queued": 1, "processing": 1, "done": 1, "failed": 0}
+        assert status["progress"] == 0.5
+        
+        update_task_status(task_ids[1], "failed", error="boom")
+        update_task_status(task_ids[2], "done", result={"text": "", "confidence": 0.0, "vtt_segments": []})
+        status = get_batch_status(batch_data)
+        assert status["status"] == "done"
+        assert status["progress"] == 1.0
+        
+        combined = json.loads("".join(iter_batch_results(batch_data)))
+        assert combined["batch_id"] == "test-batch"
+        assert [item["status"] for item in combined["results"]] == ["done", "failed", "done"]
+        assert combined["results"][0]["text"] == "hello"
+        assert combined["results"][1]["error"] == "boom"
+    finally:
+        for task_id in task_ids:
+            get_task_store().delete(task_id)
@@ -0,0 +1,50 @@
+"""
+Tests for Prometheus metrics
+"""
+from api.metrics import Counter, Gauge, Histogram, MetricsRegistry, observe_decode, DECODE_SECONDS, REAL_TIME_FACTOR
+
+def test_counter_render_with_labels():
+    """Counters render one sample per label set"""
+    counter = Counter("test_total", "Test counter", ("status",))
+    counter.inc(status="done")
+    counter.inc(2, status="failed")
+    lines = counter.render()
+    assert "# TYPE test_total counter" in lines
+    assert 'test_total{status="done"} 1' in lines
+    assert 'test_total{status="failed"} 2' in lines
+
+def test_histogram_cumulative_buckets():
+    """Histogram buckets are cumulative and end with +Inf"""
+    histogram = Histogram("test_seconds", "Test histogram", buckets=(1, 5))
+    for value in (0.5, 3, 10):
+        histogram.observe(value)
+    lines = histogram.render()
+    assert 'test_seconds_bucket{le="1"} 1' in lines
+    assert 'test_seconds_bucket{le="5"} 2' in lines
+    assert 'test_seconds_bucket{le="+Inf"} 3' in lines
+    assert "test_seconds_sum 13.5" in lines
+    assert "test_seconds_count 3" in lines
+
+def test_gauge_function_and_registry():
+    """Callback gauges are sampled at render time"""
+    registry = MetricsRegistry()
+    depth = [3]
+    registry.register(Gauge("test_depth", "Test gauge", function=lambda: depth[0]))
+    assert "test_depth 3" in registry.render()
+    depth[0] = 7
+    assert "test_depth 7" in registry.render()
+
+def test_label_values_are_escaped():
+    """Quotes and backslashes in label values are escaped"""
+    counter = Counter("test_escape_total", "Test counter", ("name",))
+    counter.inc(name='a"b\\c')
+    assert 'test_escape_total{name="a\\"b\\\\c"} 1' in counter.render()
+
+def test_observe_decode_records_rtf():
+    """Decode observations record latency and real-time factor per model"""
+    before = REAL_TIME_FACTOR.count(language="xx", model_size="small")
+    observe_decode("xx", "small", 5.0, 20.0)
+    observe_decode("xx", "small", 1.0, 0.0)
+    assert DECODE_SECONDS.count(language="xx", model_size="small") >= 2
+    # Zero-length audio has no real-time factor
+    assert REAL_TIME_FACTOR.count(language="xx", model_size="small") == before + 1
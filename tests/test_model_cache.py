@@ -0,0 +1,77 @@
+"""
+Model cache tests for Vosk STT service
+"""
+import os
+import threading
+import pytest
+from api import model_cache
+from api.model_cache import ModelCache
+
+@pytest.fixture
+def models_dir(tmp_path, monkeypatch):
+    """Create fake model directories"""
+    for language in ["en", "zh", "ja"]:
+        os.makedirs(tmp_path / language / "small")
+    monkeypatch.setattr(model_cache, "MODELS_DIR", str(tmp_path))
+    return tmp_path
+
+def make_cache(max_bytes, loads):
+    """Create a cache with a fake loader recording loads"""
+    def loader(model_path):
+        loads.append(model_path)
+        return object()
+    return ModelCache(max_bytes, loader=loader, size_estimator=lambda path: 100)
+
+def test_model_loaded_once(models_dir):
+    """Test repeated requests share one model instance"""
+    loads = []
+    cache = make_cache(1000, loads)
+
+    first = cache.get("en", "small")
+    second = cache.get("en", "small")
+
+    assert first is second
+    assert len(loads) == 1
+
+def test_model_loaded_once_concurrently(models_dir):
+    """Test concurrent requests for the same model load it once"""
+    loads = []
+    cache = make_cache(1000, loads)
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(cache.get("en", "small"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert all(model is results[0] for model in results)
+
+def test_lru_eviction_over_budget(models_dir):
+    """Test least recently used model is evicted when over budget"""
+    loads = []
+    cache = make_cache(200, loads)
+
+    cache.get("en", "small")
+    cache.get("zh", "small")
+    cache.get("en", "small")  # en becomes most recently used
+    cache.get("ja", "small")  # evicts zh
+
+    resident = [(m["language"], m["model_size"]) for m in cache.stats()["models"]]
+    assert resident == [("en", "small"), ("ja", "small")]
+    assert cache.stats()["resident_bytes"] == 200
+
+def test_single_model_larger_than_budget(models_dir):
+    """Test a model larger than the budget stays resident while in use"""
+    cache = make_cache(50, [])
+    model = cache.get("en", "small")
+
+    assert cache.get("en", "small") is model
+    assert len(cache.stats()["models"]) == 1
+
+def test_missing_model(models_dir):
+    """Test missing model raises an error"""
+    cache = make_cache(1000, [])
+    with pytest.raises(Exception, match="Model not found"):
+        cache.get("en", "large")
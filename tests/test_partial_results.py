@@ -0,0 +1,176 @@
+"""
+Partial results log tests for Vosk STT service
+"""
+import json
+from api.partial_results import (
+    append_partial_result, read_partial_results, delete_partial_results, get_partial_log_path,
+    get_resume_offset, load_checkpoint, get_partial_transcript
+)
+from api.tasks import create_task, get_task_status, update_task_status
+from api.task_store import get_task_store
+
+class FakeRecognizer:
+    """Recognizer stand-in finalizing one word per accepted chunk of 0.5 seconds"""
+
+    def __init__(self):
+        self.count = 0
+
+    def AcceptWaveform(self, data):
+        self.count += 1
+        return True
+
+    def Result(self):
+        index = self.count - 1
+        word = {"word": f"w{index}", "start": index * 0.5, "end": self.count * 0.5, "conf": 1.0}
+        return json.dumps({"text": word["word"], "result": [word]})
+
+    def FinalResult(self):
+        return json.dumps({"text": ""})
+
+    def Reset(self):
+        self.count = 0
+
+def test_append_and_read_partial_results():
+    """Test logged segments are read back in order, ignoring an unfinished line"""
+    task_id = "test-partial-log"
+    path = get_partial_log_path(task_id)
+    try:
+        append_partial_result(path, {"text": "hello", "result": []})
+        append_partial_result(path, {"text": "世界", "result": []})
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"text": "unfini')
+
+        assert [segment["text"] for segment in read_partial_results(task_id)] == ["hello", "世界"]
+    finally:
+        delete_partial_results(task_id)
+    assert read_partial_results(task_id) == []
+
+def test_partial_transcript_parses_only_new_lines():
+    """Test polls reuse the parsed prefix and rebuild only when segments were added"""
+    task_id = "test-partial-cache"
+    path = get_partial_log_path(task_id)
+    builds = []
+    
+    def build(segments):
+        builds.append(len(segments))
+        return {"text": " ".join(segment["text"] for segment in segments)}
+    
+    try:
+        assert get_partial_transcript(task_id, build) is None
+        append_partial_result(path, {"text": "a", "result": []})
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"text": "b", "res')
+        assert get_partial_transcript(task_id, build) == {"text": "a"}
+        assert get_partial_transcript(task_id, build) == {"text": "a"}
+        
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('ult": []}\n')
+        append_partial_result(path, {"text": "c", "result": []})
+        assert get_partial_transcript(task_id, build) == {"text": "a b c"}
+        assert builds == [1, 3]
+    finally:
+        delete_partial_results(task_id)
+    assert get_partial_transcript(task_id, build) is None
+
+def test_transcript_pages_reuse_parsed_log(monkeypatch):
+    """Test paging a processing task parses each logged line once"""
+    import api.partial_results
+    from api.main import get_transcript_page
+    from api.words import WordTable
+    task_id = "test-partial-pages"
+    parsed = []
+    builds = []
+    parse_lines = api.partial_results._parse_lines
+    from_segments = WordTable.from_segments.__func__
+    monkeypatch.setattr(api.partial_results, "_parse_lines",
+                        lambda data: parsed.append(data.count(b"\n")) or parse_lines(data))
+    monkeypatch.setattr(WordTable, "from_segments",
+                        classmethod(lambda cls, segments: builds.append(len(segments)) or from_segments(cls, segments)))
+    
+    create_task(task_id, "/test/input.wav", "en", "small")
+    update_task_status(task_id, "processing")
+    path = get_partial_log_path(task_id)
+    try:
+        assert get_transcript_page(task_id, "words", None, None, None, 10)["data"]["total"] == 0
+        for index in range(3):
+            append_partial_result(path, {"text": f"w{index}", "result": [
+                {"word": f"w{index}", "start": float(index), "end": index + 0.5, "conf": 1.0}
+            ]})
+        
+        first = get_transcript_page(task_id, "words", None, None, None, 2)["data"]
+        second = get_transcript_page(task_id, "words", None, None, first["next_cursor"], 2)["data"]
+        assert [word["word"] for word in first["words"] + second["words"]] == ["w0", "w1", "w2"]
+        assert get_task_status(task_id)["result"]["text"] == "w0 w1 w2"
+        assert parsed == [3]
+        assert builds == [3]
+    finally:
+        delete_partial_results(task_id)
+        get_task_store().delete(task_id)
+
+def test_processing_task_returns_transcript_so_far(monkeypatch):
+    """Test segments are logged as they are decoded and served while processing"""
+    from api import stt
+    monkeypatch.setattr(stt, "create_recognizer", lambda model, sample_rate=16000: FakeRecognizer())
+
+    task_id = "test-partial-task"
+    create_task(task_id, "/test/input.wav", "en", "small")
+    update_task_status(task_id, "processing")
+    logged = []
+
+    def on_segment(segment):
+        logged.append(segment["text"])
+        append_partial_result(get_partial_log_path(task_id), segment)
+
+    try:
+        stt.transcribe_pcm_stream([b"\x00" * 16000] * 2, object(), on_segment=on_segment)
+        assert logged == ["w0", "w1"]
+
+        status = get_task_status(task_id)
+        assert status["partial"] is True
+        assert status["result"]["text"] == "w0 w1"
+        assert "00:00:00.000 --> 00:00:01.000" in get_task_status(task_id, "vtt")["result"]["subtitle"]
+    finally:
+        get_task_store().delete(task_id)
+        delete_partial_results(task_id)
+
+def test_checkpoint_drops_unfinished_line():
+    """Test resuming truncates a cut-off line and starts after the last logged word"""
+    task_id = "test-partial-checkpoint"
+    path = get_partial_log_path(task_id)
+    try:
+        append_partial_result(path, {"text": "a b", "result": [
+            {"word": "a", "start": 0.5, "end": 1.0, "conf": 1.0},
+            {"word": "b", "start": 1.2, "end": 1.75, "conf": 1.0}
+        ]})
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"text": "cut')
+
+        checkpoint = load_checkpoint(task_id)
+        assert get_resume_offset(checkpoint) == 1.75
+        append_partial_result(path, {"text": "c", "result": []})
+        assert [segment["text"] for segment in read_partial_results(task_id)] == ["a b", "c"]
+    finally:
+        delete_partial_results(task_id)
+    assert load_checkpoint(task_id) == []
+    assert get_resume_offset([]) == 0.0
+
+def test_resumed_decode_keeps_file_timestamps(monkeypatch, tmp_path):
+    """Test decoding resumed part way into a WAV file skips audio and shifts timestamps"""
+    import wave
+    from api import stt
+    monkeypatch.setattr(stt, "create_recognizer", lambda model, sample_rate=16000: FakeRecognizer())
+
+    wav_path = tmp_path / "long.wav"
+    with wave.open(str(wav_path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(b"\x00\x00" * 16000 * 2)
+
+    logged = []
+    result = stt.decode_audio_file(str(wav_path), "unused", object(), on_segment=logged.append, start_seconds=1.0)
+
+    # 1 second left, read as 4 chunks of 4000 frames
+    assert len(result["segments"]) == 4
+    assert logged == result["segments"]
+    assert result["segments"][0]["result"][0]["start"] == 1.0
@@ -0,0 +1,52 @@
+"""
+Process-pool decoding backend tests for Vosk STT service
+"""
+import os
+import pytest
+from api.process_pool import ProcessDecodePool, WorkerCrashedError, parse_preload_models
+
+@pytest.fixture
+def pool():
+    """Create a single-process pool"""
+    pool = ProcessDecodePool(1)
+    yield pool
+    pool.shutdown()
+
+def test_parse_preload_models():
+    """Test parsing the preload model list"""
+    assert parse_preload_models("en:small, zh:large,,ja") == [("en", "small"), ("zh", "large"), ("ja", "small")]
+    assert parse_preload_models("") == []
+
+def test_run_job_in_worker_process(pool):
+    """Test jobs run in a separate process"""
+    assert pool.run(pow, (2, 10)) == 1024
+    assert pool.run(os.getpid) != os.getpid()
+
+def test_job_error_is_reported(pool):
+    """Test exceptions in the worker are raised in the caller"""
+    with pytest.raises(Exception, match="invalid literal"):
+        pool.run(int, ("not a number",))
+    # Worker is still usable
+    assert pool.run(pow, (3, 2)) == 9
+
+def test_worker_crash_fails_only_one_job(pool):
+    """Test a crashed worker fails its job and is respawned"""
+    first_pid = pool.run(os.getpid)
+    with pytest.raises(WorkerCrashedError):
+        pool.run(os._exit, (1,))
+
+    assert pool.run(pow, (2, 3)) == 8
+    assert pool.run(os.getpid) != first_pid
+
+def report_twice(value, progress_callback=None):
+    """Job reporting progress before returning"""
+    if progress_callback is not None:
+        progress_callback(1.0, 4.0, 0.5)
+        progress_callback(2.0, 4.0, 0.5)
+    return value
+
+def test_progress_forwarded_to_parent(pool):
+    """Test progress reports from the worker reach the caller"""
+    reports = []
+    assert pool.run(report_twice, ("done",), on_progress=reports.append) == "done"
+    assert reports == [(1.0, 4.0, 0.5), (2.0, 4.0, 0.5)]
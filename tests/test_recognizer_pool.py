@@ -0,0 +1,105 @@
+"""
+Recognizer pool tests for Vosk STT service
+"""
+from api.recognizer_pool import RecognizerPool
+from api.model_cache import ModelCache
+
+class CountingRecognizer:
+    """Recognizer stand-in counting resets"""
+    
+    def __init__(self, model, sample_rate):
+        self.model = model
+        self.sample_rate = sample_rate
+        self.resets = 0
+    
+    def Reset(self):
+        self.resets += 1
+
+class BrokenRecognizer(CountingRecognizer):
+    """Recognizer stand-in that cannot be reset"""
+    
+    def Reset(self):
+        raise RuntimeError("reset failed")
+
+def test_reuse_per_model_and_sample_rate():
+    """Test recognizers are reset and reused only for the same model and rate"""
+    pool = RecognizerPool(max_idle=2)
+    model = object()
+    
+    with pool.recognizer(model, 16000, CountingRecognizer) as rec:
+        pass
+    assert rec.resets == 1
+    
+    assert pool.acquire(model, 16000, CountingRecognizer) is rec
+    assert pool.acquire(model, 8000, CountingRecognizer) is not rec
+    assert pool.acquire(object(), 16000, CountingRecognizer) is not rec
+    assert pool.stats()["reused"] == 1
+    assert pool.stats()["created"] == 3
+
+def test_idle_limit_and_broken_recognizers():
+    """Test surplus and unresettable recognizers are dropped"""
+    pool = RecognizerPool(max_idle=1)
+    model = object()
+    first = pool.acquire(model, 16000, CountingRecognizer)
+    second = pool.acquire(model, 16000, CountingRecognizer)
+    pool.release(model, 16000, first)
+    pool.release(model, 16000, second)
+    assert pool.stats()["idle"] == 1
+    
+    pool.clear()
+    pool.release(model, 16000, BrokenRecognizer(model, 16000))
+    assert pool.stats()["idle"] == 0
+    
+    disabled = RecognizerPool(max_idle=0)
+    disabled.release(model, 16000, CountingRecognizer(model, 16000))
+    assert disabled.stats()["idle"] == 0
+
+def test_prewarm():
+    """Test recognizers can be built before the first task"""
+    pool = RecognizerPool(max_idle=3)
+    model = object()
+    pool.prewarm(model, 16000, CountingRecognizer, count=2)
+    pool.prewarm(model, 16000, CountingRecognizer, count=2)
+    assert pool.stats()["idle"] == 2
+
+def test_model_cache_eviction_discards_recognizers(tmp_path, monkeypatch):
+    """Test evicted models release their pooled recognizers"""
+    from api import model_cache
+    monkeypatch.setattr(model_cache, "MODELS_DIR", str(tmp_path))
+    for size in ("small", "large"):
+        (tmp_path / "en" / size).mkdir(parents=True)
+    
+    pool = RecognizerPool(max_idle=2)
+    cache = ModelCache(10, loader=lambda path: object(), size_estimator=lambda path: 8,
+                       on_evict=pool.discard_model)
+    small = cache.get("en", "small")
+    pool.prewarm(small, 16000, CountingRecognizer, count=2)
+    assert pool.stats()["idle"] == 2
+    
+    # Loading a second model evicts the first one over budget
+    cache.get("en", "large")
+    assert pool.stats()["idle"] == 0
+
+def test_recognizer_borrowed_during_eviction_is_dropped(tmp_path, monkeypatch):
+    """Test a recognizer returned after its model was evicted does not keep the model alive"""
+    from api import model_cache
+    monkeypatch.setattr(model_cache, "MODELS_DIR", str(tmp_path))
+    for size in ("small", "large"):
+        (tmp_path / "en" / size).mkdir(parents=True)
+    
+    cache = ModelCache(10, loader=lambda path: object(), size_estimator=lambda path: 8,
+                       on_evict=lambda model: pool.discard_model(model))
+    pool = RecognizerPool(max_idle=2, is_live=cache.is_resident)
+    small = cache.get("en", "small")
+    rec = pool.acquire(small, 16000, CountingRecognizer)
+    
+    # Evicted while the recognizer is borrowed
+    cache.get("en", "large")
+    pool.release(small, 16000, rec)
+    assert pool.stats()["idle"] == 0
+    assert id(small) not in pool._models
+    
+    # Recognizers of resident models are still pooled
+    large = cache.get("en", "large")
+    pool.release(large, 16000, pool.acquire(large, 16000, CountingRecognizer))
+    assert pool.stats()["idle"] == 1
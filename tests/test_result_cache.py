@@ -0,0 +1,46 @@
+"""
+Result cache tests for Vosk STT service
+"""
+import os
+import time
+from api.result_cache import ResultCache
+
+def test_put_and_get(tmp_path):
+    """Test results are cached per hash, language and model size"""
+    cache = ResultCache(str(tmp_path), 10000)
+    cache.put("abc", "en", "small", {"text": "hello"})
+    
+    assert cache.get("abc", "en", "small") == {"text": "hello"}
+    assert cache.get("abc", "en", "large") is None
+    assert cache.get("def", "en", "small") is None
+    
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["hit_rate"] == 0.333
+
+def test_lru_eviction(tmp_path):
+    """Test least recently used entries are evicted over budget"""
+    entry = {"text": "x" * 100}
+    cache = ResultCache(str(tmp_path), 250)
+    cache.put("first", "en", "small", entry)
+    cache.put("second", "en", "small", entry)
+    
+    # Make "first" the most recently used
+    old = time.time() - 60
+    os.utime(os.path.join(str(tmp_path), "second_en_small.json"), (old, old))
+    cache.put("third", "en", "small", entry)
+    
+    assert cache.get("second", "en", "small") is None
+    assert cache.get("first", "en", "small") == entry
+    assert cache.get("third", "en", "small") == entry
+    assert cache.stats()["size_bytes"] <= 250
+
+def test_size_survives_restart(tmp_path):
+    """Test cache size is recovered from disk"""
+    cache = ResultCache(str(tmp_path), 10000)
+    cache.put("abc", "en", "small", {"text": "hello"})
+    
+    reopened = ResultCache(str(tmp_path), 10000)
+    assert reopened.stats()["size_bytes"] == cache.stats()["size_bytes"]
@@ -0,0 +1,122 @@
+"""
+Scheduler tests for Vosk STT service
+"""
+import threading
+import time
+import pytest
+from api.scheduler import TaskScheduler, QueueFullError, get_task_priority
+
+def wait_for(condition, timeout=5.0):
+    """Wait until condition is true"""
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError("Timed out waiting for condition")
+        time.sleep(0.01)
+
+def test_bounded_concurrency():
+    """Test no more than max_workers jobs run at once"""
+    scheduler = TaskScheduler(max_workers=2, max_queue_size=10)
+    release = threading.Event()
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def job():
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        release.wait()
+        with lock:
+            running.pop()
+
+    for i in range(5):
+        scheduler.submit(f"task-{i}", job)
+
+    wait_for(lambda: scheduler.active_count() == 2)
+    assert scheduler.queue_size() == 3
+    release.set()
+    wait_for(lambda: scheduler.active_count() == 0 and scheduler.queue_size() == 0)
+    assert max(peak) == 2
+
+def test_priority_order_and_position():
+    """Test higher priority jobs run first and FIFO within a priority"""
+    scheduler = TaskScheduler(max_workers=1, max_queue_size=10)
+    release = threading.Event()
+    order = []
+
+    scheduler.submit("blocker", release.wait)
+    wait_for(lambda: scheduler.active_count() == 1)
+
+    scheduler.submit("large-1", lambda: order.append("large-1"), (1, 0))
+    scheduler.submit("small-1", lambda: order.append("small-1"), (0, 5))
+    scheduler.submit("small-2", lambda: order.append("small-2"), (0, 5))
+    scheduler.submit("small-short", lambda: order.append("small-short"), (0, 0))
+
+    assert scheduler.queue_position("small-short") == 1
+    assert scheduler.queue_position("large-1") == 4
+    assert scheduler.queue_position("blocker") is None
+
+    release.set()
+    wait_for(lambda: len(order) == 4)
+    assert order == ["small-short", "small-1", "small-2", "large-1"]
+
+def test_queue_full():
+    """Test submissions beyond capacity are rejected"""
+    scheduler = TaskScheduler(max_workers=1, max_queue_size=1)
+    release = threading.Event()
+
+    scheduler.submit("running", release.wait)
+    wait_for(lambda: scheduler.active_count() == 1)
+    scheduler.submit("waiting", lambda: None)
+
+    assert scheduler.is_full()
+    with pytest.raises(QueueFullError):
+        scheduler.submit("rejected", lambda: None)
+    release.set()
+
+def test_cancel_queued_job():
+    """Test cancelling a job before it starts"""
+    scheduler = TaskScheduler(max_workers=1, max_queue_size=10)
+    release = threading.Event()
+    ran = []
+
+    scheduler.submit("running", release.wait)
+    wait_for(lambda: scheduler.active_count() == 1)
+    scheduler.submit("cancelled", lambda: ran.append(True))
+
+    assert scheduler.cancel("cancelled") is True
+    assert scheduler.cancel("cancelled") is False
+    release.set()
+    wait_for(lambda: scheduler.active_count() == 0)
+    assert ran == []
+
+def test_task_priority(tmp_path):
+    """Test small models and short files get higher priority"""
+    short_file = tmp_path / "short.wav"
+    short_file.write_bytes(b"0" * 10)
+    long_file = tmp_path / "long.wav"
+    long_file.write_bytes(b"0" * (3 * 1024 * 1024))
+
+    assert get_task_priority("small", str(short_file)) < get_task_priority("small", str(long_file))
+    assert get_task_priority("small", str(long_file)) < get_task_priority("large", str(short_file))
+
+def test_submit_many_is_contiguous_and_atomic():
+    """Test a job group runs back to back and is rejected as a whole when it does not fit"""
+    scheduler = TaskScheduler(max_workers=1, max_queue_size=4)
+    release = threading.Event()
+    order = []
+
+    scheduler.submit("blocker", release.wait)
+    wait_for(lambda: scheduler.active_count() == 1)
+    scheduler.submit("single", lambda: order.append("single"), (0, 5))
+    scheduler.submit_many([(f"batch-{i}", lambda i=i: order.append(f"batch-{i}")) for i in range(2)], (0, 1))
+    assert scheduler.free_slots() == 1
+
+    with pytest.raises(QueueFullError):
+        scheduler.submit_many([("a", lambda: None), ("b", lambda: None)])
+    assert scheduler.queue_size() == 3
+
+    release.set()
+    wait_for(lambda: len(order) == 3)
+    assert order == ["batch-0", "batch-1", "single"]
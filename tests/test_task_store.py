@@ -0,0 +1,184 @@
+"""
+Task store tests for Vosk STT service
+"""
+from datetime import datetime, timedelta
+import pytest
+from api.task_store import JsonTaskStore, SqliteTaskStore
+
+def make_task(task_id, status="queued", created_at=None):
+    """Build a task record"""
+    created_at = created_at or datetime.now()
+    return {
+        "id": task_id,
+        "status": status,
+        "input_file": "/test/input.wav",
+        "output_file": None,
+        "language": "en",
+        "model_size": "small",
+        "result": None,
+        "error": None,
+        "created_at": created_at.isoformat(),
+        "updated_at": created_at.isoformat()
+    }
+
+@pytest.fixture(params=["json", "sqlite"])
+def store(request, tmp_path):
+    """Create each task store backend in a temporary directory"""
+    if request.param == "json":
+        return JsonTaskStore(str(tmp_path))
+    return SqliteTaskStore(str(tmp_path / "tasks.db"))
+
+def test_create_and_get(store):
+    """Test a created task can be read back"""
+    store.create(make_task("task-1"))
+    
+    task = store.get("task-1")
+    assert task["id"] == "task-1"
+    assert task["status"] == "queued"
+    assert task["result"] is None
+    assert store.get("missing") is None
+
+def test_update_fields_and_result(store):
+    """Test updates merge fields, extra fields and results"""
+    store.create(make_task("task-1"))
+    
+    assert store.update("task-1", {"status": "done", "result": {"text": "hello"}, "priority": [0, 1]})
+    assert store.update("task-1", {"error": None})
+    assert store.update("missing", {"status": "done"}) is False
+    
+    task = store.get("task-1")
+    assert task["status"] == "done"
+    assert task["result"] == {"text": "hello"}
+    assert task["priority"] == [0, 1]
+
+def test_list_by_status(store):
+    """Test listing all tasks or tasks with a status"""
+    store.create(make_task("task-1"))
+    store.create(make_task("task-2", status="done"))
+    
+    assert {task["id"] for task in store.list()} == {"task-1", "task-2"}
+    assert [task["id"] for task in store.list(status="done")] == ["task-2"]
+
+def test_sqlite_list_skips_results(tmp_path):
+    """Test listing SQLite tasks does not read stored results"""
+    store = SqliteTaskStore(str(tmp_path / "tasks.db"))
+    task_data = make_task("task-1", status="done")
+    task_data["result"] = {"text": "hello"}
+    store.create(task_data)
+    
+    statements = []
+    store._connection().set_trace_callback(statements.append)
+    [task] = store.list()
+    assert task["id"] == "task-1" and task["result"] is None
+    assert not any("task_results" in statement for statement in statements)
+    assert store.get("task-1")["result"] == {"text": "hello"}
+
+def test_delete_created_before(store):
+    """Test old tasks are deleted"""
+    store.create(make_task("old", created_at=datetime.now() - timedelta(days=10)))
+    store.create(make_task("new"))
+    store.update("old", {"result": {"text": "old result"}})
+    
+    deleted = []
+    assert store.delete_created_before(datetime.now() - timedelta(days=8), on_delete=deleted.append) == 1
+    assert deleted == ["old"]
+    assert store.get("old") is None
+    assert store.get("new") is not None
+    assert not store.exists("old") and store.exists("new")
+
+def test_sqlite_result_stored_separately(tmp_path):
+    """Test status updates do not rewrite stored results"""
+    store = SqliteTaskStore(str(tmp_path / "tasks.db"))
+    store.create(make_task("task-1"))
+    store.update("task-1", {"status": "done", "result": {"text": "hello"}})
+    
+    conn = store._connection()
+    assert conn.execute("SELECT COUNT(*) FROM task_results").fetchone()[0] == 1
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    indexes = {row["name"] for row in conn.execute("PRAGMA index_list(tasks)")}
+    assert {"idx_tasks_status", "idx_tasks_created_at"} <= indexes
+
+def test_json_updates_are_journaled(tmp_path):
+    """Test status updates append to a journal that is compacted when a result is stored"""
+    import os
+    store = JsonTaskStore(str(tmp_path))
+    store.create(make_task("task-1"))
+    document = (tmp_path / "task-1.json").read_bytes()
+    
+    store.update("task-1", {"status": "processing"})
+    store.update("task-1", {"progress": {"processed_seconds": 5.0}})
+    assert (tmp_path / "task-1.json").read_bytes() == document
+    assert len((tmp_path / "task-1.journal").read_text().split()) == 2
+    assert store.get("task-1")["progress"] == {"processed_seconds": 5.0}
+    
+    store.update("task-1", {"status": "done", "result": {"text": "hello"}})
+    assert not os.path.exists(tmp_path / "task-1.journal")
+    task = store.get("task-1")
+    assert (task["status"], task["result"], task["progress"]) == ("done", {"text": "hello"}, {"processed_seconds": 5.0})
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".tmp")] == []
+
+def test_json_journal_survives_torn_write(tmp_path):
+    """Test a journal line cut short by a crash is ignored"""
+    store = JsonTaskStore(str(tmp_path), journal_max_bytes=200)
+    store.create(make_task("task-1"))
+    store.update("task-1", {"status": "processing"})
+    with open(tmp_path / "task-1.journal", "a") as f:
+        f.write('\n{"status": "do')
+    assert store.get("task-1")["status"] == "processing"
+    store.update("task-1", {"error": "next update"})
+    assert store.get("task-1")["error"] == "next update"
+    
+    # A full journal is compacted into the document
+    for i in range(10):
+        store.update("task-1", {"progress": {"processed_seconds": float(i)}})
+    assert len((tmp_path / "task-1.journal").read_text().split()) < 10
+    assert store.get("task-1")["progress"] == {"processed_seconds": 9.0}
+
+def test_json_compaction_interrupted_before_journal_removal(tmp_path, monkeypatch):
+    """Test a journal left behind by a crash during compaction is not replayed over the document"""
+    store = JsonTaskStore(str(tmp_path))
+    store.create(make_task("task-1"))
+    store.update("task-1", {"status": "processing"})
+    
+    # Crash after the compacted document is written, before the journal is removed
+    monkeypatch.setattr(store, "_remove_journal", lambda task_id: None)
+    store.update("task-1", {"status": "done", "result": {"text": "hello"}})
+    monkeypatch.undo()
+    assert (tmp_path / "task-1.journal").exists()
+    
+    restarted = JsonTaskStore(str(tmp_path))
+    task = restarted.get("task-1")
+    assert (task["status"], task["result"]) == ("done", {"text": "hello"})
+    assert "_compacted_journal" not in task and "_journal_id" not in task
+    
+    # Updates appended to the leftover journal still apply
+    restarted.update("task-1", {"error": "later update"})
+    assert restarted.get("task-1")["status"] == "done"
+    assert restarted.get("task-1")["error"] == "later update"
+
+def test_json_concurrent_updates_are_not_lost(tmp_path):
+    """Test concurrent updates of one task from many threads all persist"""
+    import threading
+    store = JsonTaskStore(str(tmp_path), journal_max_bytes=300)
+    store.create(make_task("task-1"))
+    
+    def worker(index):
+        for step in range(20):
+            store.update("task-1", {f"field_{index}": step})
+    
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    task = store.get("task-1")
+    assert all(task[f"field_{index}"] == 19 for index in range(8))
+
+def test_json_locks_do_not_grow_with_tasks(tmp_path):
+    """Test reading many tasks does not allocate a lock per task"""
+    store = JsonTaskStore(str(tmp_path))
+    for index in range(200):
+        store.create(make_task(f"task-{index}"))
+    assert len(store.list()) == 200
+    assert len(store._locks) == JsonTaskStore.LOCK_STRIPES
@@ -81,4 +81,183 @@ def test_update_task_status():
     assert status["result"]["confidence"] == 0.0
     
     # Clean up
-    os.remove(task_file)
\ No newline at end of file
+    os.remove(task_file)
+
+def test_update_task_progress():
+    """Test decode progress is reported while processing"""
+    from api.tasks import update_task_progress
+    task_id = "test-task-progress"
+    
+    # Clean up any existing test task
+    task_file = os.path.join(TASKS_DIR, f"{task_id}.json")
+    if os.path.exists(task_file):
+        os.remove(task_file)
+    
+    create_task(task_id, "/test/input.wav", "zh", "small")
+    update_task_status(task_id, "processing")
+    assert update_task_progress(task_id, 30.0, 120.0, 0.2) is True
+    
+    status = get_task_status(task_id)
+    assert status["progress"] == 0.25
+    assert status["eta_seconds"] == 18.0
+    assert status["real_time_factor"] == 0.2
+    
+    # Clean up (progress updates are journaled next to the task file)
+    from api.task_store import get_task_store
+    get_task_store().delete(task_id)
+
+def test_callback_queued_on_completion(monkeypatch):
+    """Test finished tasks with a callback_url queue a webhook delivery"""
+    import api.webhooks
+    task_id = "test-task-callback"
+    deliveries = []
+    
+    class RecordingDispatcher:
+        def enqueue(self, task_id, url, payload):
+            deliveries.append((task_id, url, payload))
+    
+    monkeypatch.setattr(api.webhooks, "get_webhook_dispatcher", lambda: RecordingDispatcher())
+    
+    # Clean up any existing test task
+    task_file = os.path.join(TASKS_DIR, f"{task_id}.json")
+    if os.path.exists(task_file):
+        os.remove(task_file)
+    
+    create_task(task_id, "/test/input.wav", "zh", "small", callback_url="http://example.com/hook")
+    update_task_status(task_id, "processing")
+    assert deliveries == []
+    
+    update_task_status(task_id, "done", result={"text": "hello", "confidence": 0.9})
+    assert len(deliveries) == 1
+    assert deliveries[0][1] == "http://example.com/hook"
+    assert deliveries[0][2]["event"] == "task.completed"
+    assert deliveries[0][2]["result"] == {"text": "hello", "confidence": 0.9}
+    
+    # Clean up
+    os.remove(task_file)
+
+def test_failed_job_delivers_one_callback(monkeypatch):
+    """Test a failing job marks its task failed once and queues one webhook delivery"""
+    import api.webhooks
+    from api import stt
+    from api.tasks import create_task_job
+    from api.task_store import get_task_store
+    task_id = "test-task-failed-callback"
+    deliveries = []
+    
+    class RecordingDispatcher:
+        def enqueue(self, task_id, url, payload):
+            deliveries.append((task_id, url, payload))
+    
+    def missing_model(language, model_size):
+        raise Exception("Model not found")
+    
+    monkeypatch.setattr(api.webhooks, "get_webhook_dispatcher", lambda: RecordingDispatcher())
+    monkeypatch.setattr(stt, "get_model", missing_model)
+    monkeypatch.setattr(stt, "DECODE_BACKEND", "thread")
+    
+    create_task(task_id, "/test/input.wav", "zh", "small", callback_url="http://example.com/hook")
+    try:
+        with pytest.raises(Exception):
+            create_task_job(task_id, "/test/input.wav", "zh", "small")()
+        
+        assert len(deliveries) == 1
+        assert deliveries[0][2]["event"] == "task.failed"
+        assert get_task_status(task_id)["error"] == "Model not found"
+    finally:
+        get_task_store().delete(task_id)
+
+def test_outcome_counted_once():
+    """Test repeated terminal updates count the task outcome only once"""
+    from api.metrics import TASKS_TOTAL
+    from api.task_store import get_task_store
+    task_id = "test-task-outcome"
+    before = TASKS_TOTAL.value(status="failed")
+    
+    create_task(task_id, "/test/input.wav", "zh", "small")
+    try:
+        update_task_status(task_id, "processing")
+        update_task_status(task_id, "failed", error="Decode failed")
+        update_task_status(task_id, "failed", error="Decode failed")
+        assert TASKS_TOTAL.value(status="failed") == before + 1
+    finally:
+        get_task_store().delete(task_id)
+
+def test_recover_interrupted_tasks(monkeypatch, tmp_path):
+    """Test tasks left queued or processing are re-queued at startup"""
+    import api.tasks
+    from api.task_store import JsonTaskStore
+    store = JsonTaskStore(str(tmp_path / "tasks"))
+    monkeypatch.setattr(api.tasks, "get_task_store", lambda: store)
+    monkeypatch.setattr(api.tasks, "BACKGROUND_TASK_ENABLED", True)
+    queued = []
+    monkeypatch.setattr(api.tasks, "start_background_task",
+                        lambda task_id, path, language, model_size, audio_track=0: queued.append((task_id, audio_track)))
+    
+    input_file = tmp_path / "input.mp4"
+    input_file.write_bytes(b"audio")
+    create_task("interrupted", str(input_file), "en", "small", audio_track=1)
+    update_task_status("interrupted", "processing")
+    create_task("waiting", str(input_file), "en", "small")
+    create_task("lost", str(tmp_path / "missing.wav"), "en", "small")
+    create_task("finished", str(input_file), "en", "small")
+    update_task_status("finished", "done", result={"text": "", "confidence": 0.0})
+    
+    assert api.tasks.recover_interrupted_tasks() == 2
+    assert sorted(queued) == [("interrupted", 1), ("waiting", 0)]
+    assert store.get("interrupted")["status"] == "queued"
+    assert store.get("lost")["status"] == "failed"
+    assert store.get("finished")["status"] == "done"
+
+def test_cleanup_old_tasks_removes_outputs():
+    """Test cleanup deletes old tasks together with their output files"""
+    from datetime import datetime, timedelta
+    from api.tasks import cleanup_old_tasks
+    from api.stt import complete_task
+    from api.task_store import get_task_store
+    from api.config import OUTPUT_DIR
+    task_id = "test-task-cleanup"
+    
+    create_task(task_id, "/test/input.wav", "zh", "small")
+    complete_task(task_id, {"text": "hello", "confidence": 0.9, "segments": [], "vtt_segments": []})
+    get_task_store().update(task_id, {"created_at": (datetime.now() - timedelta(days=30)).isoformat()})
+    outputs = [os.path.join(OUTPUT_DIR, task_id + suffix) for suffix in (".txt", ".text.json", ".vtt", ".srt", ".words")]
+    assert all(os.path.exists(path) for path in outputs)
+    
+    assert cleanup_old_tasks() >= 1
+    assert get_task_status(task_id) is None
+    assert not any(os.path.exists(path) for path in outputs)
+
+def test_artifacts_written_only_after_done(monkeypatch):
+    """Test rendered artifacts never exist while the task record is not done"""
+    import api.stt
+    from api.stt import complete_task
+    from api.artifacts import get_artifact_info, delete_task_artifacts
+    from api.words import delete_task_words
+    from api.task_store import get_task_store
+    from api.config import OUTPUT_DIR
+    task_id = "test-task-artifact-order"
+    result = {"text": "hello", "confidence": 0.9, "segments": [], "vtt_segments": []}
+    seen = []
+    
+    def record_status(task_id, status, **kwargs):
+        seen.append(get_artifact_info(task_id, "text"))
+        return update_task_status(task_id, status, **kwargs)
+    
+    create_task(task_id, "/test/input.wav", "zh", "small")
+    monkeypatch.setattr(api.stt, "update_task_status", record_status)
+    try:
+        complete_task(task_id, result)
+        assert seen == [None]
+        assert get_artifact_info(task_id, "text") is not None
+        
+        # No artifacts for a task whose record could not be updated
+        get_task_store().delete(task_id)
+        delete_task_artifacts(task_id)
+        complete_task(task_id, result)
+        assert get_artifact_info(task_id, "text") is None
+    finally:
+        get_task_store().delete(task_id)
+        delete_task_artifacts(task_id)
+        delete_task_words(task_id)
+        os.remove(os.path.join(OUTPUT_DIR, f"{task_id}.txt"))
@@ -0,0 +1,46 @@
+"""
+Utility tests for Vosk STT service
+"""
+import asyncio
+import io
+import os
+import pytest
+from starlette.datastructures import UploadFile
+from api.utils import save_upload_file, FileTooLargeError, validate_callback_url
+
+def test_save_upload_file(tmp_path):
+    """Test uploads are streamed to disk in chunks"""
+    content = os.urandom(10000)
+    upload = UploadFile(io.BytesIO(content), filename="audio.wav")
+    destination = tmp_path / "audio.wav"
+    
+    size = asyncio.run(save_upload_file(upload, str(destination), max_size=20000, chunk_size=1024))
+    
+    assert size == len(content)
+    assert destination.read_bytes() == content
+
+def test_save_upload_file_too_large(tmp_path):
+    """Test oversized uploads are aborted and the partial file removed"""
+    upload = UploadFile(io.BytesIO(b"0" * 5000), filename="audio.wav")
+    destination = tmp_path / "audio.wav"
+    
+    with pytest.raises(FileTooLargeError, match="exceeds maximum limit"):
+        asyncio.run(save_upload_file(upload, str(destination), max_size=3000, chunk_size=1024))
+    
+    assert not destination.exists()
+
+def test_validate_callback_url_rejects_private_hosts(monkeypatch):
+    """Test callback URLs resolving to loopback, link-local or private hosts are rejected"""
+    from api import utils
+    
+    for url in ("http://127.0.0.1:8000/hook", "http://localhost/hook", "http://169.254.169.254/latest",
+                "http://10.0.0.5/hook", "http://[::1]/hook", "http://[::ffff:192.168.1.1]/hook"):
+        assert not validate_callback_url(url)["valid"], url
+    assert validate_callback_url("http://127.0.0.1:8000/hook", allow_private_hosts=True)["valid"]
+    assert not validate_callback_url("ftp://example.com/hook", allow_private_hosts=True)["valid"]
+    
+    resolved = {"public.example": "93.184.215.14", "internal.example": "192.168.0.10"}
+    monkeypatch.setattr(utils.socket, "getaddrinfo",
+                        lambda host, port: [(None, None, None, "", (resolved[host], 0))])
+    assert validate_callback_url("https://public.example/hook")["valid"]
+    assert not validate_callback_url("https://internal.example/hook")["valid"]
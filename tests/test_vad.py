@@ -0,0 +1,48 @@
+"""
+Silence splitting tests for Vosk STT service
+"""
+import math
+from array import array
+from api.vad import split_pcm_at_silence
+
+RATE = 16000
+
+def tone(seconds, amplitude=8000):
+    """Generate a 440Hz tone as s16le PCM"""
+    samples = array("h", (int(amplitude * math.sin(2 * math.pi * 440 * i / RATE)) for i in range(int(seconds * RATE))))
+    return samples.tobytes()
+
+def silence(seconds):
+    """Generate silence as s16le PCM"""
+    return b"\x00\x00" * int(seconds * RATE)
+
+def test_short_audio_is_single_piece():
+    """Test audio shorter than the maximum is not split"""
+    pcm = tone(1.0)
+    pieces = list(split_pcm_at_silence([pcm], RATE, max_seconds=4, min_seconds=2))
+    
+    assert pieces == [(0.0, pcm)]
+
+def test_split_at_silence():
+    """Test long audio is cut inside the silent gap"""
+    pcm = tone(2.6) + silence(0.4) + tone(3.0)
+    chunks = [pcm[i:i + 8000] for i in range(0, len(pcm), 8000)]
+    
+    pieces = list(split_pcm_at_silence(chunks, RATE, max_seconds=4, min_seconds=2))
+    
+    assert len(pieces) == 2
+    assert 2.6 <= pieces[1][0] <= 3.0
+    assert pieces[0][0] == 0.0
+    assert b"".join(piece for _, piece in pieces) == pcm
+
+def test_pieces_respect_bounds():
+    """Test pieces stay within min and max length without silence"""
+    pcm = tone(10.0)
+    pieces = list(split_pcm_at_silence([pcm], RATE, max_seconds=4, min_seconds=2))
+    
+    for offset, piece in pieces[:-1]:
+        assert 2 * RATE * 2 <= len(piece) <= 4 * RATE * 2
+        assert len(piece) % 2 == 0
+    offsets = [offset for offset, _ in pieces]
+    assert offsets == sorted(offsets)
+    assert b"".join(piece for _, piece in pieces) == pcm
@@ -0,0 +1,197 @@
+"""
+Webhook delivery tests for Vosk STT service
+"""
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+from api.webhooks import WebhookDispatcher, sign_payload
+
+SECRET = "test-webhook-secret"
+
+class StandInServer:
+    """Local HTTP server recording webhook requests"""
+    
+    def __init__(self, failures=0, redirect_to=None):
+        self.requests = []
+        self.failures = failures
+        self.redirect_to = redirect_to
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                if server.redirect_to:
+                    server.requests.append((dict(self.headers), body))
+                    self.send_response(307)
+                    self.send_header("Location", server.redirect_to)
+                elif server.failures > 0:
+                    server.failures -= 1
+                    self.send_response(500)
+                else:
+                    server.requests.append((dict(self.headers), body))
+                    self.send_response(200)
+                self.end_headers()
+            
+            def log_message(self, *args):
+                pass
+        
+        self.httpd = HTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/hook"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+    
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def wait_for(condition, timeout=5.0):
+    """Wait until condition is true"""
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError("Timed out waiting for condition")
+        time.sleep(0.02)
+
+@pytest.fixture
+def server():
+    server = StandInServer()
+    yield server
+    server.close()
+
+def test_delivery_is_signed(tmp_path, server):
+    """Test webhooks are delivered with a valid HMAC signature"""
+    dispatcher = WebhookDispatcher(str(tmp_path), SECRET, allow_private_hosts=True)
+    try:
+        dispatcher.enqueue("task-1", server.url, {"task_id": "task-1", "status": "done"})
+        wait_for(lambda: len(server.requests) == 1)
+    finally:
+        dispatcher.stop()
+    
+    headers, body = server.requests[0]
+    assert json.loads(body) == {"task_id": "task-1", "status": "done"}
+    assert headers["X-Webhook-Signature"] == sign_payload(SECRET, headers["X-Webhook-Timestamp"], body)
+    wait_for(lambda: dispatcher.pending() == [])
+
+def test_delivery_without_secret_is_unsigned(tmp_path, server):
+    """Test no signature header is sent when no webhook secret is configured"""
+    dispatcher = WebhookDispatcher(str(tmp_path), "", allow_private_hosts=True)
+    try:
+        dispatcher.enqueue("task-1", server.url, {"task_id": "task-1"})
+        wait_for(lambda: len(server.requests) == 1)
+    finally:
+        dispatcher.stop()
+    
+    headers, _ = server.requests[0]
+    assert "X-Webhook-Signature" not in headers
+    assert headers["X-Webhook-Timestamp"]
+
+def test_failed_delivery_is_retried(tmp_path, server):
+    """Test failed deliveries are retried with backoff"""
+    server.failures = 2
+    dispatcher = WebhookDispatcher(str(tmp_path), SECRET, backoff_base=0.05, allow_private_hosts=True)
+    try:
+        dispatcher.enqueue("task-1", server.url, {"task_id": "task-1"})
+        wait_for(lambda: len(server.requests) == 1)
+    finally:
+        dispatcher.stop()
+    assert server.failures == 0
+
+def test_exhausted_delivery_is_kept(tmp_path):
+    """Test deliveries are parked after the maximum number of attempts"""
+    dispatcher = WebhookDispatcher(str(tmp_path), SECRET, timeout=1, max_attempts=2, backoff_base=0.01,
+                                   allow_private_hosts=True)
+    try:
+        delivery_id = dispatcher.enqueue("task-1", "http://127.0.0.1:9/unreachable", {})
+        wait_for(lambda: (tmp_path / f"{delivery_id}.failed").exists())
+    finally:
+        dispatcher.stop()
+    assert dispatcher.pending() == []
+
+def test_pending_delivery_survives_restart(tmp_path, server):
+    """Test deliveries persisted before a restart are sent afterwards"""
+    first = WebhookDispatcher(str(tmp_path), SECRET, allow_private_hosts=True)
+    first.start = lambda: None  # simulate a crash before sending
+    first.enqueue("task-1", server.url, {"task_id": "task-1"})
+    assert len(first.pending()) == 1
+    
+    restarted = WebhookDispatcher(str(tmp_path), SECRET, allow_private_hosts=True)
+    try:
+        restarted.start()
+        wait_for(lambda: len(server.requests) == 1)
+    finally:
+        restarted.stop()
+
+def test_queue_error_does_not_stop_sender(tmp_path, server, monkeypatch):
+    """Test an I/O error while recording a retry does not kill the sender thread"""
+    failing = StandInServer(failures=1)
+    dispatcher = WebhookDispatcher(str(tmp_path), SECRET, backoff_base=0.05, allow_private_hosts=True)
+    original_save = dispatcher._save
+    calls = []
+    
+    def flaky_save(delivery):
+        calls.append(delivery["id"])
+        if delivery["attempts"] == 1 and calls.count(delivery["id"]) == 2:
+            raise OSError("No space left on device")
+        original_save(delivery)
+    
+    monkeypatch.setattr(dispatcher, "_save", flaky_save)
+    try:
+        dispatcher.enqueue("task-1", failing.url, {"task_id": "task-1"})
+        wait_for(lambda: len(failing.requests) == 1)
+        dispatcher.enqueue("task-2", server.url, {"task_id": "task-2"})
+        wait_for(lambda: len(server.requests) == 1)
+        assert dispatcher._thread.is_alive()
+    finally:
+        dispatcher.stop()
+        failing.close()
+
+def fake_resolver(monkeypatch, hosts):
+    """Resolve the given host names to fixed addresses, others normally"""
+    real_getaddrinfo = socket.getaddrinfo
+    
+    def getaddrinfo(host, port, *args, **kwargs):
+        if host in hosts:
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (hosts[host], port))]
+        return real_getaddrinfo(host, port, *args, **kwargs)
+    
+    monkeypatch.setattr(socket, "getaddrinfo", getaddrinfo)
+
+def test_delivery_connects_to_resolved_address(tmp_path, server, monkeypatch):
+    """Test deliveries connect to the checked address and keep the host name in the Host header"""
+    port = server.url.split(":")[2].split("/")[0]
+    fake_resolver(monkeypatch, {"hook.example": "127.0.0.1"})
+    dispatcher = WebhookDispatcher(str(tmp_path), SECRET, allow_private_hosts=True)
+    dispatcher.send({"id": "delivery-1", "url": f"http://hook.example:{port}/hook?source=stt", "payload": {}})
+    
+    headers, _ = server.requests[0]
+    assert headers["Host"] == f"hook.example:{port}"
+
+def test_host_rebound_to_private_address_is_not_reached(tmp_path, server, monkeypatch):
+    """Test a callback host that resolves to a private address at delivery time is refused"""
+    from api.utils import validate_callback_url
+    
+    port = server.url.split(":")[2].split("/")[0]
+    url = f"http://hook.example:{port}/hook"
+    fake_resolver(monkeypatch, {"hook.example": "93.184.215.14"})
+    assert validate_callback_url(url, allow_private_hosts=False)["valid"]
+    
+    # Rebound after the task was submitted
+    fake_resolver(monkeypatch, {"hook.example": "127.0.0.1"})
+    dispatcher = WebhookDispatcher(str(tmp_path), SECRET, allow_private_hosts=False)
+    with pytest.raises(ValueError, match="private address"):
+        dispatcher.send({"id": "delivery-1", "url": url, "payload": {}})
+    assert server.requests == []
+
+def test_redirects_are_not_followed(tmp_path, server):
+    """Test a redirect to another host fails the attempt instead of being followed"""
+    redirecting = StandInServer(redirect_to=server.url)
+    dispatcher = WebhookDispatcher(str(tmp_path), SECRET, allow_private_hosts=True)
+    try:
+        with pytest.raises(Exception, match="HTTP 307"):
+            dispatcher.send({"id": "delivery-1", "url": redirecting.url, "payload": {}})
+    finally:
+        redirecting.close()
+    assert len(redirecting.requests) == 1
+    assert server.requests == []
@@ -0,0 +1,99 @@
+"""
+Word table storage tests for Vosk STT service
+"""
+import os
+import pytest
+from api.words import (
+    WordTable, InvalidCursorError, write_task_words, read_task_words, delete_task_words, get_page
+)
+
+SEGMENTS = [
+    {"text": "hello world", "result": [
+        {"conf": 0.9, "end": 0.42, "start": 0.12, "word": "hello"},
+        {"conf": 1.0, "end": 0.9, "start": 0.45, "word": "world"}
+    ]},
+    {"text": "", "result": []},
+    {"text": "hello 世界", "result": [
+        {"conf": 0.5, "end": 3600.25, "start": 3600.0, "word": "hello"},
+        {"conf": 0.75, "end": 3601.0, "start": 3600.3, "word": "世界"}
+    ]}
+]
+
+def test_round_trip_preserves_segments():
+    """Test segments are rebuilt from the columnar form unchanged"""
+    table = WordTable.from_segments(SEGMENTS)
+
+    assert len(table) == 4
+    assert table.vocabulary == ["hello", "world", "世界"]
+    assert WordTable.decode(table.encode()).to_segments() == SEGMENTS
+
+def test_encoded_table_is_smaller_than_json():
+    """Test repeated words compress well below their JSON size"""
+    import json
+    words = [{"conf": 1.0, "end": i + 0.5, "start": float(i), "word": f"w{i % 50}"} for i in range(10000)]
+    table = WordTable.from_segments([{"text": "", "result": words}])
+
+    assert len(table.encode()) < len(json.dumps(words)) / 5
+    assert table.word(9999) == words[9999]
+
+def test_decode_rejects_other_data():
+    """Test foreign data is not read as a word table"""
+    with pytest.raises(ValueError):
+        WordTable.decode(b"{}")
+
+def test_time_range_queries():
+    """Test words and segments overlapping a time range are found by binary search"""
+    table = WordTable.from_segments(SEGMENTS)
+
+    assert table.find_words() == (0, 4)
+    assert table.find_words(0.5, 3600.1) == (1, 3)
+    assert table.find_words(1.0, 2.0) == (2, 2)
+    assert table.segment_count() == 2
+    assert table.find_segments(0.5, 3600.1) == (0, 2)
+    assert table.find_segments(3600.5) == (1, 2)
+    assert table.segment(1) == {"start": 3600.0, "end": 3601.0, "text": "hello 世界", "confidence": 0.625}
+
+def test_cursor_pagination():
+    """Test pages follow next_cursor until the range is exhausted"""
+    page = get_page((2, 7), None, 2, lambda index: index)
+    assert page == {"items": [2, 3], "total": 5, "next_cursor": "4"}
+    page = get_page((2, 7), page["next_cursor"], 2, lambda index: index)
+    assert page["items"] == [4, 5]
+    page = get_page((2, 7), page["next_cursor"], 2, lambda index: index)
+    assert page == {"items": [6], "total": 5, "next_cursor": None}
+
+    for cursor in ("abc", "1", "8"):
+        with pytest.raises(InvalidCursorError):
+            get_page((2, 7), cursor, 2, lambda index: index)
+
+def test_task_words_persistence():
+    """Test word tables are written, read back and deleted per task"""
+    write_task_words("words-test", WordTable.from_segments(SEGMENTS))
+    try:
+        assert read_task_words("words-test").to_segments() == SEGMENTS
+    finally:
+        delete_task_words("words-test")
+    assert read_task_words("words-test") is None
+
+def test_complete_task_stores_words_outside_task_record():
+    """Test completed tasks keep word-level segments only in the word table"""
+    from api.stt import complete_task
+    from api.tasks import create_task
+    from api.task_store import get_task_store
+    from api.artifacts import delete_task_artifacts
+    from api.config import OUTPUT_DIR
+
+    task_id = "words-test-task"
+    create_task(task_id, "/test/input.wav", "en", "small")
+    try:
+        complete_task(task_id, {"text": "hello world", "confidence": 0.8, "segments": SEGMENTS, "vtt_segments": []})
+
+        result = get_task_store().get(task_id)["result"]
+        assert "segments" not in result
+        assert result["word_count"] == 4
+        assert read_task_words(task_id).to_segments() == SEGMENTS
+    finally:
+        get_task_store().delete(task_id)
+        delete_task_artifacts(task_id)
+        delete_task_words(task_id)
+        os.remove(os.path.join(OUTPUT_DIR, f"{task_id}.txt"))